@@ -1,28 +1,53 @@
 import { useEffect } from "react";
-import { useAppStore } from "../stores/appStore";
+import { apiBase, useAppStore } from "../stores/appStore";
 
 interface SyncPollerProps {
-	interval?: number; // 서버 동기화 최소 간격 (ms)
+	interval?: number; // 서버 동기화 최소 간격 (ms), 변경 알림 스트림이 끊겼을 때
+	liveInterval?: number; // 변경 알림 스트림이 연결돼 있을 때의 안전망 간격 (ms)
 	tick?: number;     // 타이머 체크 주기 (ms)
 }
 
-export function SyncPoller({ interval = 10_000, tick = 1_000 }: SyncPollerProps) {
+export function SyncPoller({ interval = 10_000, liveInterval = 120_000, tick = 1_000 }: SyncPollerProps) {
 	useEffect(() => {
 		let cancelled = false;
 		let timer: number;
+		let events: EventSource | undefined;
+		let live = false;  // /api/events 연결 중
+		let dirty = false; // 변경 알림을 받았지만 아직 가져오지 않음
+
+		const pull = () => {
+			const { lastLoadedAt, isLoading, loadChanges } = useAppStore.getState();
+			if (isLoading) return;
+			if (dirty || Date.now() - lastLoadedAt >= (live ? liveInterval : interval)) {
+				dirty = false;
+				loadChanges(lastLoadedAt === 0);
+			}
+		};
 
 		(async () => {
 			// 마지막으로 저장된 스냅샷 로드 등...
 			await useAppStore.getState().bootstrap();
+			if (cancelled) return;
+
+			// 서버 변경 알림(SSE): 알림이 올 때만 가져오고, 타이머는 안전망
+			// 재연결은 EventSource가 Last-Event-ID로 알아서 함
+			if (typeof EventSource !== "undefined") {
+				events = new EventSource(apiBase + "/api/events");
+				events.onopen = () => {
+					live = true;
+				};
+				events.onerror = () => {
+					live = false;
+				};
+				events.addEventListener("change", () => {
+					dirty = true;
+					pull();
+				});
+			}
 
 			// Poll loop
 			const loop = () => {
-				const { lastLoadedAt, isLoading, loadChanges } = useAppStore.getState();
-
-				if (!isLoading && Date.now() - lastLoadedAt >= interval) {
-					loadChanges(lastLoadedAt === 0);
-				}
-
+				pull();
 				if (!cancelled) {
 					timer = window.setTimeout(loop, tick);
 				}
@@ -34,8 +59,9 @@ export function SyncPoller({ interval = 10_000, tick = 1_000 }: SyncPollerProps)
 		return () => {
 			cancelled = true;
 			clearTimeout(timer);
+			events?.close();
 		};
-	}, [interval, tick]);
+	}, [interval, liveInterval, tick]);
 
 	return null;
 }
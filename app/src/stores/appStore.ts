@@ -1,8 +1,9 @@
 import { create } from "zustand";
 import { devtools } from "zustand/middleware";
 import { formatISO, parse } from "date-fns";
-import type { BaseEntity as BaseEntity, Contract as Contract, EntityCache, Label, Person, RefreshPolicy, Reviewer } from "../types";
+import type { BaseEntity as BaseEntity, Contract as Contract, EntityCache, Label, Person, RefreshPolicy, Reviewer, ContractSyncRow, LabelSyncRow, SyncRequest, SyncResponse } from "../types";
 import { cleanupSnapshots, loadLatestSnapshot, saveSnapshot, type SnapshotMeta } from "./snapshotDb";
+import { applyPatch, JsonPatchError } from "../utils/jsonPatch";
 
 export interface PendingChanges {
 	contracts: EntityCache<Contract>;
@@ -33,7 +34,7 @@ interface AppState {
 	setRefreshPolicy: (id: number, policy: RefreshPolicy) => Promise<void>;
 }
 
-const apiBase = "http://localhost:8080"; // 개발용, 실제 배포시에는 빈 문자열로
+export const apiBase = "http://localhost:8080"; // 개발용, 실제 배포시에는 빈 문자열로
 
 type RawEntry = {
 	id: number;
@@ -41,16 +42,10 @@ type RawEntry = {
 	deleted_at: number | null;
 };
 
-type ContractRow = RawEntry & {
+// detail/chats가 채워진 전체 행 (delta 항목은 resolveDeltaRow로 만듦), Contract._source로 보관
+type ContractRow = ContractSyncRow & {
 	detail: any;
 	chats: any[];
-	extra?: Record<string, any>;
-	source_fetched_at: number;
-	source_updated_at: number;
-	user_updated_at: number;
-	updated_at: number;
-	deleted_at: number | null;
-	refresh_policy?: RefreshPolicy;
 };
 
 // 서버 API 호출 함수들
@@ -62,8 +57,7 @@ const serverAPI = {
 	// 	return response.json();
 	// },
 
-	sync: async ({ contracts, labels }: { contracts: number; labels: number }) => {
-		console.log("Syncing since", contracts, labels);
+	sync: async ({ contracts, labels, delta }: SyncRequest): Promise<SyncResponse> => {
 		const response = await fetch(apiBase + "/api/sync", {
 			method: "POST",
 			headers: {
@@ -72,6 +66,7 @@ const serverAPI = {
 			body: JSON.stringify({
 				contracts: contracts ?? 0,
 				labels: labels ?? 0,
+				delta: delta ?? false,
 			}),
 		});
 		if (!response.ok) throw new Error("Failed to sync");
@@ -88,6 +83,13 @@ const serverAPI = {
 		return response.json();
 	},
 
+	// 지정한 계약의 전체 문서 (delta 항목을 적용할 수 없을 때)
+	getContractsByIds: async (ids: number[]): Promise<{ items: ContractRow[] }> => {
+		const response = await fetch(apiBase + `/api/contracts?allow_deleted=1&ids=${ids.join(",")}`);
+		if (!response.ok) throw new Error("Failed to fetch contracts");
+		return response.json();
+	},
+
 	getLabels: async (updatedSince: number = 0) => {
 		let url = apiBase + "/api/labels";
 		if (updatedSince) {
@@ -161,8 +163,25 @@ export const useAppStore = create<AppState>()(
 			try {
 				autoApply = autoApply ?? get().autoApplyChanges;
 				const { pendingChanges } = get();
-				const contractsResult = await updateCacheFromServer(serverAPI.getContracts, pendingChanges.contracts, toContract, true);
-				const labelsResult = await updateCacheFromServer(serverAPI.getLabels, pendingChanges.labels, toLabel, true);
+				// 계약/라벨을 한 번에 (서버에서 같은 스냅샷)
+				// delta: 갖고 있는 detail/chats는 patch/추가분만 받음 (처음이면 받을 게 전부라 의미 없음)
+				const data = await serverAPI.sync({
+					contracts: pendingChanges.contracts.lastUpdated,
+					labels: pendingChanges.labels.lastUpdated,
+					delta: pendingChanges.contracts.lastUpdated > 0,
+				});
+				const { contracts } = get();
+				const contractRows = await resolveContractRows(
+					data.contracts.items,
+					(id) => (pendingChanges.contracts.idMap[id] ?? contracts.idMap[id])?._source,
+				);
+				const contractsResult = await updateCacheFromServer(
+					async () => ({ items: contractRows, max_updated_at: data.contracts.max_updated_at }),
+					pendingChanges.contracts,
+					toContract,
+					true,
+				);
+				const labelsResult = await updateCacheFromServer(async () => data.labels, pendingChanges.labels, toLabel, true);
 
 				let newPending;
 				if (contractsResult !== pendingChanges.contracts || labelsResult !== pendingChanges.labels) {
@@ -281,6 +300,81 @@ export const useAppStore = create<AppState>()(
 	})),
 );
 
+// delta 항목들 → 전체 행. 이전 사본이 없거나 patch가 맞지 않는 항목은 ids=로 전체 문서를 다시 받음
+async function resolveContractRows(items: ContractSyncRow[], previous: (id: number) => ContractRow | undefined): Promise<ContractRow[]> {
+	const rows: ContractRow[] = [];
+	const missing: ContractSyncRow[] = [];
+	for (const item of items) {
+		const row = resolveDeltaRow(item, previous(item.id));
+		if (row) {
+			rows.push(row);
+		} else {
+			missing.push(item);
+		}
+	}
+	for (let i = 0; i < missing.length; i += 200) {
+		const chunk = missing.slice(i, i + 200);
+		const { items: full } = await serverAPI.getContractsByIds(chunk.map((r) => r.id));
+		const byId = new Map(full.map((r) => [r.id, r]));
+		for (const item of chunk) {
+			const row = byId.get(item.id);
+			// ids= 응답에는 label_ids가 없음: sync 항목의 것을 씀
+			if (row) rows.push({ ...row, label_ids: item.label_ids });
+		}
+	}
+	return rows;
+}
+
+// delta 항목 하나를 이전 사본(prev)에 적용. 적용할 수 없으면 null
+function resolveDeltaRow(item: ContractSyncRow, prev: ContractRow | undefined): ContractRow | null {
+	let detail = item.detail;
+	if (detail === undefined) {
+		if (!prev) return null;
+		if (item.detail_patch) {
+			// patch는 base 버전의 detail에만 맞음
+			if (prev.detail_updated_at !== item.detail_patch.base) return null;
+			try {
+				detail = applyPatch(prev.detail, item.detail_patch.ops);
+			} catch (e) {
+				if (e instanceof JsonPatchError) return null;
+				throw e;
+			}
+		} else {
+			detail = prev.detail;
+		}
+	}
+
+	let chats = item.chats;
+	if (chats === undefined) {
+		// 이전 사본이 없어도 채팅을 받은 적 없는 계약(chats_updated_at=0)이면 빈 목록
+		if (!prev && item.chats_updated_at) return null;
+		chats = mergeChats(prev?.chats ?? [], item.chats_added ?? []);
+	}
+
+	const row: ContractRow = { ...item, detail, chats };
+	delete row.detail_patch;
+	delete row.chats_added;
+	return row;
+}
+
+// 메시지 id(없으면 내용)로 병합: 같은 메시지는 교체, 처음 보는 메시지는 끝에 추가
+function mergeChats(prev: any[], added: any[]): any[] {
+	if (added.length === 0) return prev;
+	const key = (m: any) => (m && m.id != null ? `id:${m.id}` : JSON.stringify(m));
+	const merged = [...prev];
+	const index = new Map(merged.map((m, i) => [key(m), i]));
+	for (const m of added) {
+		const i = index.get(key(m));
+		if (i === undefined) {
+			index.set(key(m), merged.length);
+			merged.push(m);
+		} else {
+			merged[i] = m;
+		}
+	}
+	return merged;
+}
+
 function toContract(raw: ContractRow): Contract {
 	const { id, detail } = raw;
 	let extra = raw.extra || {};
@@ -384,7 +478,7 @@ function toContract(raw: ContractRow): Contract {
 		requestedDate: (detail.reviewRequestDate || detail.createDate).replaceAll("/", "-"),
 		effectiveDate: detail.enforcementDate ? detail.enforcementDate.replaceAll("/", "-") : null,
 	};
-	contract.labels = extra.labels || [];
+	contract.labels = raw.label_ids ?? extra.labels ?? [];
 	(contract as any)._source = raw;
 
 	return contract as Contract;
@@ -394,7 +488,7 @@ function toPerson({ name, email, department }: { name: string; email: string; de
 	return { name, email, department };
 }
 
-function toLabel(raw: any): Label {
+function toLabel(raw: LabelSyncRow): Label {
 	return {
 		id: raw.id,
 		name: raw.name,
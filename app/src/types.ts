@@ -1,32 +1,50 @@
+import type { JsonPatchOp } from "./utils/jsonPatch";
+
 // --- Sync API Types ---
 
 export type RefreshPolicy = 0 | 100; // 0: auto, 100: never
 
+// POST /api/sync: 계약/라벨 증분을 서버의 한 읽기 트랜잭션에서
 export interface SyncRequest {
-	since: {
-		contract: number; // ms timestamp
-		label: number; // ms timestamp
-	};
+	contracts: number; // ms timestamp (cursor)
+	labels: number; // ms timestamp (cursor)
+	delta?: boolean;
 }
 
 // contracts/labels: snapshot rows (updated_at > since), including deleted_at
+// 계약 항목: 서버 CONTRACT_API_COLUMNS + detail/chats (+ label_ids, /api/sync)
+// delta 요청이면 detail/chats 대신 detail_patch/chats_added가 오거나, 안 바뀐 쪽은 생략됨
 export interface ContractSyncRow {
-	[key: string]: any; // for now, allow any fields (should match DB)
 	id: number;
+	detail?: any;
+	chats?: any[];
+	detail_patch?: { base: number; ops: JsonPatchOp[] }; // base: patch가 적용되는 detail_updated_at
+	chats_added?: any[]; // updated_since 이후 새로 기록된 메시지 (메시지 id로 병합)
+	extra?: Record<string, any>; // 예전 스냅샷 호환
+	notes?: string | null;
+	source_fetched_at: number;
+	source_updated_at: number;
+	user_updated_at: number;
 	updated_at: number;
 	deleted_at: number | null;
+	refresh_policy?: RefreshPolicy;
+	detail_updated_at?: number;
+	chats_updated_at?: number;
+	label_ids?: number[];
 }
 
 export interface LabelSyncRow {
-	[key: string]: any;
 	id: number;
+	name: string;
+	color: string;
+	order_rank: number;
 	updated_at: number;
 	deleted_at: number | null;
 }
 
 export interface SyncResponse {
-	contracts: ContractSyncRow[];
-	labels: LabelSyncRow[];
+	contracts: { items: ContractSyncRow[]; max_updated_at: number; delta: boolean };
+	labels: { items: LabelSyncRow[]; max_updated_at: number };
 }
 // Global type definitions for the contract review application
 
@@ -117,11 +135,10 @@ export interface ContractHistoryAttachment extends ContractHistoryBase {
 	type: "attachment";
 	contractDocList?: Array<{
 		path: string;
-		fileText: string;
 		fileName: string;
 		extension: string;
 		type: string;
-		fileId: string;
+		fileId: number; // 서버 normalize에서 숫자로 (fileText는 저장 안 함)
 	}>;
 }
 
@@ -0,0 +1,87 @@
+// 최소한의 RFC 6902 JSON Patch 적용 (server/jsonpatch.py의 apply_patch와 같은 규칙)
+// 서버가 만드는 add / remove / replace만 지원, 배열 끝 추가는 "/-"
+
+export type JsonPatchOp =
+	| { op: "add"; path: string; value: any }
+	| { op: "replace"; path: string; value: any }
+	| { op: "remove"; path: string };
+
+export class JsonPatchError extends Error {}
+
+function parsePointer(path: string): string[] {
+	if (path === "") return [];
+	if (!path.startsWith("/")) throw new JsonPatchError(`invalid pointer: ${path}`);
+	return path
+		.slice(1)
+		.split("/")
+		.map((t) => t.replaceAll("~1", "/").replaceAll("~0", "~"));
+}
+
+function listIndex(container: any[], token: string, allowEnd: boolean): number {
+	if (token === "-" && allowEnd) return container.length;
+	if (!/^(0|[1-9][0-9]*)$/.test(token)) throw new JsonPatchError(`invalid array index: ${token}`);
+	const i = Number(token);
+	if (i > container.length || (i === container.length && !allowEnd)) {
+		throw new JsonPatchError(`array index out of range: ${i}`);
+	}
+	return i;
+}
+
+function isObject(v: any): v is Record<string, any> {
+	return v !== null && typeof v === "object" && !Array.isArray(v);
+}
+
+/**
+ * doc에 ops를 적용한 새 문서를 반환 (doc은 건드리지 않음). 경로가 맞지 않으면 JsonPatchError.
+ */
+export function applyPatch<T = any>(doc: T, ops: JsonPatchOp[]): T {
+	let root: any = structuredClone(doc);
+	for (const op of ops) {
+		const tokens = parsePointer(op.path);
+		if (tokens.length === 0) {
+			if (op.op === "add" || op.op === "replace") {
+				root = structuredClone(op.value);
+				continue;
+			}
+			throw new JsonPatchError(`cannot ${op.op} the document root`);
+		}
+
+		let parent: any = root;
+		for (const t of tokens.slice(0, -1)) {
+			if (Array.isArray(parent)) {
+				parent = parent[listIndex(parent, t, false)];
+			} else if (isObject(parent)) {
+				if (!Object.hasOwn(parent, t)) throw new JsonPatchError(`path not found: ${t}`);
+				parent = parent[t];
+			} else {
+				throw new JsonPatchError(`cannot traverse into ${typeof parent}`);
+			}
+		}
+
+		const last = tokens[tokens.length - 1];
+		if (Array.isArray(parent)) {
+			if (op.op === "add") {
+				parent.splice(listIndex(parent, last, true), 0, structuredClone(op.value));
+			} else if (op.op === "remove") {
+				parent.splice(listIndex(parent, last, false), 1);
+			} else if (op.op === "replace") {
+				parent[listIndex(parent, last, false)] = structuredClone(op.value);
+			} else {
+				throw new JsonPatchError(`unsupported op: ${(op as any).op}`);
+			}
+		} else if (isObject(parent)) {
+			if (op.op === "add") {
+				parent[last] = structuredClone(op.value);
+			} else if (op.op === "remove" || op.op === "replace") {
+				if (!Object.hasOwn(parent, last)) throw new JsonPatchError(`path not found: ${op.path}`);
+				if (op.op === "remove") delete parent[last];
+				else parent[last] = structuredClone(op.value);
+			} else {
+				throw new JsonPatchError(`unsupported op: ${(op as any).op}`);
+			}
+		} else {
+			throw new JsonPatchError(`cannot apply ${op.op} to ${typeof parent}`);
+		}
+	}
+	return root;
+}
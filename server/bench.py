@@ -0,0 +1,181 @@
+# bench.py
+# -*- coding: utf-8 -*-
+
+"""
+Read-path micro benchmark (standard library only).
+
+    python3 -m server.bench [--db casely.db] [--requests 2000] [--synthetic 3000]
+
+1) per-request connection overhead, for a trivial query:
+     fresh   : open_ro() per request with the old authorizer that rebuilt its
+               deny set from dir(sqlite3) on every callback (the pre-pool path)
+     fresh+  : open_ro() per request, deny set built once
+     pooled  : request_conns() from the RO pool
+2) a typical read workload (contract query page, label list, search) under each
+   SQLiteProfile, on pooled connections.
+
+Without --db (or when the file does not exist) a throwaway DB with --synthetic
+contracts is generated in a temp directory.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from server import db as _db
+
+
+# The pre-pool read-only authorizer, verbatim: the deny set is rebuilt on every callback.
+def _legacy_authorizer(action, p1, p2, dbname, source):
+    deny_ops = {
+        getattr(sqlite3, k)
+        for k in dir(sqlite3)
+        if k.startswith("SQLITE_")
+        and any(
+            x in k
+            for x in (
+                "INSERT",
+                "UPDATE",
+                "DELETE",
+                "TRANSACTION",
+                "ALTER",
+                "ATTACH",
+                "DETACH",
+                "VACUUM",
+                "REINDEX",
+                "CREATE",
+                "DROP",
+            )
+        )
+    }
+    return sqlite3.SQLITE_DENY if action in deny_ops else sqlite3.SQLITE_OK
+
+
+def _timed(fn: Callable[[], None], n: int) -> Dict[str, float]:
+    samples: List[float] = []
+    for _ in range(n):
+        t = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t)
+    samples.sort()
+    return {
+        "mean_us": statistics.fmean(samples) * 1e6,
+        "p50_us": samples[len(samples) // 2] * 1e6,
+        "p99_us": samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6,
+    }
+
+
+def _print_row(name: str, r: Dict[str, float]) -> None:
+    print(f"  {name:<12} mean {r['mean_us']:9.1f} us   p50 {r['p50_us']:9.1f} us   p99 {r['p99_us']:9.1f} us")
+
+
+def _synthesize(n: int) -> None:
+    _db.init_all()
+    rnd = random.Random(1)
+    statuses = ["REVIEW", "FINISH", "REQUEST", "HOLD"]
+    words = ["계약", "검토", "요청", "수정", "승인", "반려", "완료", "supply", "license", "service", "agreement"]
+
+    def fill(conn):
+        conn.executemany(
+            "INSERT OR IGNORE INTO labels(id, name, updated_at) VALUES(?, ?, ?)",
+            [(i, f"label {i}", 0) for i in range(1, 6)],
+        )
+        for cid in range(1, n + 1):
+            detail = {
+                "id": cid,
+                "name": " ".join(rnd.choice(words) for _ in range(4)) + f" {cid}",
+                "description": " ".join(rnd.choice(words) for _ in range(30)),
+                "status": rnd.choice(statuses),
+                "viewcode": f"2025/01/01-{cid:08d}",
+                "reviewers": [{"name": f"reviewer{rnd.randint(1, 20)}", "department": "legal"}],
+                "contractHistory": [
+                    {"actionText": rnd.choice(words), "comment": " ".join(rnd.choice(words) for _ in range(8)),
+                     "creator": "someone", "createTime": f"2025/01/{1 + h:02d} 10:00"}
+                    for h in range(rnd.randint(1, 6))
+                ],
+            }
+            _db.casely_upsert_fetched_detail(
+                conn, id=cid, detail_json_str=json.dumps(detail, ensure_ascii=False),
+                fetched_at_ms=_db.now_ms(), scheduler=lambda *a: 60_000,
+            )
+            if rnd.random() < 0.3:
+                conn.execute("INSERT OR IGNORE INTO contract_label(contract_id, label_id) VALUES(?, ?)",
+                             (cid, rnd.randint(1, 5)))
+
+    conn = _db.open_rw()
+    try:
+        with _db.tx_immediate(conn):
+            fill(conn)
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", help="existing casely.db to benchmark (read-only)")
+    ap.add_argument("--requests", type=int, default=2000, help="iterations per measurement")
+    ap.add_argument("--synthetic", type=int, default=3000, help="contracts in the generated DB")
+    args = ap.parse_args()
+
+    if args.db and os.path.exists(args.db):
+        _db.CASELY_DB_PATH = os.path.abspath(args.db)
+    else:
+        os.chdir(tempfile.mkdtemp(prefix="casely-bench-"))
+        print(f"generating {args.synthetic} synthetic contracts in {os.getcwd()}")
+        _synthesize(args.synthetic)
+
+    n = args.requests
+    print(f"\n1) per-request connection overhead (SELECT 1 FROM labels LIMIT 1, n={n})")
+
+    def fresh_legacy():
+        conn = _db.open_ro()
+        conn.set_authorizer(_legacy_authorizer)
+        try:
+            conn.execute("SELECT 1 FROM labels LIMIT 1").fetchall()
+        finally:
+            conn.close()
+
+    def fresh():
+        conn = _db.open_ro()
+        try:
+            conn.execute("SELECT 1 FROM labels LIMIT 1").fetchall()
+        finally:
+            conn.close()
+
+    def pooled():
+        with _db.request_conns() as conn:
+            conn.execute("SELECT 1 FROM labels LIMIT 1").fetchall()
+
+    for name, fn in (("fresh", fresh_legacy), ("fresh+", fresh), ("pooled", pooled)):
+        fn()
+        _print_row(name, _timed(fn, n))
+
+    print(f"\n2) read workload per SQLite profile (pooled, n={max(1, n // 10)})")
+
+    def workload():
+        with _db.request_conns() as conn:
+            _db.casely_query_contracts(conn, statuses=["REVIEW"], sort=["-last_history_at"], limit=100)
+            conn.execute("SELECT * FROM labels").fetchall()
+            try:
+                _db.casely_search(conn, "검토 agreement", limit=20)
+            except RuntimeError:
+                pass  # no FTS5 in this SQLite build
+
+    for name in _db.SQLITE_PROFILES:
+        _db.set_sqlite_profile(name)
+        workload()
+        _print_row(name, _timed(workload, max(1, n // 10)))
+    _db.set_sqlite_profile("default")
+    print(f"\nRO pool: {_db.ro_pool_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# compression.py
+# -*- coding: utf-8 -*-
+
+"""
+HTTP response compression helpers (standard library only).
+
+- choose_encoding(accept_encoding): "gzip" | "deflate" | None from an
+  Accept-Encoding header (q-values honoured, gzip preferred)
+- compress(body, encoding) for whole bodies, stream_compressor(encoding) for
+  chunked responses (zlib.compressobj; "deflate" is the zlib format, RFC 9110)
+- StaticCache: static files read and gzip-compressed once, kept in memory
+  and re-read only when the file's mtime/size change
+"""
+
+from __future__ import annotations
+
+import gzip
+import os
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+# bodies smaller than this are sent as is (headers + CPU outweigh the saving)
+MIN_COMPRESS_BYTES = 1024
+LEVEL = 6
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/manifest+json",
+    "image/svg+xml",
+)
+
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.split(";", 1)[0].strip().lower().startswith(COMPRESSIBLE_TYPES)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    if not accept_encoding:
+        return None
+    q: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        if name:
+            q[name] = weight
+    for enc in ("gzip", "deflate"):
+        if q.get(enc, q.get("*", 0.0)) > 0:
+            return enc
+    return None
+
+
+def compress(body: bytes, encoding: str, level: int = LEVEL) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    if encoding == "deflate":
+        return zlib.compress(body, level)
+    raise ValueError(f"unsupported encoding: {encoding!r}")
+
+
+def stream_compressor(encoding: str, level: int = LEVEL):
+    """zlib compressobj producing a gzip (wbits 31) or zlib (wbits 15) stream."""
+    wbits = {"gzip": 31, "deflate": 15}.get(encoding)
+    if wbits is None:
+        raise ValueError(f"unsupported encoding: {encoding!r}")
+    return zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+
+@dataclass(frozen=True)
+class StaticEntry:
+    mtime: float
+    size: int
+    body: bytes
+    gzip_body: Optional[bytes]  # None if not compressible or not worth it
+
+
+class StaticCache:
+    """Static file bodies (+ gzip variant, max level) cached by path, invalidated by mtime/size."""
+
+    def __init__(self, max_file_bytes: int = 16 * 1024 * 1024):
+        self.max_file_bytes = max_file_bytes
+        self._entries: Dict[str, StaticEntry] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str, content_type: str) -> Optional[StaticEntry]:
+        """Entry for path, or None if the file is missing or too large to cache."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if st.st_size > self.max_file_bytes:
+            return None
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is not None and (entry.mtime, entry.size) == (st.st_mtime, st.st_size):
+            return entry
+        with open(path, "rb") as f:
+            body = f.read()
+        gz = None
+        if len(body) >= MIN_COMPRESS_BYTES and is_compressible(content_type):
+            gz = compress(body, "gzip", level=9)
+            if len(gz) > len(body) * 0.9:
+                gz = None
+        entry = StaticEntry(st.st_mtime, st.st_size, body, gz)
+        with self._lock:
+            self._entries[path] = entry
+        return entry
+
+    def warm(self, root: str, guess_type) -> Tuple[int, int]:
+        """Load every file under root; returns (files, bytes saved by gzip)."""
+        files = saved = 0
+        for dirpath, _, names in os.walk(root):
+            for name in names:
+                path = os.path.join(dirpath, name)
+                entry = self.get(path, guess_type(path))
+                if entry is not None:
+                    files += 1
+                    if entry.gzip_body is not None:
+                        saved += len(entry.body) - len(entry.gzip_body)
+        return files, saved
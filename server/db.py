@@ -3,19 +3,37 @@
 """
 - 스키마 버전: PRAGMA user_version(정수)
 - DB 식별   : PRAGMA application_id(law/casely 구분)
-- HTTP: 요청마다 커넥션 열고 닫기(law=RO가 기본, 필요 시 law_rw=True)
+- HTTP: 읽기는 RO 커넥션 풀에서 빌려 쓰고 반납, 쓰기는 writer 스레드(server/writer.py)
+  여러 SELECT가 같은 스냅샷을 봐야 하면 read_tx (POST /api/sync)
+- 커넥션 PRAGMA(cache_size/mmap_size/temp_store)는 SQLiteProfile로 조정 (set_sqlite_profile)
 - SQL은 이 파일 안에서만 관리 (외부는 함수형 API만 사용)
 스키마 버전 1: contracts(user_updated_at), labels, contract_label, issues
+스키마 버전 3: contracts.refresh_policy
+스키마 버전 4: contracts.next_refresh_at/refresh_interval_ms/change_count (계약별 갱신 스케줄)
+스키마 버전 5: contracts.list_fingerprint/list_seen_at (목록 스윕)
+스키마 버전 6: contracts.detail_*/chats_* (detail/chats 별도 fetched_at/updated_at/갱신 스케줄)
+스키마 버전 7: contracts.detail_patch_*/chats_patch_* (직전 버전 대비 JSON patch, delta sync)
+스키마 버전 8: chat_messages (채팅을 메시지 단위로 저장, contracts.chats_json은 더 이상 사용 안 함)
+스키마 버전 9: contracts 추출 컬럼(viewcode/title/status/category/requested_at/last_history_at/last_actor),
+              contract_reviewer (서버 측 조회용 인덱스)
+스키마 버전 10: search_fts (FTS5 전문 검색; trigram 토크나이저, 없으면 unicode61, FTS5가 없으면 생략)
+스키마 버전 11: contracts.chats_json/chats_patch_* 삭제 (v8부터 채팅은 chat_messages)
+스키마 버전 12: contracts.change_gap_ms (변경 간격 EWMA, 갱신 스케줄용)
 """
 
 from __future__ import annotations
 import os
+import re
 import contextlib
 import json
 import sqlite3
 import time
-from typing import Any, Iterable, Optional, Tuple
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 from server.constants import REFRESH_POLICY_NEVER
+from server import jsonpatch
+from server import normalize
 
 
 # -------------------------------------------------
@@ -24,7 +42,7 @@ from server.constants import REFRESH_POLICY_NEVER
 
 CASELY_DB_PATH = "casely.db"
 CASELY_APP_ID = 0x43415345  # 'CASE'
-CASE_TARGET_VER = 3  # 마이그레이션 반영
+CASE_TARGET_VER = 12  # 마이그레이션 반영
 
 
 def now_ms() -> int:
@@ -35,11 +53,51 @@ def _dict_factory(cur: sqlite3.Cursor, row: Tuple[Any, ...]) -> dict:
     return {desc[0]: row[i] for i, desc in enumerate(cur.description)}
 
 
+@dataclass(frozen=True)
+class SQLiteProfile:
+    """
+    커넥션마다 적용하는 성능 PRAGMA.
+      cache_size_kib : 커넥션별 페이지 캐시 (KiB, PRAGMA cache_size=-N)
+      mmap_size      : 메모리 맵 I/O 크기 (bytes, 0=사용 안 함)
+      temp_store     : 임시 테이블/정렬 저장소 ("DEFAULT" | "FILE" | "MEMORY")
+    """
+    cache_size_kib: int = 2000
+    mmap_size: int = 0
+    temp_store: str = "DEFAULT"
+
+
+SQLITE_PROFILES: Dict[str, SQLiteProfile] = {
+    "default": SQLiteProfile(),  # SQLite 기본값 그대로
+    "low_memory": SQLiteProfile(cache_size_kib=512, mmap_size=0, temp_store="FILE"),
+    "fast": SQLiteProfile(cache_size_kib=32 * 1024, mmap_size=256 * 1024 * 1024, temp_store="MEMORY"),
+}
+
+_profile: SQLiteProfile = SQLITE_PROFILES["default"]
+
+
+def set_sqlite_profile(profile: SQLiteProfile | str) -> SQLiteProfile:
+    """이후 여는 커넥션에 적용할 프로필 지정 (이름 또는 SQLiteProfile). 풀에 남은 RO 커넥션은 비운다."""
+    global _profile
+    if isinstance(profile, str):
+        if profile not in SQLITE_PROFILES:
+            raise ValueError(f"unknown SQLite profile: {profile!r} (choose from {sorted(SQLITE_PROFILES)})")
+        profile = SQLITE_PROFILES[profile]
+    if profile.temp_store.upper() not in ("DEFAULT", "FILE", "MEMORY"):
+        raise ValueError(f"invalid temp_store: {profile.temp_store!r}")
+    _profile = profile
+    _ro_pool.clear()
+    return profile
+
+
 def _apply_common_pragmas(conn: sqlite3.Connection) -> None:
     conn.row_factory = _dict_factory
     conn.execute("PRAGMA foreign_keys=ON")
     conn.execute("PRAGMA synchronous=NORMAL")
     conn.execute("PRAGMA busy_timeout=5000")
+    p = _profile
+    conn.execute(f"PRAGMA cache_size={-int(p.cache_size_kib)}")
+    conn.execute(f"PRAGMA mmap_size={int(p.mmap_size)}")
+    conn.execute(f"PRAGMA temp_store={p.temp_store.upper()}")
 
 
 def _ensure_wal(conn: sqlite3.Connection) -> None:
@@ -49,6 +107,42 @@ def _ensure_wal(conn: sqlite3.Connection) -> None:
         pass
 
 
+# 읽기 전용 커넥션에서 거부할 authorizer 액션 (모듈 로드 시 한 번만 계산)
+# TRANSACTION(BEGIN/COMMIT/ROLLBACK)은 일부러 목록에 없음:
+#   /api/sync 등은 여러 SELECT를 한 스냅샷에서 읽어야 해서 RO 커넥션에서 read_tx(BEGIN … COMMIT)를 씀
+#   BEGIN은 쓰기 잠금을 잡지 않음 (deferred: 첫 SELECT에서 읽기 스냅샷만). BEGIN IMMEDIATE/EXCLUSIVE는
+#   mode=ro 커넥션에서 SQLITE_READONLY로 실패
+#   → 트랜잭션 안에서의 쓰기는 이 authorizer(INSERT/UPDATE/DELETE/DDL 거부)와
+#     mode=ro + PRAGMA query_only가 막는다. TRANSACTION을 다시 막으면 read_tx가 깨짐
+_RO_DENY_ACTIONS = frozenset(
+    getattr(sqlite3, k)
+    for k in dir(sqlite3)
+    if k.startswith("SQLITE_")
+    and any(
+        x in k
+        for x in (
+            "INSERT",
+            "UPDATE",
+            "DELETE",
+            "ALTER",
+            "ATTACH",
+            "DETACH",
+            "VACUUM",
+            "REINDEX",
+            "CREATE",
+            "DROP",
+        )
+    )
+)
+
+
+def _ro_authorizer(action, p1, p2, dbname, source):
+    # FTS5 가상 테이블 생성자가 sqlite_master UPDATE 문을 prepare만 한다 (실행 X, query_only가 막음)
+    if action == sqlite3.SQLITE_UPDATE and p1 == "sqlite_master":
+        return sqlite3.SQLITE_OK
+    return sqlite3.SQLITE_DENY if action in _RO_DENY_ACTIONS else sqlite3.SQLITE_OK
+
+
 def _set_query_only(conn: sqlite3.Connection) -> None:
     # 읽기 전용 모드 가드
     try:
@@ -56,32 +150,7 @@ def _set_query_only(conn: sqlite3.Connection) -> None:
     except sqlite3.DatabaseError:
         pass
     try:
-
-        def auth_cb(action, p1, p2, dbname, source):
-            deny_ops = {
-                getattr(sqlite3, k)
-                for k in dir(sqlite3)
-                if k.startswith("SQLITE_")
-                and any(
-                    x in k
-                    for x in (
-                        "INSERT",
-                        "UPDATE",
-                        "DELETE",
-                        "TRANSACTION",
-                        "ALTER",
-                        "ATTACH",
-                        "DETACH",
-                        "VACUUM",
-                        "REINDEX",
-                        "CREATE",
-                        "DROP",
-                    )
-                )
-            }
-            return sqlite3.SQLITE_DENY if action in deny_ops else sqlite3.SQLITE_OK
-
-        conn.set_authorizer(auth_cb)  # type: ignore[attr-defined]
+        conn.set_authorizer(_ro_authorizer)  # type: ignore[attr-defined]
     except Exception:
         pass
 
@@ -103,17 +172,82 @@ def open_rw() -> sqlite3.Connection:
     return conn
 
 
-def open_ro() -> sqlite3.Connection:
-    uri = f"file:{CASELY_DB_PATH}?mode=ro&cache=shared"
-    conn = sqlite3.connect(uri, uri=True, isolation_level=None, check_same_thread=True)
+def open_ro(*, check_same_thread: bool = True) -> sqlite3.Connection:
+    # 커넥션별 private 캐시 (shared cache는 테이블 단위 잠금이라 동시 읽기에 불리)
+    uri = f"file:{CASELY_DB_PATH}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, isolation_level=None, check_same_thread=check_same_thread)
     _apply_common_pragmas(conn)
     _set_query_only(conn)
     return conn
 
 
+class _ReadPool:
+    """
+    RO 커넥션 풀. 요청 스레드가 빌려 쓰고 반납 (LIFO: 최근 쓴 커넥션의 페이지 캐시가 따뜻함).
+    - 반납 시 열린 트랜잭션이 있으면 롤백, 오류 난 커넥션은 버림
+    - 최대 max_idle개만 보관, 나머지는 닫음
+    - WAL + autocommit이라 빌릴 때마다 최신 커밋을 본다
+    """
+
+    def __init__(self, max_idle: int = 8):
+        self.max_idle = max_idle
+        self._idle: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+
+    def acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._idle:
+                self.reused += 1
+                return self._idle.pop()
+            self.opened += 1
+        return open_ro(check_same_thread=False)
+
+    def release(self, conn: sqlite3.Connection, *, broken: bool = False) -> None:
+        if not broken and conn.in_transaction:
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                broken = True
+        if not broken:
+            with self._lock:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(conn)
+                    return
+        conn.close()
+
+    def clear(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"idle": len(self._idle), "opened": self.opened, "reused": self.reused}
+
+
+_ro_pool = _ReadPool()
+
+
+def ro_pool_stats() -> Dict[str, int]:
+    return _ro_pool.stats()
+
+
 @contextlib.contextmanager
 def tx_immediate(conn: sqlite3.Connection):
-    """짧은 쓰기 트랜잭션."""
+    """짧은 쓰기 트랜잭션. 이미 트랜잭션 안이면 SAVEPOINT로 중첩된다."""
+    if conn.in_transaction:
+        conn.execute("SAVEPOINT tx_nested")
+        try:
+            yield
+            conn.execute("RELEASE tx_nested")
+        except Exception:
+            conn.execute("ROLLBACK TO tx_nested")
+            conn.execute("RELEASE tx_nested")
+            raise
+        return
     try:
         conn.execute("BEGIN IMMEDIATE")
         yield
@@ -126,6 +260,25 @@ def tx_immediate(conn: sqlite3.Connection):
         raise
 
 
+@contextlib.contextmanager
+def read_tx(conn: sqlite3.Connection):
+    """
+    읽기 트랜잭션 (BEGIN DEFERRED ~ COMMIT). 안의 모든 SELECT가 같은 스냅샷을 본다 (WAL).
+    스냅샷은 첫 SELECT 시점에 잡힘. 이미 트랜잭션 안이면 그대로 사용.
+    """
+    if conn.in_transaction:
+        yield
+        return
+    conn.execute("BEGIN")
+    try:
+        yield
+    finally:
+        try:
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            pass
+
+
 # -------------------------------------------------
 # PRAGMA helpers
 # -------------------------------------------------
@@ -225,9 +378,173 @@ CREATE INDEX IF NOT EXISTS idx_labels_last_updated ON labels(updated_at);
     if cur_ver < 3:
         conn.execute("ALTER TABLE contracts ADD COLUMN refresh_policy INTEGER NOT NULL DEFAULT 0;")
         _set_user_version(conn, 3)
+        cur_ver = 3
+
+    # v3 -> v4: per-contract refresh schedule
+    #   next_refresh_at     : 다음 갱신 예정 시각(ms). 기존 행은 source_fetched_at (오래된 순서 유지)
+    #   refresh_interval_ms : 마지막으로 계산된 갱신 간격
+    #   change_count        : 해시가 실제로 바뀐 횟수
+    if cur_ver < 4:
+        with tx_immediate(conn):
+            conn.execute("ALTER TABLE contracts ADD COLUMN next_refresh_at INTEGER NOT NULL DEFAULT 0;")
+            conn.execute("ALTER TABLE contracts ADD COLUMN refresh_interval_ms INTEGER NOT NULL DEFAULT 0;")
+            conn.execute("ALTER TABLE contracts ADD COLUMN change_count INTEGER NOT NULL DEFAULT 0;")
+            conn.execute("UPDATE contracts SET next_refresh_at = source_fetched_at;")
+            _set_user_version(conn, 4)
+        cur_ver = 4
+
+    # v4 -> v5: list sweep fingerprint
+    #   list_fingerprint : 목록 응답 아이템의 해시 (NULL = 아직 스윕에서 본 적 없음)
+    #   list_seen_at     : 마지막으로 스윕에서 본 시각
+    if cur_ver < 5:
+        with tx_immediate(conn):
+            conn.execute("ALTER TABLE contracts ADD COLUMN list_fingerprint TEXT;")
+            conn.execute("ALTER TABLE contracts ADD COLUMN list_seen_at INTEGER NOT NULL DEFAULT 0;")
+            _set_user_version(conn, 5)
+        cur_ver = 5
+
+    # v5 -> v6: detail/chats 분리
+    #   detail_fetched_at/detail_updated_at, chats_fetched_at/chats_updated_at
+    #   detail 스케줄은 기존 next_refresh_at/refresh_interval_ms 그대로 사용
+    #   chats 스케줄은 chats_next_refresh_at/chats_refresh_interval_ms
+    #   source_fetched_at/source_updated_at 은 둘 중 최신값 (sync API 호환)
+    if cur_ver < 6:
+        with tx_immediate(conn):
+            for col in (
+                "detail_fetched_at", "detail_updated_at",
+                "chats_fetched_at", "chats_updated_at",
+                "chats_next_refresh_at", "chats_refresh_interval_ms",
+            ):
+                conn.execute(f"ALTER TABLE contracts ADD COLUMN {col} INTEGER NOT NULL DEFAULT 0;")
+            conn.execute(
+                """
+                UPDATE contracts SET
+                  detail_fetched_at = source_fetched_at,
+                  detail_updated_at = source_updated_at,
+                  chats_fetched_at  = source_fetched_at,
+                  chats_updated_at  = source_updated_at,
+                  chats_next_refresh_at = next_refresh_at,
+                  chats_refresh_interval_ms = refresh_interval_ms;
+                """
+            )
+            _set_user_version(conn, 6)
+        cur_ver = 6
+
+    # v6 -> v7: delta sync
+    #   detail_patch_json : 직전 버전 → 현재 detail_json 으로 가는 JSON patch (NULL = 없음/전체가 더 작음)
+    #   detail_patch_base : 직전 버전의 detail_updated_at (클라이언트가 이 버전을 갖고 있어야 patch 적용 가능)
+    #   chats_patch_json/chats_patch_base 도 같은 규칙
+    if cur_ver < 7:
+        with tx_immediate(conn):
+            conn.execute("ALTER TABLE contracts ADD COLUMN detail_patch_json TEXT;")
+            conn.execute("ALTER TABLE contracts ADD COLUMN detail_patch_base INTEGER;")
+            conn.execute("ALTER TABLE contracts ADD COLUMN chats_patch_json TEXT;")
+            conn.execute("ALTER TABLE contracts ADD COLUMN chats_patch_base INTEGER;")
+            _set_user_version(conn, 7)
+        cur_ver = 7
+
+    # v7 -> v8: chat_messages
+    #   seq          : 전역 증가 커서 (새 메시지/내용이 바뀐 메시지는 새 seq로 다시 기록)
+    #   message_id   : 원본 메시지 id (없으면 내용 해시)
+    #   position     : 원본 목록에서의 순서
+    #   created_at   : 이 행이 기록된 시각(ms)
+    #   기존 chats_json은 메시지로 옮기고 NULL 처리 (chats_hash는 변경 감지용으로 유지)
+    if cur_ver < 8:
+        with tx_immediate(conn):
+            conn.execute(
+                """
+CREATE TABLE IF NOT EXISTS chat_messages (
+    seq          INTEGER PRIMARY KEY AUTOINCREMENT,
+    contract_id  INTEGER NOT NULL,
+    message_id   TEXT NOT NULL,
+    position     INTEGER NOT NULL,
+    created_at   INTEGER NOT NULL,
+    message_json TEXT NOT NULL CHECK (json_valid(message_json)),
+    message_hash TEXT NOT NULL,
+    UNIQUE (contract_id, message_id),
+    FOREIGN KEY (contract_id) REFERENCES contracts(id) ON DELETE CASCADE
+)
+                """
+            )
+            rows = conn.execute(
+                "SELECT id, chats_json, chats_updated_at FROM contracts WHERE chats_json IS NOT NULL"
+            ).fetchall()
+            for r in rows:
+                _ingest_chat_messages(conn, r["id"], r["chats_json"], int(r["chats_updated_at"] or 0))
+            conn.execute("UPDATE contracts SET chats_json = NULL, chats_patch_json = NULL, chats_patch_base = NULL;")
+            _set_user_version(conn, 8)
+        cur_ver = 8
+
+    # v8 -> v9: 조회용 추출 컬럼 (detail이 바뀔 때 _sync_extracted_fields가 갱신)
+    #   viewcode, title, status, category, requested_at(ms), last_history_at(ms), last_actor
+    #   contract_reviewer(contract_id, name, department) : 검토자별 조회
+    if cur_ver < 9:
+        with tx_immediate(conn):
+            for col, typ in EXTRACTED_COLUMNS:
+                conn.execute(f"ALTER TABLE contracts ADD COLUMN {col} {typ};")
+            conn.execute(
+                """
+CREATE TABLE IF NOT EXISTS contract_reviewer (
+    contract_id INTEGER NOT NULL,
+    name        TEXT NOT NULL,
+    department  TEXT,
+    PRIMARY KEY (contract_id, name),
+    FOREIGN KEY (contract_id) REFERENCES contracts(id) ON DELETE CASCADE
+)
+                """
+            )
+            rows = conn.execute("SELECT id, detail_json FROM contracts WHERE detail_json IS NOT NULL").fetchall()
+            for r in rows:
+                _sync_extracted_fields(conn, r["id"], r["detail_json"])
+            _set_user_version(conn, 9)
+        cur_ver = 9
+
+    # v9 -> v10: search_fts
+    #   rowid = -contract_id : detail 행 (title, description, history)
+    #   rowid = chat_messages.seq : 채팅 메시지 행 (chat)
+    #   detail/메시지가 바뀔 때 _fts_sync_detail/_fts_sync_messages가 rowid로 교체
+    if cur_ver < 10:
+        with tx_immediate(conn):
+            if _create_search_fts(conn):
+                rows = conn.execute("SELECT id, detail_json FROM contracts WHERE detail_json IS NOT NULL").fetchall()
+                for r in rows:
+                    _fts_sync_detail(conn, r["id"], r["detail_json"])
+                seqs = [r["seq"] for r in conn.execute("SELECT seq FROM chat_messages")]
+                _fts_sync_messages(conn, seqs)
+            _set_user_version(conn, 10)
+        cur_ver = 10
+
+    # v10 -> v11: v8 이후 아무도 쓰지 않는 채팅 컬럼 삭제
+    #   DROP COLUMN은 SQLite 3.35+ (테이블 재작성). 그보다 오래된 SQLite면 컬럼은 남겨 둠 (읽지 않으므로 무해)
+    if cur_ver < 11:
+        with tx_immediate(conn):
+            if sqlite3.sqlite_version_info >= (3, 35, 0):
+                cols = {r["name"] for r in conn.execute("PRAGMA table_info(contracts)")}
+                for col in ("chats_json", "chats_patch_json", "chats_patch_base"):
+                    if col in cols:
+                        conn.execute(f"ALTER TABLE contracts DROP COLUMN {col};")
+            _set_user_version(conn, 11)
+        cur_ver = 11
+
+    # v11 -> v12: change_gap_ms = 해시가 바뀐 간격의 EWMA(ms), 0 = 아직 모름
+    #   change_count(횟수)만으로는 빈도를 알 수 없음 → 스케줄러가 자주 바뀌는 계약의 backoff를 이걸로 제한
+    #   기존 행은 0에서 시작 (다음 변경부터 쌓임)
+    if cur_ver < 12:
+        with tx_immediate(conn):
+            conn.execute("ALTER TABLE contracts ADD COLUMN change_gap_ms INTEGER NOT NULL DEFAULT 0;")
+            _set_user_version(conn, 12)
+        cur_ver = 12
 
-    # Always ensure index on refresh_policy exists (safe to run repeatedly)
+    # Always ensure indexes exist (safe to run repeatedly)
     conn.execute("CREATE INDEX IF NOT EXISTS idx_contracts_refresh_policy ON contracts(refresh_policy);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_contracts_next_refresh ON contracts(next_refresh_at);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_contracts_chats_next_refresh ON contracts(chats_next_refresh_at);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_contracts_user_updated ON contracts(user_updated_at);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_chat_messages_contract ON chat_messages(contract_id, position);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_contract_label_label ON contract_label(label_id);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_contract_reviewer_name ON contract_reviewer(name);")
+    for col in ("viewcode", "status", "category", "requested_at", "last_history_at"):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_contracts_{col} ON contracts({col});")
 
 
 def init_all():
@@ -245,14 +562,22 @@ def init_all():
 
 @contextlib.contextmanager
 def request_conns(readonly: bool = True):
-    if readonly:
-        cas = open_ro()
-    else:
+    if not readonly:
         cas = open_rw()
+        try:
+            yield cas
+        finally:
+            cas.close()
+        return
+    cas = _ro_pool.acquire()
+    broken = False
     try:
         yield cas
+    except sqlite3.DatabaseError:
+        broken = True
+        raise
     finally:
-        cas.close()
+        _ro_pool.release(cas, broken=broken)
 
 
 def open_poller_law() -> sqlite3.Connection:
@@ -374,16 +699,64 @@ def casely_get_labels_all(conn: sqlite3.Connection) -> list[dict]:
 
 
 # --- SYNC HELPERS ---
-def casely_get_contracts_sync(conn: sqlite3.Connection, since_ms: int) -> dict:
+# /api/contracts, /api/sync 응답에 나가는 contracts 컬럼
+#   사용자용 컬럼 + detail 본문/patch. 갱신 스케줄/해시/스윕 상태, 추출 컬럼(detail의 사본),
+#   chats_json 등 채팅 컬럼은 v11에서 삭제됨 (채팅은 chat_messages에서)
+#   detail_updated_at/chats_updated_at: delta 판단용, 클라이언트에는 patch base 확인용
+CONTRACT_API_COLUMNS = (
+    "id",
+    "source_fetched_at",
+    "source_updated_at",
+    "user_updated_at",
+    "notes",
+    "deleted_at",
+    "refresh_policy",
+    "detail_updated_at",
+    "chats_updated_at",
+    "detail_json",
+    "detail_patch_json",
+    "detail_patch_base",
+)
+_CONTRACT_API_SELECT = ", ".join(f"c.{col}" for col in CONTRACT_API_COLUMNS)
+
+
+def casely_get_contracts_api(
+    conn: sqlite3.Connection,
+    *,
+    ids: Optional[Iterable[int]] = None,
+    updated_since: int = 0,
+    include_deleted: bool = False,
+) -> sqlite3.Cursor:
+    """
+    GET /api/contracts: ids가 있으면 그 계약들, 아니면 source/user_updated_at > updated_since.
+    행이 많을 수 있으므로 커서 반환 (fetchmany로 나눠 읽기)
+    """
+    if ids is not None:
+        ids = [int(i) for i in ids]
+        where = f"c.id IN ({','.join('?' * len(ids))})"
+        params: list = ids
+    else:
+        where = "(c.source_updated_at > ? OR c.user_updated_at > ?)"
+        params = [updated_since, updated_since]
+    if not include_deleted:
+        where += " AND c.deleted_at IS NULL"
+    return conn.execute(f"SELECT {_CONTRACT_API_SELECT} FROM contracts c WHERE {where}", params)
+
+
+# POST /api/sync: read_tx 안에서 호출 (두 결과가 같은 스냅샷)
+def casely_get_contracts_sync(conn: sqlite3.Connection, since_ms: int) -> sqlite3.Cursor:
     # snapshot: source_updated_at > since OR user_updated_at > since (including deleted rows)
-    rows = conn.execute(
-        """
-        SELECT * FROM contracts
-        WHERE (source_updated_at > ? OR user_updated_at > ?)
+    # label_ids: 라벨 지정(JSON 배열 텍스트). 지정/해제는 user_updated_at을 올리므로 delta에 포함됨
+    # 행이 많을 수 있으므로 커서 반환 (fetchmany로 나눠 읽기)
+    return conn.execute(
+        f"""
+        SELECT {_CONTRACT_API_SELECT},
+               (SELECT json_group_array(l.label_id) FROM contract_label l WHERE l.contract_id = c.id) AS label_ids
+        FROM contracts c
+        WHERE (c.source_updated_at > ? OR c.user_updated_at > ?)
         """,
         (since_ms, since_ms),
-    ).fetchall()
-    return rows
+    )
 
 
 def casely_get_labels_sync(conn: sqlite3.Connection, since_ms: int) -> dict:
@@ -399,6 +772,24 @@ def casely_get_labels_sync(conn: sqlite3.Connection, since_ms: int) -> dict:
     return rows
 
 
+# --- 조건부 응답(ETag)용 검증값 ---
+# 본 쿼리 전에 실행하는 가벼운 집계. 값이 같으면 응답도 같다고 본다.
+#   - 모든 쓰기는 source_updated_at 또는 user_updated_at을 now로 올림 (라벨 지정/삭제 포함)
+#   - COUNT는 행이 새로 생기거나 사라지는 경우 대비
+def casely_contracts_validator(conn: sqlite3.Connection) -> tuple:
+    row = conn.execute(
+        "SELECT MAX(source_updated_at) AS s, MAX(user_updated_at) AS u, COUNT(*) AS n FROM contracts"
+    ).fetchone()
+    return (row["s"] or 0, row["u"] or 0, row["n"])
+
+
+def casely_labels_validator(conn: sqlite3.Connection) -> tuple:
+    row = conn.execute(
+        "SELECT MAX(updated_at) AS u, MAX(deleted_at) AS d, COUNT(*) AS n FROM labels"
+    ).fetchone()
+    return (row["u"] or 0, row["d"] or 0, row["n"])
+
+
 # -------------------------------------------------
 #
 # -------------------------------------------------
@@ -442,6 +833,17 @@ def casely_set_contract_labels(conn: sqlite3.Connection, contract_id: int, label
                 [(contract_id, lid) for lid in label_ids],
             )
 
+def casely_update_contract_fields(conn: sqlite3.Connection, contract_id: int, fields: dict) -> int:
+    """
+    사용자 필드 갱신 (PATCH /api/contracts/{id}). 컬럼 이름은 호출 측에서 허용 목록으로 검증된 것만.
+    반환: 갱신된 행 수
+    """
+    set_clause = ", ".join(f"{k}=?" for k in fields)
+    with tx_immediate(conn):
+        cur = conn.execute(f"UPDATE contracts SET {set_clause} WHERE id=?", (*fields.values(), contract_id))
+    return cur.rowcount
+
+
 def casely_delete_contract_labels(conn: sqlite3.Connection, contract_id: int) -> None:
     """
     Remove all labels from a contract.
@@ -483,106 +885,786 @@ def casely_remove_contract_label(conn: sqlite3.Connection, contract_id: int, lab
         )
     return now
 
-def casely_upsert_fetched_contract(
+# (prev_interval_ms, changed, status, quiet_ms, change_gap_ms) -> next interval ms
+RefreshScheduler = Callable[[int, bool, Optional[str], int, int], int]
+
+# change_gap_ms EWMA에서 새 간격의 가중치
+CHANGE_GAP_ALPHA = 0.3
+
+
+def _next_change_gap(row, fetched_at_ms: int) -> int:
+    """
+    해시가 바뀐 이번 fetch를 반영한 change_gap_ms.
+    간격 = 마지막 변경(detail이든 chats든: source_updated_at) 이후 경과 ms.
+    같은 시각의 변경(detail과 chats를 한 번에 반영)은 새 정보가 아니므로 그대로.
+    """
+    prev_gap = int(row["change_gap_ms"] or 0)
+    gap = fetched_at_ms - int(row["source_updated_at"] or 0)
+    if not row["source_updated_at"] or gap <= 0:
+        return prev_gap
+    if prev_gap <= 0:
+        return gap
+    return int(prev_gap * (1 - CHANGE_GAP_ALPHA) + gap * CHANGE_GAP_ALPHA)
+
+
+EXTRACTED_COLUMNS = (
+    ("viewcode", "TEXT"),
+    ("title", "TEXT"),
+    ("status", "TEXT"),
+    ("category", "TEXT"),
+    ("requested_at", "INTEGER"),
+    ("last_history_at", "INTEGER"),
+    ("last_actor", "TEXT"),
+)
+
+
+def _sync_extracted_fields(conn, contract_id, detail_json_str: str) -> None:
+    """detail에서 조회용 컬럼/검토자 목록/검색 색인을 다시 뽑아 기록 (normalize.extract_fields)."""
+    try:
+        detail = json.loads(detail_json_str)
+    except ValueError:
+        detail = None
+    f = normalize.extract_fields(detail)
+    cols = [c for c, _ in EXTRACTED_COLUMNS]
+    conn.execute(
+        f"UPDATE contracts SET {', '.join(f'{c}=?' for c in cols)} WHERE id=?",
+        (*(f[c] for c in cols), contract_id),
+    )
+    conn.execute("DELETE FROM contract_reviewer WHERE contract_id=?", (contract_id,))
+    conn.executemany(
+        "INSERT OR IGNORE INTO contract_reviewer(contract_id, name, department) VALUES(?, ?, ?)",
+        [(contract_id, name, dept) for name, dept in f["reviewers"]],
+    )
+    _fts_sync_detail(conn, contract_id, detail_json_str)
+
+
+# -------------------------------------------------
+# 전문 검색 (FTS5)
+# -------------------------------------------------
+_fts_ready: Optional[bool] = None  # search_fts 존재 여부 (프로세스 단위 캐시)
+
+
+def _create_search_fts(conn) -> bool:
+    """search_fts 생성. trigram이 없으면 unicode61, FTS5 자체가 없으면 False."""
+    global _fts_ready
+    for tokenize in ("trigram", "unicode61 remove_diacritics 2"):
+        try:
+            conn.execute(
+                f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+                    title, description, history, chat,
+                    contract_id UNINDEXED,
+                    tokenize = '{tokenize}'
+                )
+                """
+            )
+            _fts_ready = True
+            return True
+        except sqlite3.OperationalError:
+            continue
+    _fts_ready = False
+    return False
+
+
+def _fts_enabled(conn) -> bool:
+    global _fts_ready
+    if _fts_ready is None:
+        _fts_ready = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='search_fts'"
+        ).fetchone() is not None
+    return _fts_ready
+
+
+def _fts_sync_detail(conn, contract_id, detail_json_str: str) -> None:
+    if not _fts_enabled(conn):
+        return
+    try:
+        detail = json.loads(detail_json_str)
+    except ValueError:
+        detail = None
+    t = normalize.search_texts(detail)
+    conn.execute("DELETE FROM search_fts WHERE rowid = ?", (-int(contract_id),))
+    conn.execute(
+        "INSERT INTO search_fts(rowid, title, description, history, chat, contract_id) VALUES(?, ?, ?, ?, '', ?)",
+        (-int(contract_id), t["title"], t["description"], t["history"], int(contract_id)),
+    )
+
+
+def _fts_sync_messages(conn, seqs: Iterable[int], removed_seqs: Iterable[int] = ()) -> None:
+    if not _fts_enabled(conn):
+        return
+    conn.executemany("DELETE FROM search_fts WHERE rowid = ?", [(int(x),) for x in removed_seqs])
+    seqs = list(seqs)
+    for i in range(0, len(seqs), 500):
+        chunk = seqs[i:i + 500]
+        rows = conn.execute(
+            f"SELECT seq, contract_id, message_json FROM chat_messages WHERE seq IN ({','.join('?' * len(chunk))})",
+            chunk,
+        ).fetchall()
+        conn.executemany(
+            "INSERT INTO search_fts(rowid, title, description, history, chat, contract_id) VALUES(?, '', '', '', ?, ?)",
+            [(r["seq"], normalize.chat_text(json.loads(r["message_json"])), r["contract_id"]) for r in rows],
+        )
+
+
+def _fts_query(q: str) -> Tuple[str, list[str]]:
+    """
+    검색어 → (FTS5 MATCH 식, 짧은 검색어 목록).
+    공백으로 나눈 단어를 모두 포함(AND). trigram은 3글자 미만을 색인으로 찾을 수 없으므로
+    그런 단어는 따로 돌려주고 instr()로 거른다.
+    """
+    terms = [t for t in q.split() if t]
+    long_terms = [t for t in terms if len(t) >= 3]
+    short_terms = [t for t in terms if len(t) < 3]
+    match = " AND ".join('"' + t.replace('"', '""') + '"' for t in long_terms)
+    return match, short_terms
+
+
+def _snippet(text: str, terms: list[str], width: int = 64) -> str:
+    """첫 일치 위치 주변 width자, 검색어는 <mark>로 감쌈 (대소문자 무시, trigram과 같은 기준)."""
+    pattern = re.compile("|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+    m = pattern.search(text)
+    if m is None:
+        return text[:width]
+    start = max(0, m.start() - width // 3)
+    end = min(len(text), start + width)
+    body = pattern.sub(lambda x: f"<mark>{x.group(0)}</mark>", text[start:end])
+    return ("…" if start > 0 else "") + body + ("…" if end < len(text) else "")
+
+
+def casely_search(
+    conn,
+    q: str,
+    *,
+    statuses: Iterable[str] = (),
+    label_ids: Iterable[int] = (),
+    limit: int = 20,
+) -> list[dict]:
+    """
+    search_fts 전문 검색. 계약별로 가장 잘 맞는 행(detail 또는 채팅 메시지) 하나만.
+    순위: bm25 (title > description > history > chat 가중치), 짧은 검색어만 있으면 최근 변경 순.
+    3글자 미만 검색어는 인덱스를 못 타고 instr()로 거름: 짧은 검색어만 있으면 search_fts 전체 행을 훑음.
+    반환 행: id, viewcode, title, status, last_history_at, rank, matched("detail"|"chat"), snippet
+    FTS5를 쓸 수 없으면 RuntimeError.
+    """
+    if not _fts_enabled(conn):
+        raise RuntimeError("full-text search is not available (SQLite without FTS5)")
+    match, short_terms = _fts_query(q)
+    if not match and not short_terms:
+        return []
+
+    where, params = [], []
+    if match:
+        where.append("search_fts MATCH ?")
+        params.append(match)
+    for t in short_terms:
+        # 대소문자 무시 (trigram MATCH와 같게). SQLite lower()는 ASCII만 바꿈
+        where.append(
+            "(instr(lower(title), lower(?)) OR instr(lower(description), lower(?))"
+            " OR instr(lower(history), lower(?)) OR instr(lower(chat), lower(?)))"
+        )
+        params.extend([t] * 4)
+    rank_sql = "bm25(search_fts, 10.0, 4.0, 2.0, 1.0)" if match else "0.0"
+
+    filters, fparams = ["c.deleted_at IS NULL"], []
+    statuses, label_ids = list(statuses), [int(x) for x in label_ids]
+    if statuses:
+        filters.append(f"c.status IN ({','.join('?' * len(statuses))})")
+        fparams.extend(statuses)
+    if label_ids:
+        filters.append(
+            f"EXISTS (SELECT 1 FROM contract_label l WHERE l.contract_id = c.id "
+            f"AND l.label_id IN ({','.join('?' * len(label_ids))}))"
+        )
+        fparams.extend(label_ids)
+
+    rows = conn.execute(
+        f"""
+        WITH hits AS MATERIALIZED (
+          -- bm25()는 MATCH 쿼리 안에서만 호출 가능: GROUP BY로 평탄화되지 않게 먼저 계산
+          SELECT contract_id, rowid AS hit_rowid, {rank_sql} AS rank
+          FROM search_fts WHERE {" AND ".join(where)}
+        ),
+        best AS (
+          -- MIN()과 함께 쓴 bare column은 최소 rank 행의 값
+          SELECT contract_id, MIN(rank) AS rank, hit_rowid FROM hits GROUP BY contract_id
+        )
+        SELECT c.id, c.viewcode, c.title, c.status, c.last_history_at,
+               best.rank, best.hit_rowid
+        FROM best JOIN contracts c ON c.id = best.contract_id
+        WHERE {" AND ".join(filters)}
+        ORDER BY best.rank, c.last_history_at DESC
+        LIMIT ?
+        """,
+        (*params, *fparams, int(limit)),
+    ).fetchall()
+    if not rows:
+        return rows
+
+    # snippet은 최종 결과 행에 대해서만 (FTS5 snippet()은 일치 행 전체를 다시 훑어서 느림)
+    hit_rowids = [r["hit_rowid"] for r in rows]
+    terms = q.split()
+    snippets = {
+        s["rowid"]: _snippet(s["text"] or "", terms)
+        for s in conn.execute(
+            f"SELECT rowid, trim(title || ' ' || description || ' ' || history || ' ' || chat) AS text "
+            f"FROM search_fts WHERE rowid IN ({','.join('?' * len(hit_rowids))})",
+            hit_rowids,
+        )
+    }
+    for r in rows:
+        hit_rowid = r.pop("hit_rowid")
+        r["matched"] = "detail" if hit_rowid < 0 else "chat"
+        r["snippet"] = snippets.get(hit_rowid)
+    return rows
+
+
+def _make_patch_json(old_json_str: Optional[str], new_json_str: str) -> Optional[str]:
+    """old → new JSON patch 문자열. 이전 버전이 없거나 patch가 전체 문서보다 크면 None."""
+    if not old_json_str:
+        return None
+    try:
+        ops = jsonpatch.make_patch(json.loads(old_json_str), json.loads(new_json_str))
+    except ValueError:
+        return None
+    patch_str = json.dumps(ops, ensure_ascii=False, separators=(",", ":"))
+    return patch_str if len(patch_str) < len(new_json_str) else None
+
+
+def casely_upsert_fetched_detail(
     conn,
     *,
     id: int,
     detail_json_str: str,
-    chats_json_str: str,
     fetched_at_ms: int,
+    scheduler: Optional[RefreshScheduler] = None,
 ) -> bool:
     """
-    기존 해시와 비교:
-      - 해시 동일: JSON/해시는 그대로 두고 source_fetched_at만 갱신 → return False
-      - 해시 다름: JSON/해시 교체 + source_fetched_at=NOW + source_updated_at=NOW → return True
-      - 행이 없으면: INSERT(모든 필드) → return True
+    detail만 반영. 기존 detail_hash와 비교:
+      - 해시 동일: detail_fetched_at(+source_fetched_at)만 갱신 → return False
+      - 해시 다름: detail_json/해시 교체 + detail_updated_at(+source_updated_at)=NOW → return True
+                   contractHistory 개수나 status가 바뀌었으면 chats도 바뀌었을 수 있으므로
+                   chats_next_refresh_at=0 (즉시 chats 갱신 대상)
+                   이전 detail 대비 patch를 detail_patch_json/detail_patch_base에 기록 (delta sync)
+      - 행이 없으면: INSERT → return True (chats는 아직 없으므로 즉시 갱신 대상)
+    바뀌었거나 새 행이면 조회용 추출 컬럼/contract_reviewer도 같은 트랜잭션에서 갱신.
+    scheduler가 주어지면 같은 트랜잭션에서 detail의 다음 갱신 시각도 기록:
+      refresh_interval_ms = scheduler(이전 간격, 변경 여부, detail.status, 마지막 변경 이후 경과 ms,
+                                      변경 간격 EWMA ms (바뀌었으면 이번 변경까지 반영))
+      next_refresh_at     = fetched_at_ms + refresh_interval_ms
     """
     cid = str(id)
 
     detail_hash = compute_hash(detail_json_str)
-    chats_hash = compute_hash(chats_json_str)
     row = conn.execute(
-        "SELECT detail_hash, chats_hash FROM contracts WHERE id=?", (cid,)
+        """
+        SELECT c.id, c.detail_hash, c.refresh_interval_ms, c.detail_updated_at,
+               c.source_updated_at, c.change_gap_ms,
+               json_extract(?, '$.status') AS status
+        FROM (SELECT 1) LEFT JOIN contracts c ON c.id = ?
+        """,
+        (detail_json_str, cid),
     ).fetchone()
 
-    if row is None:
+    if row["id"] is None:
+        changed = True
+        prev_interval, quiet_ms, change_gap = 0, 0, 0
+    else:
+        changed = row["detail_hash"] != detail_hash
+        prev_interval = int(row["refresh_interval_ms"] or 0)
+        quiet_ms = 0 if changed else max(0, fetched_at_ms - int(row["detail_updated_at"] or 0))
+        change_gap = _next_change_gap(row, fetched_at_ms) if changed else int(row["change_gap_ms"] or 0)
+
+    if scheduler is not None:
+        interval = int(scheduler(prev_interval, changed, row["status"], quiet_ms, change_gap))
+    else:
+        interval = prev_interval
+    next_at = fetched_at_ms + interval
+
+    if row["id"] is None:
         with tx_immediate(conn):
             conn.execute(
                 """
                 INSERT INTO contracts(
-                  id, detail_json, chats_json,
-                  detail_hash, chats_hash,
-                  source_fetched_at, source_updated_at
+                  id, detail_json, detail_hash,
+                  source_fetched_at, source_updated_at,
+                  detail_fetched_at, detail_updated_at,
+                  refresh_interval_ms, next_refresh_at, change_count
                 )
-                VALUES(?, json(?), json(?), ?, ?, ?, ?)
+                VALUES(?, json(?), ?, ?, ?, ?, ?, ?, ?, 1)
             """,
                 (
                     cid,
                     detail_json_str,
-                    chats_json_str,
                     detail_hash,
-                    chats_hash,
                     fetched_at_ms,
                     fetched_at_ms,
+                    fetched_at_ms,
+                    fetched_at_ms,
+                    interval,
+                    next_at,
                 ),
             )
+            _sync_extracted_fields(conn, cid, detail_json_str)
         return True
 
-    same = (row["detail_hash"] == detail_hash) and (row["chats_hash"] == chats_hash)
-    if same:
+    if not changed:
         with tx_immediate(conn):
             conn.execute(
-                "UPDATE contracts SET source_fetched_at=? WHERE id=?", (fetched_at_ms, cid)
+                """
+                UPDATE contracts SET
+                  detail_fetched_at = ?,
+                  source_fetched_at = MAX(source_fetched_at, ?),
+                  refresh_interval_ms = ?,
+                  next_refresh_at = ?
+                WHERE id=?
+                """,
+                (fetched_at_ms, fetched_at_ms, interval, next_at, cid),
             )
         return False
 
     with tx_immediate(conn):
+        old = conn.execute("SELECT detail_json FROM contracts WHERE id=?", (cid,)).fetchone()
+        patch_str = _make_patch_json(old["detail_json"], detail_json_str)
+        # SET 우변의 detail_json/detail_updated_at은 UPDATE 이전 값
         conn.execute(
             """
             UPDATE contracts SET
-              detail_json = json(?),
-              chats_json  = json(?),
-              detail_hash = ?,
-              chats_hash  = ?,
-              source_fetched_at  = ?,
-              source_updated_at  = ?
-            WHERE id=?
+              detail_patch_json = ?7,
+              detail_patch_base = CASE WHEN ?7 IS NULL THEN NULL ELSE detail_updated_at END,
+              chats_next_refresh_at = CASE
+                WHEN json_array_length(detail_json, '$.contractHistory') IS NOT json_array_length(?1, '$.contractHistory')
+                  OR json_extract(detail_json, '$.status') IS NOT json_extract(?1, '$.status')
+                THEN 0 ELSE chats_next_refresh_at END,
+              detail_json = json(?1),
+              detail_hash = ?2,
+              detail_fetched_at  = ?3,
+              detail_updated_at  = ?3,
+              source_fetched_at  = MAX(source_fetched_at, ?3),
+              source_updated_at  = ?3,
+              refresh_interval_ms = ?4,
+              next_refresh_at     = ?5,
+              change_count        = change_count + 1,
+              change_gap_ms       = ?8
+            WHERE id=?6
         """,
-            (
-                detail_json_str,
-                chats_json_str,
-                detail_hash,
-                chats_hash,
-                fetched_at_ms,
-                fetched_at_ms,
-                cid,
-            ),
+            (detail_json_str, detail_hash, fetched_at_ms, interval, next_at, cid, patch_str, change_gap),
         )
+        _sync_extracted_fields(conn, cid, detail_json_str)
     return True
 
 
-def casely_get_stale_contract_ids(conn, *, older_than_ms: int, limit: int) -> list[int]:
+def _chat_message_id(msg: Any, msg_json: str) -> str:
+    if isinstance(msg, dict) and msg.get("id") is not None:
+        return str(msg["id"])
+    return "h:" + compute_hash(msg_json)
+
+
+def _ingest_chat_messages(conn, contract_id, chats_json_str: str, created_at_ms: int) -> int:
+    """
+    chats 목록을 chat_messages에 반영 (append-only):
+      - 처음 보는 메시지: INSERT
+      - 내용이 바뀐 메시지: DELETE + INSERT (새 seq → 커서로 다시 받아감)
+      - 순서만 바뀐 메시지: position만 UPDATE
+    새로 기록한 메시지는 search_fts에도 반영.
+    원본에서 사라진 메시지는 지우지 않음. 새로 기록한 메시지 수를 반환.
+    """
+    try:
+        messages = json.loads(chats_json_str)
+    except ValueError:
+        return 0
+    if not isinstance(messages, list):
+        return 0
+
+    existing = {
+        r["message_id"]: (r["message_hash"], r["position"], r["seq"])
+        for r in conn.execute(
+            "SELECT message_id, message_hash, position, seq FROM chat_messages WHERE contract_id=?",
+            (contract_id,),
+        )
+    }
+    inserts, moves, replaced, replaced_seqs = [], [], [], []
+    seen = set()
+    for pos, msg in enumerate(messages):
+        msg_json = json.dumps(msg, ensure_ascii=False, separators=(",", ":"))
+        msg_hash = compute_hash(msg_json)
+        mid = _chat_message_id(msg, msg_json)
+        if mid in seen:
+            continue
+        seen.add(mid)
+        prev = existing.get(mid)
+        if prev is None or prev[0] != msg_hash:
+            if prev is not None:
+                replaced.append((contract_id, mid))
+                replaced_seqs.append(prev[2])
+            inserts.append((contract_id, mid, pos, created_at_ms, msg_json, msg_hash))
+        elif prev[1] != pos:
+            moves.append((pos, contract_id, mid))
+
+    if not (inserts or moves):
+        return 0
+    with tx_immediate(conn):
+        if replaced:
+            conn.executemany("DELETE FROM chat_messages WHERE contract_id=? AND message_id=?", replaced)
+        if moves:
+            conn.executemany("UPDATE chat_messages SET position=? WHERE contract_id=? AND message_id=?", moves)
+        if inserts:
+            conn.executemany(
+                """
+                INSERT INTO chat_messages(contract_id, message_id, position, created_at, message_json, message_hash)
+                VALUES(?, ?, ?, ?, ?, ?)
+                """,
+                inserts,
+            )
+        if inserts or replaced_seqs:
+            new_ids = [i[1] for i in inserts]
+            new_seqs = [
+                r["seq"] for r in conn.execute(
+                    f"SELECT seq FROM chat_messages WHERE contract_id=? AND message_id IN ({','.join('?' * len(new_ids))})",
+                    (contract_id, *new_ids),
+                )
+            ] if new_ids else []
+            _fts_sync_messages(conn, new_seqs, replaced_seqs)
+    return len(inserts)
+
+
+def casely_upsert_fetched_chats(
+    conn,
+    *,
+    id: int,
+    chats_json_str: str,
+    fetched_at_ms: int,
+    scheduler: Optional[RefreshScheduler] = None,
+) -> bool:
     """
-    fetched_at < older_than_ms 인 계약들을 오래된 순으로 최대 limit개 반환.
+    chats만 반영. 목록 전체 해시(chats_hash)가 같으면 chats_fetched_at만 갱신 → return False.
+    다르면 새/바뀐 메시지만 chat_messages에 기록(_ingest_chat_messages)하고
+    chats_hash, chats_updated_at(+source_updated_at)=NOW → return True.
+    chats_refresh_interval_ms/chats_next_refresh_at 규칙은 casely_upsert_fetched_detail과 같음.
+    scheduler의 status는 저장된 detail의 status.
+    """
+    cid = str(id)
+
+    chats_hash = compute_hash(chats_json_str)
+    row = conn.execute(
+        """
+        SELECT id, chats_hash, chats_refresh_interval_ms, chats_updated_at,
+               source_updated_at, change_gap_ms,
+               json_extract(detail_json, '$.status') AS status
+        FROM contracts WHERE id = ?
+        """,
+        (cid,),
+    ).fetchone()
+
+    if row is None:
+        changed = True
+        prev_interval, quiet_ms, status, change_gap = 0, 0, None, 0
+    else:
+        changed = row["chats_hash"] != chats_hash
+        prev_interval = int(row["chats_refresh_interval_ms"] or 0)
+        quiet_ms = 0 if changed else max(0, fetched_at_ms - int(row["chats_updated_at"] or 0))
+        status = row["status"]
+        change_gap = _next_change_gap(row, fetched_at_ms) if changed else int(row["change_gap_ms"] or 0)
+
+    if scheduler is not None:
+        interval = int(scheduler(prev_interval, changed, status, quiet_ms, change_gap))
+    else:
+        interval = prev_interval
+    next_at = fetched_at_ms + interval
+
+    if row is None:
+        with tx_immediate(conn):
+            conn.execute(
+                """
+                INSERT INTO contracts(
+                  id, chats_hash,
+                  source_fetched_at, source_updated_at,
+                  chats_fetched_at, chats_updated_at,
+                  chats_refresh_interval_ms, chats_next_refresh_at, change_count
+                )
+                VALUES(?, ?, ?, ?, ?, ?, ?, ?, 1)
+            """,
+                (cid, chats_hash, fetched_at_ms, fetched_at_ms,
+                 fetched_at_ms, fetched_at_ms, interval, next_at),
+            )
+            _ingest_chat_messages(conn, cid, chats_json_str, fetched_at_ms)
+        return True
+
+    if not changed:
+        with tx_immediate(conn):
+            conn.execute(
+                """
+                UPDATE contracts SET
+                  chats_fetched_at = ?,
+                  source_fetched_at = MAX(source_fetched_at, ?),
+                  chats_refresh_interval_ms = ?,
+                  chats_next_refresh_at = ?
+                WHERE id=?
+                """,
+                (fetched_at_ms, fetched_at_ms, interval, next_at, cid),
+            )
+        return False
+
+    with tx_immediate(conn):
+        _ingest_chat_messages(conn, cid, chats_json_str, fetched_at_ms)
+        conn.execute(
+            """
+            UPDATE contracts SET
+              chats_hash = ?1,
+              chats_fetched_at  = ?2,
+              chats_updated_at  = ?2,
+              source_fetched_at = MAX(source_fetched_at, ?2),
+              source_updated_at = ?2,
+              chats_refresh_interval_ms = ?3,
+              chats_next_refresh_at     = ?4,
+              change_count = change_count + 1,
+              change_gap_ms = ?6
+            WHERE id=?5
+        """,
+            (chats_hash, fetched_at_ms, interval, next_at, cid, change_gap),
+        )
+    return True
+
+
+def casely_get_chats_json(conn, contract_ids: Iterable[int], *, created_after_ms: int = 0) -> dict:
+    """
+    {contract_id: 메시지 JSON 배열 문자열} (position 순).
+    created_after_ms가 주어지면 그 이후에 기록된 메시지만.
+    메시지가 없는 계약은 결과에 없음.
+    """
+    ids = [int(i) for i in contract_ids]
+    out: dict = {}
+    for i in range(0, len(ids), 500):
+        chunk = ids[i:i + 500]
+        rows = conn.execute(
+            f"""
+            SELECT contract_id, json_group_array(json(message_json)) AS chats
+            FROM (
+              SELECT contract_id, message_json FROM chat_messages
+              WHERE contract_id IN ({",".join("?" * len(chunk))}) AND created_at > ?
+              ORDER BY contract_id, position
+            )
+            GROUP BY contract_id
+            """,
+            (*chunk, created_after_ms),
+        ).fetchall()
+        for r in rows:
+            out[int(r["contract_id"])] = r["chats"]
+    return out
+
+
+def casely_get_chat_messages_after(
+    conn, *, after_seq: int, contract_id: Optional[int] = None, limit: int = 500
+) -> list[dict]:
+    """seq > after_seq 인 메시지를 seq 순으로 최대 limit개 (contract_id가 주어지면 그 계약만)."""
+    sql = """
+        SELECT seq, contract_id, message_id, position, created_at, message_json
+        FROM chat_messages WHERE seq > ?
+    """
+    params: list = [after_seq]
+    if contract_id is not None:
+        sql += " AND contract_id = ?"
+        params.append(contract_id)
+    sql += " ORDER BY seq LIMIT ?"
+    params.append(limit)
+    return conn.execute(sql, params).fetchall()
+
+
+def casely_upsert_fetched_contract(
+    conn,
+    *,
+    id: int,
+    detail_json_str: str,
+    chats_json_str: str,
+    fetched_at_ms: int,
+    scheduler: Optional[RefreshScheduler] = None,
+    chats_scheduler: Optional[RefreshScheduler] = None,
+) -> bool:
+    """
+    detail + chats를 한 트랜잭션에서 반영 (casely_upsert_fetched_detail/chats 참고).
+    둘 중 하나라도 바뀌었거나 새 행이면 True.
+    """
+    with tx_immediate(conn):
+        d_changed = casely_upsert_fetched_detail(
+            conn, id=id, detail_json_str=detail_json_str,
+            fetched_at_ms=fetched_at_ms, scheduler=scheduler,
+        )
+        c_changed = casely_upsert_fetched_chats(
+            conn, id=id, chats_json_str=chats_json_str,
+            fetched_at_ms=fetched_at_ms, scheduler=chats_scheduler or scheduler,
+        )
+    return d_changed or c_changed
+
+
+CONTRACT_QUERY_SORTS = {
+    "id": "c.id",
+    "viewcode": "c.viewcode",
+    "title": "c.title",
+    "status": "c.status",
+    "category": "c.category",
+    "requested_at": "c.requested_at",
+    "last_history_at": "c.last_history_at",
+    "updated_at": "MAX(c.source_updated_at, c.user_updated_at)",
+}
+
+
+def casely_query_contracts(
+    conn,
+    *,
+    statuses: Iterable[str] = (),
+    categories: Iterable[str] = (),
+    reviewers: Iterable[str] = (),
+    label_ids: Iterable[int] = (),
+    viewcodes: Iterable[str] = (),
+    sort: Iterable[str] = ("-last_history_at",),
+    limit: int = 100,
+    offset: int = 0,
+    include_deleted: bool = False,
+) -> list[dict]:
+    """
+    추출 컬럼 기반 조회. 같은 필터 안의 여러 값은 OR, 필터끼리는 AND.
+      reviewers : contract_reviewer.name, label_ids : contract_label.label_id (둘 다 EXISTS)
+      sort      : CONTRACT_QUERY_SORTS 키, "-" 접두사는 내림차순 (알 수 없는 키는 ValueError)
+    반환 행: id, 추출 컬럼, source_updated_at/user_updated_at/deleted_at, refresh_policy, label_ids(JSON 배열)
+    """
+    where, params = [], []
+
+    def values_in(expr: str, values: Iterable) -> None:
+        vals = list(values)
+        if vals:
+            where.append(f"{expr} IN ({','.join('?' * len(vals))})")
+            params.extend(vals)
+
+    values_in("c.status", statuses)
+    values_in("c.category", categories)
+    values_in("c.viewcode", viewcodes)
+    reviewers, label_ids = list(reviewers), [int(x) for x in label_ids]
+    if reviewers:
+        where.append(
+            f"EXISTS (SELECT 1 FROM contract_reviewer r WHERE r.contract_id = c.id "
+            f"AND r.name IN ({','.join('?' * len(reviewers))}))"
+        )
+        params.extend(reviewers)
+    if label_ids:
+        where.append(
+            f"EXISTS (SELECT 1 FROM contract_label l WHERE l.contract_id = c.id "
+            f"AND l.label_id IN ({','.join('?' * len(label_ids))}))"
+        )
+        params.extend(label_ids)
+    if not include_deleted:
+        where.append("c.deleted_at IS NULL")
+
+    order = []
+    for key in sort:
+        desc = key.startswith("-")
+        expr = CONTRACT_QUERY_SORTS.get(key.lstrip("-+"))
+        if expr is None:
+            raise ValueError(f"unknown sort key: {key!r}")
+        order.append(f"{expr} {'DESC' if desc else 'ASC'}")
+    order.append("c.id DESC")
+
+    sql = f"""
+        SELECT c.id, {', '.join(f'c.{col}' for col, _ in EXTRACTED_COLUMNS)},
+               c.source_updated_at, c.user_updated_at, c.deleted_at, c.refresh_policy,
+               (SELECT json_group_array(l.label_id) FROM contract_label l WHERE l.contract_id = c.id) AS label_ids
+        FROM contracts c
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY {", ".join(order)}
+        LIMIT ? OFFSET ?
+    """
+    params.extend([int(limit), int(offset)])
+    return conn.execute(sql, params).fetchall()
+
+
+def casely_get_due_contract_ids(conn, *, now_ms: int, limit: int) -> list[int]:
+    """
+    detail의 next_refresh_at <= now_ms 인 계약들을 예정 시각이 이른 순으로 최대 limit개 반환.
     """
     rows = conn.execute(
+        """
+        SELECT id
+        FROM contracts
+        WHERE next_refresh_at <= ? AND deleted_at IS NULL AND refresh_policy != ?
+        ORDER BY next_refresh_at ASC, id ASC
+        LIMIT ?
+    """,
+        (now_ms, REFRESH_POLICY_NEVER, int(limit)),
+    ).fetchall()
+    return [r["id"] for r in rows]
+
+
+def casely_get_due_chats_contract_ids(conn, *, now_ms: int, limit: int) -> list[int]:
+    """
+    chats_next_refresh_at <= now_ms 인 계약들을 예정 시각이 이른 순으로 최대 limit개 반환.
     """
+    rows = conn.execute(
+        """
         SELECT id
         FROM contracts
-        WHERE (source_fetched_at IS NULL OR source_fetched_at < ?) AND deleted_at IS NULL AND refresh_policy != ?
-        ORDER BY source_fetched_at ASC, id ASC
+        WHERE chats_next_refresh_at <= ? AND deleted_at IS NULL AND refresh_policy != ?
+        ORDER BY chats_next_refresh_at ASC, id ASC
         LIMIT ?
     """,
-        (older_than_ms, REFRESH_POLICY_NEVER, int(limit)),
+        (now_ms, REFRESH_POLICY_NEVER, int(limit)),
     ).fetchall()
-    
     return [r["id"] for r in rows]
 
 
-def casely_touch_fetched_at(conn, *, id: int, fetched_at_ms: int) -> None:
-    """콘텐츠가 변하지 않았을 때 fetched_at만 NOW로 갱신."""
-    cid = str(id)
+def casely_count_due(conn, *, now_ms: int) -> dict:
+    """갱신 예정 시각이 지난 계약 수 {"detail": n, "chats": n}."""
+    row = conn.execute(
+        """
+        SELECT
+          (SELECT COUNT(*) FROM contracts
+            WHERE next_refresh_at <= ?1 AND deleted_at IS NULL AND refresh_policy != ?2) AS detail,
+          (SELECT COUNT(*) FROM contracts
+            WHERE chats_next_refresh_at <= ?1 AND deleted_at IS NULL AND refresh_policy != ?2) AS chats
+        """,
+        (now_ms, REFRESH_POLICY_NEVER),
+    ).fetchone()
+    return {"detail": int(row["detail"] or 0), "chats": int(row["chats"] or 0)}
+
+
+def casely_apply_list_fingerprints(
+    conn, items: Iterable[Tuple[int, str]], *, now_ms: int, max_defer_ms: int
+) -> list[int]:
+    """
+    목록 스윕 결과 반영 (이미 저장된 계약만, 한 트랜잭션).
+      - 저장된 fingerprint 없음 : fingerprint만 저장
+      - fingerprint 다름        : 저장 + next_refresh_at=0 (즉시 갱신 대상) → 반환 목록에 포함
+      - fingerprint 같음        : 목록에서 안 바뀐 것을 확인했으므로 다음 갱신을
+                                  now + refresh_interval_ms 까지 미룸.
+                                  단 source_fetched_at + max_defer_ms 를 넘기지는 않음.
+    Returns: fingerprint가 바뀐 계약 id 목록
+    """
+    changed: list[int] = []
     with tx_immediate(conn):
-        conn.execute(
-            "UPDATE contracts SET source_fetched_at=? WHERE id=?", (fetched_at_ms, cid)
-        )
\ No newline at end of file
+        for cid, fp in items:
+            row = conn.execute(
+                "SELECT list_fingerprint FROM contracts WHERE id=? AND deleted_at IS NULL",
+                (int(cid),),
+            ).fetchone()
+            if row is None:
+                continue
+            if row["list_fingerprint"] is None:
+                conn.execute(
+                    "UPDATE contracts SET list_fingerprint=?, list_seen_at=? WHERE id=?",
+                    (fp, now_ms, int(cid)),
+                )
+            elif row["list_fingerprint"] != fp:
+                conn.execute(
+                    "UPDATE contracts SET list_fingerprint=?, list_seen_at=?, next_refresh_at=0 WHERE id=?",
+                    (fp, now_ms, int(cid)),
+                )
+                changed.append(int(cid))
+            else:
+                conn.execute(
+                    """
+                    UPDATE contracts SET
+                      list_seen_at = ?,
+                      next_refresh_at = MAX(next_refresh_at, MIN(? + refresh_interval_ms, source_fetched_at + ?))
+                    WHERE id=?
+                    """,
+                    (now_ms, now_ms, int(max_defer_ms), int(cid)),
+                )
+    return changed
@@ -0,0 +1,131 @@
+# events.py
+# -*- coding: utf-8 -*-
+
+"""
+In-process change notifications for GET /api/events (standard library only).
+
+Writers (the poller, the HTTP write handlers) call publish() after their
+write has committed. Events only say *that* something changed — kind
+("contracts" | "labels"), the ids and the new max updated_at — the app still
+fetches the data with its updated_since cursor from /api/contracts and
+/api/labels.
+
+- ChangeBus keeps the last `history` events in a ring buffer; each event has
+  a seq, wait(after) returns the events after a seq, blocking up to a timeout
+- a cursor older than the ring (or from a previous process: seq starts at the
+  start time in microseconds) gets one "resync" event with the current maxima
+- waiters are bounded (try_enter/leave) so SSE streams and long polls cannot
+  pin every worker of the HTTP pool
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+from server import metrics as _metrics
+
+KINDS = ("contracts", "labels")
+
+M_PUBLISHED = _metrics.counter("casely_events_published_total", "Change events published", ("kind",))
+
+
+class ChangeBus:
+    def __init__(self, history: int = 256, max_waiters: int = 2):
+        self.max_waiters = max(1, int(max_waiters))
+        self._cond = threading.Condition()
+        self._events: "deque[Dict[str, Any]]" = deque(maxlen=max(1, int(history)))
+        self._seq = time.time_ns() // 1000
+        self._max = dict.fromkeys(KINDS, 0)
+        self._waiters = 0
+        self._closed = False
+
+    # ---- publishing ---------------------------------------------------
+
+    def publish(self, kind: str, ids: Iterable[int] = (), updated_at: int = 0) -> Dict[str, Any]:
+        """Record a committed change and wake every waiter."""
+        if kind not in self._max:
+            raise ValueError(f"unknown event kind: {kind!r}")
+        with self._cond:
+            self._seq += 1
+            self._max[kind] = max(self._max[kind], int(updated_at or 0))
+            event = {
+                "seq": self._seq,
+                "kind": kind,
+                "ids": sorted({int(i) for i in ids}),
+                "max_updated_at": self._max[kind],
+            }
+            self._events.append(event)
+            self._cond.notify_all()
+        M_PUBLISHED.inc(kind=kind)
+        return event
+
+    # ---- consuming ----------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current seq and max updated_at per kind (the starting cursor for a client)."""
+        with self._cond:
+            return {"seq": self._seq, **self._max}
+
+    def wait(self, after: Optional[int], timeout: float) -> List[Dict[str, Any]]:
+        """Events with seq > after, waiting up to timeout seconds for one. [] on timeout/close."""
+        with self._cond:
+            if after is None:
+                after = self._seq
+            # seq != after also covers a cursor from a previous process (ahead of ours): resync right away
+            self._cond.wait_for(lambda: self._closed or self._seq != after, timeout)
+            return self._events_after(after)
+
+    def _events_after(self, after: int) -> List[Dict[str, Any]]:
+        if after == self._seq:
+            return []
+        oldest = self._events[0]["seq"] if self._events else self._seq + 1
+        if after > self._seq or after < oldest - 1:
+            return [{"seq": self._seq, "kind": "resync", "ids": [], **self._max}]
+        return [e for e in self._events if e["seq"] > after]
+
+    # ---- waiter slots -------------------------------------------------
+
+    def try_enter(self) -> bool:
+        """Take a waiter slot; False when max_waiters requests are already blocked here."""
+        with self._cond:
+            if self._closed or self._waiters >= self.max_waiters:
+                return False
+            self._waiters += 1
+            return True
+
+    def leave(self) -> None:
+        with self._cond:
+            self._waiters -= 1
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        """Wake every waiter; later waits return immediately (server shutdown)."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {"seq": self._seq, "waiters": self._waiters, "max_waiters": self.max_waiters}
+
+
+# -------------------------------------------------
+# Process-wide bus
+# -------------------------------------------------
+BUS = ChangeBus()
+
+
+def publish(kind: str, ids: Iterable[int] = (), updated_at: int = 0) -> Dict[str, Any]:
+    return BUS.publish(kind, ids, updated_at)
+
+
+_metrics.callback(
+    "casely_events_waiters", "Requests blocked on GET /api/events (SSE streams + long polls)",
+    lambda: {(): BUS.stats()["waiters"]},
+)
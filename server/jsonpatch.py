@@ -0,0 +1,132 @@
+# jsonpatch.py
+# -*- coding: utf-8 -*-
+
+"""
+Minimal RFC 6902 JSON Patch (standard library only).
+
+- make_patch(a, b): ops turning a into b (add / remove / replace only)
+    • objects are diffed key by key, recursively
+    • arrays are diffed index by index over the common length; extra items
+      are appended with "/-" or removed from the end (so an appended history
+      entry / chat message is a single "add")
+- apply_patch(doc, ops): returns a new document; raises JsonPatchError
+"""
+
+from __future__ import annotations
+
+import copy
+from typing import Any, Dict, List
+
+Op = Dict[str, Any]
+
+
+class JsonPatchError(ValueError):
+    pass
+
+
+def _escape(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def make_patch(a: Any, b: Any) -> List[Op]:
+    ops: List[Op] = []
+    _diff(a, b, "", ops)
+    return ops
+
+
+def _diff(a: Any, b: Any, path: str, ops: List[Op]) -> None:
+    if type(a) is type(b) and a == b:
+        return
+    if isinstance(a, dict) and isinstance(b, dict):
+        for k in a:
+            if k not in b:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(k)}"})
+        for k, v in b.items():
+            if k in a:
+                _diff(a[k], v, f"{path}/{_escape(k)}", ops)
+            else:
+                ops.append({"op": "add", "path": f"{path}/{_escape(k)}", "value": v})
+        return
+    if isinstance(a, list) and isinstance(b, list):
+        common = min(len(a), len(b))
+        for i in range(common):
+            _diff(a[i], b[i], f"{path}/{i}", ops)
+        for i in range(len(a) - 1, common - 1, -1):
+            ops.append({"op": "remove", "path": f"{path}/{i}"})
+        for v in b[common:]:
+            ops.append({"op": "add", "path": f"{path}/-", "value": v})
+        return
+    ops.append({"op": "replace", "path": path, "value": b})
+
+
+def _parse_pointer(path: str) -> List[str]:
+    if path == "":
+        return []
+    if not path.startswith("/"):
+        raise JsonPatchError(f"invalid pointer: {path!r}")
+    return [_unescape(t) for t in path[1:].split("/")]
+
+
+def _list_index(container: list, token: str, *, allow_end: bool) -> int:
+    if token == "-" and allow_end:
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token[0] == "0"):
+        raise JsonPatchError(f"invalid array index: {token!r}")
+    i = int(token)
+    if i > len(container) or (i == len(container) and not allow_end):
+        raise JsonPatchError(f"array index out of range: {i}")
+    return i
+
+
+def _resolve_parent(doc: Any, tokens: List[str]) -> Any:
+    cur = doc
+    for t in tokens[:-1]:
+        if isinstance(cur, dict):
+            if t not in cur:
+                raise JsonPatchError(f"path not found: {t!r}")
+            cur = cur[t]
+        elif isinstance(cur, list):
+            cur = cur[_list_index(cur, t, allow_end=False)]
+        else:
+            raise JsonPatchError(f"cannot traverse into {type(cur).__name__}")
+    return cur
+
+
+def apply_patch(doc: Any, ops: List[Op]) -> Any:
+    doc = copy.deepcopy(doc)
+    for op in ops:
+        kind, tokens = op.get("op"), _parse_pointer(op.get("path", ""))
+        if not tokens:
+            if kind in ("add", "replace"):
+                doc = copy.deepcopy(op["value"])
+                continue
+            raise JsonPatchError(f"cannot {kind} the document root")
+        parent, last = _resolve_parent(doc, tokens), tokens[-1]
+        if isinstance(parent, dict):
+            if kind == "add":
+                parent[last] = copy.deepcopy(op["value"])
+            elif kind in ("remove", "replace"):
+                if last not in parent:
+                    raise JsonPatchError(f"path not found: {op['path']!r}")
+                if kind == "remove":
+                    del parent[last]
+                else:
+                    parent[last] = copy.deepcopy(op["value"])
+            else:
+                raise JsonPatchError(f"unsupported op: {kind!r}")
+        elif isinstance(parent, list):
+            if kind == "add":
+                parent.insert(_list_index(parent, last, allow_end=True), copy.deepcopy(op["value"]))
+            elif kind == "remove":
+                del parent[_list_index(parent, last, allow_end=False)]
+            elif kind == "replace":
+                parent[_list_index(parent, last, allow_end=False)] = copy.deepcopy(op["value"])
+            else:
+                raise JsonPatchError(f"unsupported op: {kind!r}")
+        else:
+            raise JsonPatchError(f"cannot apply {kind} to {type(parent).__name__}")
+    return doc
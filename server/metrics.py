@@ -0,0 +1,248 @@
+# metrics.py
+# -*- coding: utf-8 -*-
+
+"""
+Minimal in-process metrics (standard library only).
+
+- Counter / Gauge / Histogram with optional label names
+- Callback metrics, evaluated at render time (for stats kept elsewhere)
+- REGISTRY.to_json() / REGISTRY.render_prometheus() for /api/metrics
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        """[(suffix, label_values, value)]"""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [("", k, v) for k, v in self._values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values → (bucket counts, sum, count)
+        self._values: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total, n = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            i = bisect.bisect_left(self.buckets, value)
+            if i < len(counts):
+                counts[i] += 1
+            self._values[key] = (counts, total + value, n + 1)
+
+    def samples(self):
+        out = []
+        with self._lock:
+            items = [(k, list(c), t, n) for k, (c, t, n) in self._values.items()]
+        for key, counts, total, n in items:
+            acc = 0
+            for le, c in zip(self.buckets, counts):
+                acc += c
+                out.append(("_bucket", key + (_fmt(le),), float(acc)))
+            out.append(("_bucket", key + ("+Inf",), float(n)))
+            out.append(("_sum", key, total))
+            out.append(("_count", key, float(n)))
+        return out
+
+    def snapshot(self) -> Dict[LabelValues, Dict[str, object]]:
+        with self._lock:
+            items = [(k, list(c), t, n) for k, (c, t, n) in self._values.items()]
+        return {
+            k: {
+                "count": n,
+                "sum": round(t, 6),
+                "buckets": {_fmt(le): c for le, c in zip(self.buckets, _cumulative(counts))},
+            }
+            for k, counts, t, n in items
+        }
+
+
+class CallbackMetric(_Metric):
+    """Values produced by fn() → {label_values_tuple: value} at render time."""
+
+    def __init__(
+        self, name: str, help: str, fn: Callable[[], Dict[LabelValues, float]],
+        labelnames: Sequence[str] = (), kind: str = "gauge",
+    ):
+        super().__init__(name, help, labelnames)
+        self.kind = kind
+        self._fn = fn
+
+    def samples(self):
+        try:
+            values = self._fn()
+        except Exception:
+            return []
+        return [("", tuple(str(x) for x in k), float(v)) for k, v in values.items()]
+
+
+def _cumulative(counts: List[int]) -> List[int]:
+    out, acc = [], 0
+    for c in counts:
+        acc += c
+        out.append(acc)
+    return out
+
+
+def _fmt(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf"
+    return repr(float(v)) if v != int(v) else f"{int(v)}.0"
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))  # type: ignore[return-value]
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))  # type: ignore[return-value]
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))  # type: ignore[return-value]
+
+    def callback(
+        self, name: str, help: str, fn: Callable[[], Dict[LabelValues, float]],
+        labelnames: Sequence[str] = (), kind: str = "gauge",
+    ) -> CallbackMetric:
+        return self._register(CallbackMetric(name, help, fn, labelnames, kind))  # type: ignore[return-value]
+
+    def _all(self) -> List[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (0.0.4)."""
+        lines: List[str] = []
+        for m in self._all():
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            names = m.labelnames + (("le",) if m.kind == "histogram" else ())
+            for suffix, values, v in m.samples():
+                pairs = [f'{n}="{_escape(x)}"' for n, x in zip(names, values)]
+                label_str = "{" + ",".join(pairs) + "}" if pairs else ""
+                lines.append(f"{m.name}{suffix}{label_str} {_fmt_value(v)}")
+        return "\n".join(lines) + "\n"
+
+    def to_json(self) -> Dict[str, object]:
+        """{name: {"type", "help", "values": [{"labels": {...}, "value" | histogram fields}]}}"""
+        out: Dict[str, object] = {}
+        for m in self._all():
+            if isinstance(m, Histogram):
+                values = [
+                    {"labels": dict(zip(m.labelnames, k)), **snap}
+                    for k, snap in m.snapshot().items()
+                ]
+            else:
+                values = [
+                    {"labels": dict(zip(m.labelnames, k)), "value": v}
+                    for _, k, v in m.samples()
+                ]
+            out[m.name] = {"type": m.kind, "help": m.help, "values": values}
+        return out
+
+
+def _fmt_value(v: float) -> str:
+    if v == int(v) and abs(v) < 1e15:
+        return str(int(v))
+    return repr(v)
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.counter(name, help, labelnames)
+
+
+def gauge(name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.gauge(name, help, labelnames)
+
+
+def histogram(
+    name: str, help: str, labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+) -> Histogram:
+    return REGISTRY.histogram(name, help, labelnames, buckets)
+
+
+def callback(
+    name: str, help: str, fn: Callable[[], Dict[LabelValues, float]],
+    labelnames: Sequence[str] = (), kind: str = "gauge",
+) -> CallbackMetric:
+    return REGISTRY.callback(name, help, fn, labelnames, kind)
@@ -0,0 +1,229 @@
+# normalize.py
+# -*- coding: utf-8 -*-
+
+"""
+Ingest normalization for origin payloads (standard library only).
+
+One traversal per document applies precompiled rules:
+  - drop      : remove the key (fileText — attachment bodies)
+  - rename    : unify key spelling (viewCode → viewcode; an existing viewcode wins)
+  - int       : numeric strings → int (fileId)
+  - date      : keep the original string and add a sibling "<key>Ms" (epoch ms)
+                YYYY/MM/DD, YYYY/MM/DD HH:MM[:SS] (also HH/MM), ISO 8601;
+                dates without an offset are origin local time (KST)
+
+Rules are keyed by path ("contractHistory[].createTime"); GLOBAL_RULES apply at
+any depth, and any other string field ending in Date/Time that parses as a
+date also gets its "<key>Ms".
+"""
+
+from __future__ import annotations
+
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+ORIGIN_TZ = timezone(timedelta(hours=9))
+
+DROP, RENAME, INT, DATE = "drop", "rename", "int", "date"
+Rule = Tuple[str, Optional[str]]  # (action, arg)
+
+GLOBAL_RULES: Dict[str, Rule] = {
+    "fileText": (DROP, None),
+    "viewCode": (RENAME, "viewcode"),
+    "fileId": (INT, None),
+}
+
+DETAIL_RULES: Dict[str, Rule] = {
+    "reviewRequestDate": (DATE, None),
+    "createDate": (DATE, None),
+    "replyDate": (DATE, None),
+    "enforcementDate": (DATE, None),
+    "contractHistory[].createTime": (DATE, None),
+}
+
+CHATS_RULES: Dict[str, Rule] = {
+    "[].createTime": (DATE, None),
+}
+
+_DATE_RE = re.compile(
+    r"^\s*(\d{4})[/.-](\d{1,2})[/.-](\d{1,2})"
+    r"(?:[ T](\d{1,2})[:/](\d{2})(?:[:/](\d{2})(?:\.(\d{1,6}))?)?)?"
+    r"\s*(Z|[+-]\d{2}:?\d{2})?\s*$"
+)
+
+
+def parse_date_ms(value: str) -> Optional[int]:
+    """Origin date string → epoch ms (None if it is not a date)."""
+    m = _DATE_RE.match(value)
+    if not m:
+        return None
+    y, mo, d, hh, mm, ss, frac, tz = m.groups()
+    if tz is None:
+        tzinfo = ORIGIN_TZ
+    elif tz == "Z":
+        tzinfo = timezone.utc
+    else:
+        sign = -1 if tz[0] == "-" else 1
+        tz = tz[1:].replace(":", "")
+        tzinfo = timezone(sign * timedelta(hours=int(tz[:2]), minutes=int(tz[2:])))
+    try:
+        dt = datetime(
+            int(y), int(mo), int(d), int(hh or 0), int(mm or 0), int(ss or 0),
+            int((frac or "0").ljust(6, "0")), tzinfo=tzinfo,
+        )
+    except ValueError:
+        return None
+    return int(dt.timestamp() * 1000)
+
+
+class _Node:
+    __slots__ = ("rules", "children")
+
+    def __init__(self):
+        self.rules: Dict[str, Rule] = {}
+        self.children: Dict[str, "_Node"] = {}
+
+
+_EMPTY = _Node()
+
+
+def compile_rules(rules: Dict[str, Rule]) -> _Node:
+    """{"a[].b": rule} → path trie. "[]" steps into list items."""
+    root = _Node()
+    for path, rule in rules.items():
+        steps = [s for s in re.split(r"\.|(?=\[\])", path) if s]
+        node = root
+        for step in steps[:-1]:
+            node = node.children.setdefault(step, _Node())
+        last = steps[-1]
+        if last == "[]":
+            raise ValueError(f"rule path must end with a key: {path!r}")
+        node.rules[last] = rule
+    return root
+
+
+_DETAIL = compile_rules(DETAIL_RULES)
+_CHATS = compile_rules(CHATS_RULES)
+
+
+def _apply(obj: Any, node: _Node) -> Any:
+    if isinstance(obj, list):
+        child = node.children.get("[]", _EMPTY)
+        for item in obj:
+            if isinstance(item, (dict, list)):
+                _apply(item, child)
+        return obj
+    if not isinstance(obj, dict):
+        return obj
+
+    for key in list(obj):
+        rule = node.rules.get(key) or GLOBAL_RULES.get(key)
+        value = obj[key]
+        if rule is not None:
+            action, arg = rule
+            if action == DROP:
+                del obj[key]
+                continue
+            if action == RENAME:
+                del obj[key]
+                obj.setdefault(arg, value)
+                key = arg
+                value = obj[key]
+            elif action == INT:
+                if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+                    obj[key] = int(value)
+            elif action == DATE:
+                if isinstance(value, str):
+                    obj[key + "Ms"] = parse_date_ms(value)
+                continue
+        elif isinstance(value, str) and key.endswith(("Date", "Time")) and (key + "Ms") not in obj:
+            ms = parse_date_ms(value)
+            if ms is not None:
+                obj[key + "Ms"] = ms
+            continue
+        if isinstance(value, (dict, list)):
+            _apply(value, node.children.get(key, _EMPTY))
+    return obj
+
+
+def normalize_detail(detail: Any) -> Any:
+    """Normalize a detail appData object in place (and return it)."""
+    return _apply(detail, _DETAIL)
+
+
+def normalize_chats(chats: Any) -> Any:
+    """Normalize a chatList array in place (and return it)."""
+    return _apply(chats, _CHATS)
+
+
+def _date_ms(obj: Dict[str, Any], key: str) -> Optional[int]:
+    ms = obj.get(key + "Ms")
+    if isinstance(ms, int):
+        return ms
+    value = obj.get(key)
+    return parse_date_ms(value) if isinstance(value, str) and value else None
+
+
+def extract_fields(detail: Any) -> Dict[str, Any]:
+    """
+    Queryable fields of a (normalized) detail object, for the indexed columns:
+    viewcode, title, status, category, requested_at, last_history_at, last_actor,
+    reviewers [(name, department)].
+    Works on details stored before normalization too (dates are parsed if *Ms is missing).
+    """
+    if not isinstance(detail, dict):
+        detail = {}
+    category = detail.get("category")
+    if isinstance(category, dict):
+        category = category.get("text")
+
+    last_at: Optional[int] = None
+    last_actor: Optional[str] = None
+    for h in detail.get("contractHistory") or []:
+        if not isinstance(h, dict):
+            continue
+        at = _date_ms(h, "createTime")
+        if at is not None and (last_at is None or at >= last_at):
+            last_at, last_actor = at, h.get("creator")
+
+    reviewers = []
+    for r in detail.get("reviewers") or []:
+        if isinstance(r, dict) and r.get("name"):
+            reviewers.append((str(r["name"]), r.get("department")))
+
+    return {
+        "viewcode": detail.get("viewcode") or detail.get("viewCode"),
+        "title": detail.get("name"),
+        "status": detail.get("status"),
+        "category": category if isinstance(category, str) else None,
+        "requested_at": _date_ms(detail, "reviewRequestDate") or _date_ms(detail, "createDate"),
+        "last_history_at": last_at,
+        "last_actor": last_actor,
+        "reviewers": reviewers,
+    }
+
+
+def search_texts(detail: Any) -> Dict[str, str]:
+    """Full-text fields of a detail object: title, description, history (actions + comments)."""
+    if not isinstance(detail, dict):
+        detail = {}
+    history = []
+    for h in detail.get("contractHistory") or []:
+        if isinstance(h, dict):
+            history.extend(str(h[k]) for k in ("actionText", "comment") if h.get(k))
+    return {
+        "title": str(detail.get("name") or ""),
+        "description": str(detail.get("description") or ""),
+        "history": "\n".join(history),
+    }
+
+
+def chat_text(msg: Any) -> str:
+    """Full-text of one chat message (content/message/text, else every string field)."""
+    if not isinstance(msg, dict):
+        return str(msg or "")
+    for key in ("content", "message", "text", "comment"):
+        if isinstance(msg.get(key), str):
+            return msg[key]
+    return "\n".join(v for k, v in msg.items() if isinstance(v, str) and not k.endswith(("Date", "Time")))
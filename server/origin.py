@@ -0,0 +1,360 @@
+# origin.py
+# -*- coding: utf-8 -*-
+
+"""
+Origin HTTP client (standard library only).
+
+- Keep-alive http.client connections pooled per (scheme, host, port)
+  and reused across poll cycles.
+- A reused socket that turns out to be stale (server closed the idle
+  keep-alive connection) is reconnected and the request retried once.
+- pool_stats() reports how often connections were created/reused.
+- Responses are negotiated as gzip/deflate and decompressed with zlib while
+  streaming; transfer_stats() reports wire vs decoded bytes per endpoint.
+- OriginGuard: adaptive in-flight limit (AIMD) plus a circuit breaker, so a
+  struggling origin is backed off from and a healthy one is used at full speed.
+"""
+
+from __future__ import annotations
+
+import http.client
+import random
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+_PoolKey = Tuple[str, str, int]
+
+ACCEPT_ENCODING = "gzip, deflate"
+READ_CHUNK = 64 * 1024
+
+
+def _make_decoder(encoding: str, first_chunk: bytes):
+    """zlib decompressor for a Content-Encoding (None = identity)."""
+    if encoding in ("gzip", "x-gzip"):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        # RFC says zlib-wrapped, but some servers send raw deflate
+        if len(first_chunk) >= 2 and (first_chunk[0] & 0x0F) == 8 and ((first_chunk[0] << 8) | first_chunk[1]) % 31 == 0:
+            return zlib.decompressobj(zlib.MAX_WBITS)
+        return zlib.decompressobj(-zlib.MAX_WBITS)
+    return None
+
+
+def _read_body(resp: http.client.HTTPResponse) -> Tuple[bytes, int]:
+    """Read (and decode) the whole response body in chunks. Return (decoded, wire_bytes)."""
+    encoding = (resp.getheader("Content-Encoding") or "").strip().lower()
+    decoder = None
+    out: List[bytes] = []
+    wire = 0
+    try:
+        while True:
+            chunk = resp.read(READ_CHUNK)
+            if not chunk:
+                break
+            wire += len(chunk)
+            if decoder is None and encoding and wire == len(chunk):
+                decoder = _make_decoder(encoding, chunk)
+            out.append(decoder.decompress(chunk) if decoder else chunk)
+        if decoder is not None:
+            out.append(decoder.flush())
+    except zlib.error as e:
+        raise http.client.HTTPException(f"cannot decode {encoding} response: {e}") from e
+    return (b"".join(out), wire)
+
+
+class ConnectionPool:
+    """Idle keep-alive connections per origin host. Thread-safe."""
+
+    def __init__(self, max_idle_per_host: int = 8, max_idle_s: float = 30.0):
+        self.max_idle_per_host = max_idle_per_host
+        self.max_idle_s = max_idle_s
+        self._idle: Dict[_PoolKey, List[Tuple[http.client.HTTPConnection, float]]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "created": 0, "reused": 0, "reconnects": 0, "errors": 0}
+        self._transfer: Dict[str, Dict[str, int]] = {}
+
+    # --- connection lifecycle ---
+
+    def _acquire(self, key: _PoolKey, timeout_s: float) -> Tuple[http.client.HTTPConnection, bool]:
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key) or []
+            while idle:
+                conn, last_used = idle.pop()
+                if now - last_used <= self.max_idle_s:
+                    self._stats["reused"] += 1
+                    conn.timeout = timeout_s
+                    if conn.sock is not None:
+                        conn.sock.settimeout(timeout_s)
+                    return conn, True
+                conn.close()
+            self._stats["created"] += 1
+        scheme, host, port = key
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(host, port, timeout=timeout_s), False
+
+    def _release(self, key: _PoolKey, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def close_all(self) -> None:
+        with self._lock:
+            idle_lists, self._idle = list(self._idle.values()), {}
+        for idle in idle_lists:
+            for conn, _ in idle:
+                conn.close()
+
+    # --- request ---
+
+    def post(
+        self, url: str, body: bytes, headers: Dict[str, str], timeout_s: float
+    ) -> Tuple[int, bytes]:
+        """
+        POST body to url on a pooled connection. Return (status, decoded_body).
+        Network errors are raised (OSError / http.client.HTTPException).
+        """
+        headers = {"Accept-Encoding": ACCEPT_ENCODING, **headers}
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname or "", port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        with self._lock:
+            self._stats["requests"] += 1
+        while True:
+            conn, reused = self._acquire(key, timeout_s)
+            try:
+                conn.request("POST", path, body=body, headers=headers)
+                resp = conn.getresponse()
+                raw, wire = _read_body(resp)
+            except (http.client.RemoteDisconnected, ConnectionError) as e:
+                conn.close()
+                if reused:
+                    # stale keep-alive socket → reconnect and retry on a fresh connection
+                    with self._lock:
+                        self._stats["reconnects"] += 1
+                    continue
+                with self._lock:
+                    self._stats["errors"] += 1
+                raise e
+            except Exception:
+                conn.close()
+                with self._lock:
+                    self._stats["errors"] += 1
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+            self._count_transfer(parts.path, wire, len(raw))
+            return (resp.status, raw)
+
+    def _count_transfer(self, endpoint: str, wire: int, decoded: int) -> None:
+        with self._lock:
+            t = self._transfer.get(endpoint)
+            if t is None:
+                t = self._transfer[endpoint] = {"responses": 0, "wire_bytes": 0, "decoded_bytes": 0}
+            t["responses"] += 1
+            t["wire_bytes"] += wire
+            t["decoded_bytes"] += decoded
+
+    def transfer_stats(self) -> Dict[str, Dict[str, float]]:
+        """{endpoint: {responses, wire_bytes, decoded_bytes, ratio}} (ratio = wire/decoded)."""
+        with self._lock:
+            out: Dict[str, Dict[str, float]] = {k: dict(v) for k, v in self._transfer.items()}
+        for t in out.values():
+            t["ratio"] = round(t["wire_bytes"] / t["decoded_bytes"], 3) if t["decoded_bytes"] else 0.0
+        return out
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            out: Dict[str, float] = dict(self._stats)
+            out["idle"] = sum(len(v) for v in self._idle.values())
+        total = out["created"] + out["reused"]
+        out["reuse_ratio"] = round(out["reused"] / total, 3) if total else 0.0
+        return out
+
+
+def is_failure_status(status: int) -> bool:
+    """Statuses that mean the origin is struggling: network error (0), 429, 5xx."""
+    return status == 0 or status == 429 or status >= 500
+
+
+class OriginGuard:
+    """
+    Admission control for origin requests. Thread-safe.
+
+    Concurrency (AIMD):
+      - limit starts at min_limit and grows by 1/limit per healthy response
+        (≈ +1 per round of requests) up to max_limit
+      - a failure, or a response slower than latency_target_s, halves it
+        (at most once per cooldown, so one bad burst counts once)
+
+    Circuit breaker:
+      - closed → open after failure_threshold consecutive failures
+      - open: every request fails fast until the (jittered, exponentially
+        growing) backoff has passed
+      - half-open: exactly one probe request goes out; success closes the
+        circuit, failure reopens it with a longer backoff
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        latency_target_s: float = 2.0,
+        failure_threshold: int = 5,
+        backoff_s: float = 5.0,
+        backoff_max_s: float = 300.0,
+    ):
+        self.max_limit = max(1, int(max_limit))
+        self.min_limit = max(1, min(int(min_limit), self.max_limit))
+        self.latency_target_s = latency_target_s
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.backoff_s = backoff_s
+        self.backoff_max_s = backoff_max_s
+
+        self._cond = threading.Condition()
+        self._limit = float(self.min_limit)
+        self._inflight = 0
+        self._last_decrease = 0.0
+
+        self._state = self.CLOSED
+        self._failures = 0          # consecutive
+        self._opens = 0             # consecutive opens (backoff exponent)
+        self._open_until = 0.0
+        self._probe_inflight = False
+        self._stats = {"rejected": 0, "opened": 0, "decreases": 0}
+
+    # --- admission ---
+
+    def acquire(self, stop_event: Optional[threading.Event] = None, priority: bool = False) -> bool:
+        """
+        Wait for an in-flight slot. Return False (without a slot) if the circuit
+        is open or stop_event was set. priority callers skip the concurrency wait
+        but still respect the circuit.
+        """
+        with self._cond:
+            while True:
+                if stop_event is not None and stop_event.is_set():
+                    return False
+                if not self._circuit_allows():
+                    self._stats["rejected"] += 1
+                    return False
+                if priority or self._inflight < int(self._limit) or self._state == self.HALF_OPEN:
+                    if self._state == self.HALF_OPEN:
+                        self._probe_inflight = True
+                    self._inflight += 1
+                    return True
+                self._cond.wait(0.1)
+
+    def release(self, status: Optional[int], latency_s: float = 0.0) -> None:
+        """Return a slot. status None = the request was not sent (nothing is recorded)."""
+        with self._cond:
+            self._inflight -= 1
+            if status is not None:
+                failed = is_failure_status(status)
+                self._record_circuit(failed)
+                self._record_limit(failed, latency_s)
+            elif self._state == self.HALF_OPEN:
+                self._probe_inflight = False
+            self._cond.notify_all()
+
+    def retry_after(self) -> float:
+        """Seconds until the circuit lets a probe through (0 = requests are allowed)."""
+        with self._cond:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self._open_until - time.monotonic())
+
+    # --- internals (called with the lock held) ---
+
+    def _circuit_allows(self) -> bool:
+        if self._state == self.CLOSED:
+            return True
+        if self._state == self.OPEN:
+            if time.monotonic() < self._open_until:
+                return False
+            self._state = self.HALF_OPEN
+            self._probe_inflight = False
+        return not self._probe_inflight
+
+    def _record_circuit(self, failed: bool) -> None:
+        if not failed:
+            self._state = self.CLOSED
+            self._failures = self._opens = 0
+            self._probe_inflight = False
+            return
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self) -> None:
+        self._opens += 1
+        backoff = min(self.backoff_max_s, self.backoff_s * (2 ** (self._opens - 1)))
+        self._open_until = time.monotonic() + backoff * random.uniform(0.5, 1.0)
+        self._state = self.OPEN
+        self._probe_inflight = False
+        self._limit = float(self.min_limit)
+        self._stats["opened"] += 1
+
+    def _record_limit(self, failed: bool, latency_s: float) -> None:
+        if failed or latency_s > self.latency_target_s:
+            now = time.monotonic()
+            # one decrease per cooldown (≈ one round of in-flight requests)
+            if now - self._last_decrease >= max(latency_s, 0.5):
+                self._limit = max(float(self.min_limit), self._limit / 2)
+                self._last_decrease = now
+                self._stats["decreases"] += 1
+        else:
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+
+    # --- stats ---
+
+    def stats(self) -> Dict[str, object]:
+        with self._cond:
+            out: Dict[str, object] = dict(self._stats)
+            out.update(
+                state=self._state,
+                limit=int(self._limit),
+                inflight=self._inflight,
+                consecutive_failures=self._failures,
+            )
+        out["retry_after_s"] = round(self.retry_after(), 3)
+        return out
+
+
+_pool = ConnectionPool()
+
+
+def get_pool() -> ConnectionPool:
+    return _pool
+
+
+def pool_stats() -> Dict[str, float]:
+    return _pool.stats()
+
+
+def transfer_stats() -> Dict[str, Dict[str, float]]:
+    return _pool.transfer_stats()
+
+
+def post(url: str, body: bytes, headers: Dict[str, str], timeout_s: float) -> Tuple[int, bytes]:
+    """Module-level shortcut for get_pool().post(...)."""
+    return _pool.post(url, body, headers, timeout_s)
+
+
+def close_all() -> None:
+    _pool.close_all()
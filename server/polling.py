@@ -10,12 +10,16 @@ Constraints:
 - If HTTP status 209 is received, pause polling until new access_token is saved.
 
 Includes:
-  • PollerConfig/AuthInfo/RemoteListItem/DetailPayload dataclasses
+  • PollerConfig/ListQuery/AuthInfo/RemoteListItem/DetailPayload dataclasses
   • Cursor (meta_data) helpers
   • Auth (meta_data:'auth') helpers
-  • Remote API adapters (POST via urllib)
-  • Poll loop (poll_pages_once / poll_forever) and TTL refresh
-  • Utilities (hash, remove_filetext_fields)
+  • Remote API adapters (POST over pooled keep-alive connections, see origin.py),
+    paced by a token bucket
+  • Worker pool for concurrent detail/chats fetching
+  • Poll loop (poll_pages_once / poll_forever) and per-contract scheduled refresh
+  • List sweep (sweep_list_once): list fingerprints decide which contracts to refresh
+  • Metrics (see metrics.py; served by /api/metrics)
+  • Payload normalization lives in normalize.py
 """
 
 from __future__ import annotations
@@ -25,13 +29,18 @@ import json
 import threading
 import time
 import queue
-from dataclasses import dataclass
-from typing import Optional, Dict, Any, List, Tuple
-from urllib import request as _urlreq
-from urllib.error import URLError, HTTPError
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Tuple, Iterable, Iterator, FrozenSet, Callable
+import http.client
 
 from server.utils import log_message, now_ms
 from . import db as _db  # for optional helpers to be added next step
+from . import origin as _origin
+from . import metrics as _metrics
+from . import normalize as _normalize
+from . import events as _events
+from . import writer as _writer
 
 # ---------------------------------------------------------------------
 # Endpoints
@@ -40,20 +49,68 @@ LIST_PATH = "/api/contract/list"
 DETAIL_PATH = "/api/contract/detail"
 CHATS_PATH = "/api/chat/list"
 
+ENDPOINT_NAMES = {LIST_PATH: "list", DETAIL_PATH: "detail", CHATS_PATH: "chats"}
+
 # ---------------------------------------------------------------------
 # Types / Config
 # ---------------------------------------------------------------------
 
+DEFAULT_BUSINESS_TYPES = frozenset({"매뉴얼", "규정지침 + 매뉴얼"})
+
+@dataclass
+class ListQuery:
+    """
+    One LIST query followed by the poller. Each query keeps its own id cursor
+    and batch checkpoint; all queries run in parallel and are merged by id.
+      • category_id / status / sort go to tempMapObj (server-side)
+      • filter goes to the payload's "filter" object (server-side, if the origin supports it)
+      • business_types filters businessWorkDsticText client-side (None = keep everything)
+    The sort must keep ids descending (the cursor relies on it).
+    """
+    name: str = "default"
+    category_id: Optional[int] = 65
+    status: str = "ALL"
+    sort: Dict[str, str] = field(default_factory=lambda: {"columnType": "viewCode", "order": "desc"})
+    filter: Dict[str, Any] = field(default_factory=dict)
+    business_types: Optional[FrozenSet[str]] = DEFAULT_BUSINESS_TYPES
+
 @dataclass
 class PollerConfig:
     base_url: str
     page_size: int = 20
-    sleep_between_items_s: float = 2.0
-    sleep_between_pages_s: float = 10.0
+    sleep_between_cycles_s: float = 10.0
     http_timeout_s: float = 10.0
 
+    # origin pacing: every request (list/detail/chats) takes one token
+    max_workers: int = 4                 # concurrent detail/chats requests
+    requests_per_second: float = 2.0     # token refill rate (<= 0 = unlimited)
+    burst: int = 4                       # bucket capacity
+
+    # origin health (see origin.OriginGuard): in-flight limit adapts between 1 and max_workers
+    latency_target_s: float = 2.0        # slower responses shrink the in-flight limit
+    breaker_failures: int = 5            # consecutive 0/429/5xx responses that open the circuit
+    breaker_backoff_s: float = 5.0       # first open period (doubles per reopen, jittered)
+    breaker_backoff_max_s: float = 300.0
+
     min_contract_id: int = 14881  # for cursor effective lower bound
-    refresh_ttl_ms: Optional[int] = 1 * 60_000  # 1 min by default (None = disabled)
+
+    # LIST queries (see ListQuery); the query named "default" keeps the original cursor keys
+    list_queries: List[ListQuery] = field(default_factory=lambda: [ListQuery()])
+
+    # per-contract refresh schedule (see next_refresh_interval_ms)
+    refresh_ttl_ms: Optional[int] = 1 * 60_000       # floor for active contracts (None = refresh disabled)
+    refresh_max_ms: int = 60 * 60_000                # cap for quiet active contracts
+    refresh_backoff: float = 2.0                     # interval *= backoff per unchanged fetch
+    finished_refresh_min_ms: int = 60 * 60_000       # floor for finished contracts
+    finished_refresh_max_ms: int = 7 * 24 * 60 * 60_000  # cap for finished contracts
+    chats_refresh_factor: float = 4.0    # chats floor/cap = detail floor/cap * factor
+                                         # (a new history entry/status change in detail makes chats due at once)
+
+    # list sweep: walk the first N list pages and refresh only contracts whose list item changed
+    list_sweep_pages: int = 3            # 0 = disabled
+    list_sweep_interval_s: float = 60.0
+
+FINISHED_STATUSES = frozenset({"FINISH"})
 
 @dataclass
 class AuthInfo:
@@ -77,17 +134,93 @@ _cfg: Optional[PollerConfig] = None
 _thread: Optional[threading.Thread] = None
 _stop_event: Optional[threading.Event] = None
 _auth_paused: bool = False  # becomes True if status 209 is seen
+_executor: Optional[ThreadPoolExecutor] = None
+_priority_executor: Optional[ThreadPoolExecutor] = None
+_last_sweep_at: float = 0.0  # time.monotonic() of the last list sweep
+_bucket: Optional["TokenBucket"] = None
+_guard: Optional[_origin.OriginGuard] = None
+
+# ---------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------
+
+M_ORIGIN_REQUESTS = _metrics.counter(
+    "casely_origin_requests_total", "Origin requests by endpoint and HTTP status (0 = network error)",
+    ("endpoint", "status"),
+)
+M_ORIGIN_LATENCY = _metrics.histogram(
+    "casely_origin_request_seconds", "Origin request latency (excluding rate-limit wait)", ("endpoint",),
+)
+M_UPSERTS = _metrics.counter(
+    "casely_upserts_total", "Fetched payload writes by part and result", ("kind", "result"),
+)
+M_POLL_CYCLES = _metrics.counter("casely_poll_cycles_total", "Completed poll_forever cycles")
+M_POLL_CYCLE_SECONDS = _metrics.histogram(
+    "casely_poll_cycle_seconds", "Duration of one poll_forever cycle",
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+M_REFRESH_BACKLOG = _metrics.gauge(
+    "casely_refresh_backlog", "Contracts due for refresh at the end of the last cycle", ("kind",),
+)
+_metrics.callback(
+    "casely_auth_paused", "1 while polling is paused (HTTP 209 / cleared token)",
+    lambda: {(): 1.0 if _auth_paused else 0.0},
+)
+_metrics.callback(
+    "casely_origin_bytes_total", "Origin response bytes on the wire / after decoding",
+    lambda: {
+        (ENDPOINT_NAMES.get(path, path), enc): t[f"{enc}_bytes"]
+        for path, t in _origin.transfer_stats().items()
+        for enc in ("wire", "decoded")
+    },
+    ("endpoint", "encoding"), kind="counter",
+)
+_metrics.callback(
+    "casely_origin_connections_total", "Origin keep-alive connections created/reused/reconnected",
+    lambda: {(k,): v for k, v in _origin.pool_stats().items() if k in ("created", "reused", "reconnects")},
+    ("event",), kind="counter",
+)
+
+_metrics.callback(
+    "casely_origin_concurrency_limit", "Current adaptive in-flight limit for origin requests",
+    lambda: {(): _origin_guard().stats()["limit"]} if _cfg else {},
+)
+_metrics.callback(
+    "casely_origin_inflight", "Origin requests in flight",
+    lambda: {(): _origin_guard().stats()["inflight"]} if _cfg else {},
+)
+_metrics.callback(
+    "casely_origin_circuit_state", "1 for the current circuit breaker state",
+    lambda: {
+        (st,): 1.0 if _origin_guard().stats()["state"] == st else 0.0
+        for st in (_origin.OriginGuard.CLOSED, _origin.OriginGuard.OPEN, _origin.OriginGuard.HALF_OPEN)
+    } if _cfg else {},
+    ("state",),
+)
+_metrics.callback(
+    "casely_origin_guard_events_total", "Circuit opens, fail-fast rejections and limit decreases",
+    lambda: {
+        (k,): v for k, v in _origin_guard().stats().items() if k in ("opened", "rejected", "decreases")
+    } if _cfg else {},
+    ("event",), kind="counter",
+)
+
+def _count_upsert(kind: str, changed: bool) -> None:
+    M_UPSERTS.inc(kind=kind, result="changed" if changed else "unchanged")
 
 # ---------------------------------------------------------------------
 # Lifecycle
 # ---------------------------------------------------------------------
 
 _polling_queue: Optional[queue.Queue] = None
+_wake_event = threading.Event()  # set by post_message / save_auth / stop_poller
 
 def init_poller(config: PollerConfig) -> None:
     """Register config. (No thread start here.)"""
-    global _cfg
+    global _cfg, _bucket, _guard
     _cfg = config
+    _bucket = TokenBucket(config.requests_per_second, config.burst)
+    _guard = _new_guard(config)
 
 def _run_forever() -> None:
     #print("[_run_forever] starting poll_forever()")
@@ -97,7 +230,7 @@ def start_poller(polling_queue: Optional[queue.Queue] = None) -> None:
     """Start background poller thread. (optionally with message queue)"""
 
     global _thread, _stop_event
-    global _polling_queue; _polling_queue = polling_queue
+    global _polling_queue; _polling_queue = polling_queue if polling_queue is not None else queue.Queue()
 
     if _thread and _thread.is_alive():
         return
@@ -113,6 +246,9 @@ def stop_poller(join: bool = True, timeout: Optional[float] = None) -> None:
     """Stop background poller."""
     ev = get_stop_event()
     ev.set()
+    _wake_event.set()
+    _shutdown_executor()
+    _origin.close_all()
     if join and _thread:
         _thread.join(timeout=timeout or 0)
 
@@ -129,38 +265,193 @@ def get_stop_event() -> threading.Event:
         _stop_event = threading.Event()
     return _stop_event
 
+def wake_poller() -> None:
+    """Cut the poller's current idle wait short."""
+    _wake_event.set()
+
+def post_message(msg: Dict[str, Any]) -> None:
+    """Queue a command for the poller thread and wake it up."""
+    global _polling_queue
+    if _polling_queue is None:
+        _polling_queue = queue.Queue()
+    _polling_queue.put(msg)
+    _wake_event.set()
+
+def _idle_wait(timeout_s: Optional[float]) -> None:
+    """Wait until timeout (None = forever), a wakeup or stop."""
+    _wake_event.wait(timeout_s)
+    _wake_event.clear()
+
+# ---------------------------------------------------------------------
+# Rate limit / worker pool
+# ---------------------------------------------------------------------
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Each origin request takes one token.
+    rate <= 0 disables limiting.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = float(rate or 0)
+        self.capacity = max(1.0, float(capacity or 1))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+        self._priority_waiting = 0
+
+    def acquire(self, stop_event: Optional[threading.Event] = None, priority: bool = False) -> bool:
+        """
+        Block until a token is available. Returns False if stop_event was set while waiting.
+        While a priority caller is waiting, normal callers leave the tokens to it.
+        """
+        if self.rate <= 0:
+            return True
+        if priority:
+            with self._lock:
+                self._priority_waiting += 1
+        try:
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                    self._last = now
+                    if self._tokens >= 1.0 and (priority or self._priority_waiting == 0):
+                        self._tokens -= 1.0
+                        return True
+                    wait_s = max(0.01, (1.0 - self._tokens) / self.rate)
+                if stop_event is None:
+                    time.sleep(wait_s)
+                elif stop_event.wait(wait_s):
+                    return False
+        finally:
+            if priority:
+                with self._lock:
+                    self._priority_waiting -= 1
+
+def _rate_limiter() -> TokenBucket:
+    global _bucket
+    if _bucket is None:
+        cfg = _require_cfg()
+        _bucket = TokenBucket(cfg.requests_per_second, cfg.burst)
+    return _bucket
+
+def _new_guard(cfg: PollerConfig) -> _origin.OriginGuard:
+    return _origin.OriginGuard(
+        max_limit=max(1, int(cfg.max_workers)),
+        latency_target_s=cfg.latency_target_s,
+        failure_threshold=cfg.breaker_failures,
+        backoff_s=cfg.breaker_backoff_s,
+        backoff_max_s=cfg.breaker_backoff_max_s,
+    )
+
+def _origin_guard() -> _origin.OriginGuard:
+    global _guard
+    if _guard is None:
+        _guard = _new_guard(_require_cfg())
+    return _guard
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        workers = max(1, int(_require_cfg().max_workers))
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="casely-fetch")
+    return _executor
+
+def _shutdown_executor() -> None:
+    global _executor, _priority_executor
+    for ex in (_executor, _priority_executor):
+        if ex is not None:
+            ex.shutdown(wait=False, cancel_futures=True)
+    _executor = _priority_executor = None
+
 # ---------------------------------------------------------------------
 # Cursor (meta_data)
 # ---------------------------------------------------------------------
 
 CURSOR_KEY = "poll:contracts"  # stored shape: {"max_id_seen": int}
+BATCH_KEY = "poll:batch"       # stored shape: see BatchCheckpoint
+# other ListQuery names use f"{CURSOR_KEY}:{name}" / f"{BATCH_KEY}:{name}"
 
-def load_max_id_seen_effective() -> int:
+def _cursor_key(query: Optional[ListQuery]) -> str:
+    if query is None or query.name == "default":
+        return CURSOR_KEY
+    return f"{CURSOR_KEY}:{query.name}"
+
+def _batch_key(query: Optional[ListQuery]) -> str:
+    if query is None or query.name == "default":
+        return BATCH_KEY
+    return f"{BATCH_KEY}:{query.name}"
+
+@dataclass
+class BatchCheckpoint:
     """
-    Read stored max_id_seen (or 0 if missing), then return:
-      max(stored, (cfg.min_contract_id - 1))
+    Progress of an unfinished list batch (meta_data[BATCH_KEY]).
+    Only valid while the cursor is still start_cursor.
     """
-    cfg = _require_cfg()
+    start_cursor: int          # cursor the batch started from
+    upper_id: int              # highest id stored in this batch (the next cursor)
+    page: int                  # page the batch stopped at
+    stored_ids: List[int]      # ids already stored in this batch
+
+def _meta_get(key: str, conn=None) -> Optional[dict]:
+    if conn is not None:
+        return _db.casely_meta_get(conn, key)
     conn = _db.open_rw()
     try:
-        obj = _db.casely_meta_get(conn, CURSOR_KEY) or {}
+        return _db.casely_meta_get(conn, key)
     finally:
         conn.close()
+
+def _meta_set(key: str, value: dict) -> None:
+    # all writes go through the group-commit writer thread
+    _writer.run(_db.casely_meta_set, key, value)
+
+def load_max_id_seen_effective(conn=None, query: Optional[ListQuery] = None) -> int:
+    """
+    Read stored max_id_seen of the query (or 0 if missing), then return:
+      max(stored, (cfg.min_contract_id - 1))
+    """
+    cfg = _require_cfg()
+    obj = _meta_get(_cursor_key(query), conn) or {}
     stored = int(obj.get("max_id_seen", 0) or 0)
     min_id_minus_1 = int(cfg.min_contract_id) - 1
     return max(stored, min_id_minus_1)
 
-def save_max_id_seen(new_max_id: int) -> None:
+def save_max_id_seen(new_max_id: int, conn=None, query: Optional[ListQuery] = None) -> None:
     """Advance cursor only after a successful batch."""
-    conn = _db.open_rw()
+    key = _cursor_key(query)
+    obj = _meta_get(key, conn) or {}
+    if int(obj.get("max_id_seen", 0) or 0) >= new_max_id:
+        return
+    obj["max_id_seen"] = int(new_max_id)
+    _meta_set(key, obj)
+
+def load_batch_checkpoint(start_cursor: int, conn=None, query: Optional[ListQuery] = None) -> Optional[BatchCheckpoint]:
+    """Return the saved checkpoint if it belongs to a batch that started from start_cursor."""
+    obj = _meta_get(_batch_key(query), conn) or {}
     try:
-        obj = _db.casely_meta_get(conn, CURSOR_KEY) or {}
-        if int(obj.get("max_id_seen", 0) or 0) >= new_max_id:
-            return
-        obj["max_id_seen"] = int(new_max_id)
-        _db.casely_meta_set(conn, CURSOR_KEY, obj)
-    finally:
-        conn.close()
+        ckpt = BatchCheckpoint(
+            start_cursor=int(obj["start_cursor"]),
+            upper_id=int(obj["upper_id"]),
+            page=int(obj["page"]),
+            stored_ids=[int(x) for x in obj.get("stored_ids") or []],
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+    return ckpt if ckpt.start_cursor == start_cursor else None
+
+def save_batch_checkpoint(ckpt: Optional[BatchCheckpoint], conn=None, query: Optional[ListQuery] = None) -> None:
+    """Save (or clear, with None) the batch checkpoint."""
+    if ckpt is None:
+        _meta_set(_batch_key(query), {})
+        return
+    _meta_set(_batch_key(query), {
+        "start_cursor": ckpt.start_cursor,
+        "upper_id": ckpt.upper_id,
+        "page": ckpt.page,
+        "stored_ids": sorted(set(ckpt.stored_ids)),
+    })
 
 # ---------------------------------------------------------------------
 # AUTH (meta_data: key='auth')
@@ -168,43 +459,45 @@ def save_max_id_seen(new_max_id: int) -> None:
 
 AUTH_KEY = "auth"  # stored shape: {"access_token": "...", "userId": "..."}
 
+# in-memory copy of meta_data['auth'] (read from the DB once, then kept in sync by save/clear)
+_auth: Optional[AuthInfo] = None
+_auth_loaded: bool = False
+_auth_lock = threading.Lock()
+
 def load_auth() -> Optional[AuthInfo]:
-    conn = _db.open_rw()
-    try:
-        obj = _db.casely_meta_get(conn, AUTH_KEY)
-    finally:
-        conn.close()
-    if not obj:
-        return None
-    access_token = obj.get("access_token")
-    user_id = obj.get("userId")
-    if not access_token or not user_id:
-        return None
-    return AuthInfo(access_token=str(access_token), user_id=str(user_id))
+    global _auth, _auth_loaded
+    with _auth_lock:
+        if _auth_loaded:
+            return _auth
+        obj = _meta_get(AUTH_KEY)
+        _auth = None
+        if obj and obj.get("access_token") and obj.get("userId"):
+            _auth = AuthInfo(access_token=str(obj["access_token"]), user_id=str(obj["userId"]))
+        _auth_loaded = True
+        return _auth
 
 
 def save_auth(access_token: str, user_id: str) -> None:
-    global _auth_paused
+    global _auth_paused, _auth, _auth_loaded
     # 이미 저장된 값과 같으면 바로 return
     current = load_auth()
     if current and current.access_token == access_token and current.user_id == user_id:
         return
     log_message(f"[save_auth] new value: access_token={access_token}, user_id={user_id}")
-    conn = _db.open_rw()
-    try:
-        _db.casely_meta_set(conn, AUTH_KEY, {"access_token": access_token, "userId": user_id})
-    finally:
-        conn.close()
+    _meta_set(AUTH_KEY, {"access_token": access_token, "userId": user_id})
+    with _auth_lock:
+        _auth = AuthInfo(access_token=str(access_token), user_id=str(user_id))
+        _auth_loaded = True
     _auth_paused = False  # new token clears pause
+    _wake_event.set()
 
 def clear_auth() -> None:
     """Clear auth; subsequent polling cycles should PASS."""
-    global _auth_paused
-    conn = _db.open_rw()
-    try:
-        _db.casely_meta_set(conn, AUTH_KEY, {})
-    finally:
-        conn.close()
+    global _auth_paused, _auth, _auth_loaded
+    _meta_set(AUTH_KEY, {})
+    with _auth_lock:
+        _auth = None
+        _auth_loaded = True
     _auth_paused = True
 
 def notify_auth_status(status_code: int) -> None:
@@ -214,7 +507,7 @@ def notify_auth_status(status_code: int) -> None:
         _auth_paused = True
 
 def is_auth_ready() -> bool:
-    """Return True if we have token+user_id and are not paused due to 209."""
+    """Return True if we have token+user_id and are not paused due to 209. (no DB access)"""
     if _auth_paused:
         return False
     info = load_auth()
@@ -239,32 +532,49 @@ def _timeout() -> float:
     t = float(_require_cfg().http_timeout_s)
     return t if t > 0 else 10.0
 
+def _origin_post(path: str, payload: Dict[str, Any], *, priority: bool = False) -> Tuple[int, Optional[Any], str]:
+    """
+    POST to the origin once the guard admits it (in-flight limit / circuit) and
+    the rate limiter hands out a token. Stopping or an open circuit → status 0.
+    """
+    guard = _origin_guard()
+    if not guard.acquire(get_stop_event(), priority=priority):
+        return (0, None, "")
+    status: Optional[int] = None
+    elapsed = 0.0
+    try:
+        if not _rate_limiter().acquire(get_stop_event(), priority=priority):
+            return (0, None, "")
+        endpoint = ENDPOINT_NAMES.get(path, path)
+        started = time.monotonic()
+        result = _http_post_json(f"{_base_url()}{path}", payload, timeout_s=_timeout())
+        elapsed = time.monotonic() - started
+        status = result[0]
+        M_ORIGIN_LATENCY.observe(elapsed, endpoint=endpoint)
+        M_ORIGIN_REQUESTS.inc(endpoint=endpoint, status=status)
+        return result
+    finally:
+        guard.release(status, elapsed)
+
+def origin_retry_after() -> float:
+    """Seconds until the origin circuit breaker allows a probe (0 = closed / probing)."""
+    return _origin_guard().retry_after()
+
 def _http_post_json(url: str, payload: Dict[str, Any], timeout_s: float) -> Tuple[int, Optional[Any], str]:
     """
-    POST JSON (standard library only). Return (status, parsed_json_or_None, raw_text).
+    POST JSON over a pooled keep-alive connection. Return (status, parsed_json_or_None, raw_text).
     """
     data_bytes = json.dumps(payload, ensure_ascii=False).encode("utf-8")
-    req = _urlreq.Request(
-        url=url,
-        data=data_bytes,
-        method="POST",
-        headers={
-            "Content-Type": "application/json; charset=utf-8",
-            "Accept": "application/json, text/plain, */*",
-        },
-    )
+    headers = {
+        "Content-Type": "application/json; charset=utf-8",
+        "Accept": "application/json, text/plain, */*",
+    }
     try:
-        with _urlreq.urlopen(req, timeout=timeout_s) as resp:
-            status = getattr(resp, "status", resp.getcode())
-            raw = resp.read()
-            text = raw.decode("utf-8", errors="replace")
-    except HTTPError as e:
-        status = e.code
-        raw = e.read()
-        text = raw.decode("utf-8", errors="replace") if raw else ""
-    except URLError:
+        status, raw = _origin.post(url, data_bytes, headers, timeout_s)
+    except (OSError, http.client.HTTPException):
         # Network failure — represent as status 0, no JSON
         return (0, None, "")
+    text = raw.decode("utf-8", errors="replace") if raw else ""
     # Try parse JSON
     try:
         parsed = json.loads(text)
@@ -272,15 +582,27 @@ def _http_post_json(url: str, payload: Dict[str, Any], timeout_s: float) -> Tupl
         parsed = None
     return (status, parsed, text)
 
-def _is_desired_item(raw_item: Dict[str, Any]) -> bool:
+def _is_desired_item(raw_item: Dict[str, Any], business_types: Optional[FrozenSet[str]] = DEFAULT_BUSINESS_TYPES) -> bool:
     """
     Business filter: keep only items where
-      businessWorkDsticText ∈ {"매뉴얼", "규정지침 + 매뉴얼"}.
+      businessWorkDsticText ∈ business_types (default {"매뉴얼", "규정지침 + 매뉴얼"}).
+    business_types=None keeps everything.
     """
+    if business_types is None:
+        return True
     t = (raw_item or {}).get("businessWorkDsticText", "") or ""
-    return t in ("매뉴얼", "규정지침 + 매뉴얼")
-
-def make_list_payload(auth: AuthInfo, *, page: int, page_size: int) -> Dict[str, Any]:
+    return t in business_types
+
+def make_list_payload(auth: AuthInfo, *, page: int, page_size: int, query: Optional[ListQuery] = None) -> Dict[str, Any]:
+    query = query or ListQuery()
+    temp_map: Dict[str, Any] = {
+        "isAbroad": False,
+        "isLawyer": False,
+        "sort": dict(query.sort),
+        "status": query.status,
+    }
+    if query.category_id is not None:
+        temp_map["categoryId"] = query.category_id
     return {
         "_bak_t": auth.access_token,
         "schEpicId": -1,
@@ -288,36 +610,38 @@ def make_list_payload(auth: AuthInfo, *, page: int, page_size: int) -> Dict[str,
         "pageNum": int(page),
         "numberPerPage": int(page_size),
         "abroad": False,
-        "filter": {},
-        "tempMapObj": {
-            "isAbroad": False,
-            "isLawyer": False,
-            "categoryId": 65,
-            "sort": {"columnType": "viewCode", "order": "desc"},
-            "status": "ALL",
-        },
+        "filter": dict(query.filter),
+        "tempMapObj": temp_map,
     }
 
-def fetch_list_page(auth: AuthInfo, page: int, page_size: int) -> Tuple[List[RemoteListItem], bool]:
+def fetch_list_page(
+    auth: AuthInfo, page: int, page_size: int, *,
+    start_cursor: Optional[int] = None, query: Optional[ListQuery] = None,
+) -> Tuple[Optional[List[RemoteListItem]], bool]:
     # print("fetch_list_page", page, page_size)
     """
     POST LIST_PATH and return (filtered_items, has_more).
     Response shape:
     { "returnCode": 0, "appData": { "contractList": [ { "id": 123, "businessWorkDsticText": "...", ... }, ... ] } }
-    • Status 209 → notify_auth_status(209) and return ([], False).
+    • Status 209 → notify_auth_status(209) and return (None, False).
+    • Other failures → (None, False). (None = request failed, [] = nothing new)
     • has_more: True if raw contractList count >= page_size (heuristic).
+    • start_cursor: pass the batch's cursor to avoid re-reading it from the DB per page.
+    • query: ListQuery (default: ListQuery()) for the payload and the client-side filter.
     """
-    start_cursor = load_max_id_seen_effective()
+    query = query or ListQuery()
+    if start_cursor is None:
+        start_cursor = load_max_id_seen_effective(query=query)
 
     url = f"{_base_url()}{LIST_PATH}"
-    status, data, _ = _http_post_json(url, make_list_payload(auth, page=page, page_size=page_size), timeout_s=_timeout())
+    status, data, _ = _origin_post(LIST_PATH, make_list_payload(auth, page=page, page_size=page_size, query=query))
     if status == 209:
         notify_auth_status(209)
-        return ([], False)
+        return (None, False)
 
     if status != 200:
         print("Unexpected status while fetching list", status)
-        return ([], False)
+        return (None, False)
 
     items_raw: List[Dict[str, Any]] = []
     if isinstance(data, dict) and data.get("returnCode") == 0:
@@ -342,7 +666,7 @@ def fetch_list_page(auth: AuthInfo, page: int, page_size: int) -> Tuple[List[Rem
             has_more = False  # full stop (older pages unnecessary)
             break
 
-        if not _is_desired_item(it):
+        if not _is_desired_item(it, query.business_types):
             #print("Skipping undesired item in list page:", cid)
             continue
 
@@ -368,33 +692,34 @@ def make_chats_payload(auth: AuthInfo, *, contract_id: int) -> Dict[str, Any]:
         "tempMap": {"entityId": int(contract_id)},
     }
 
-def fetch_detail_and_chats(contract_id: int, auth: AuthInfo) -> Optional[DetailPayload]:
-    # print("fetch_detail_and_chats", contract_id)
+def fetch_detail(contract_id: int, auth: AuthInfo, *, priority: bool = False) -> Optional[str]:
     """
-    POST DETAIL_PATH / CHATS_PATH.
-    - detail: use resp["appData"] as the payload
-    - chats : use resp["appData"]["chatList"] as the payload
-    - strip 'fileText' recursively before hashing/storing (detail only)
-    - 209 → pause and return None
+    POST DETAIL_PATH and return resp["appData"] as a JSON string,
+    normalized (normalize.normalize_detail: fileText stripped, dates → *Ms, keys/types unified). 209 → pause and return None.
+    Open origin circuit → None.
     """
-    # detail
-    d_url = f"{_base_url()}{DETAIL_PATH}"
-    d_status, d_json, _ = _http_post_json(d_url, make_detail_payload(auth, contract_id=contract_id), timeout_s=_timeout())
+    if _auth_paused or origin_retry_after() > 0:
+        return None
+    d_status, d_json, _ = _origin_post(DETAIL_PATH, make_detail_payload(auth, contract_id=contract_id), priority=priority)
     if d_status == 209:
         notify_auth_status(209)
         return None
     if not (isinstance(d_json, dict) and d_json.get("returnCode") == 0):
         print("Unexpected status while fetching detail", d_status)
         return None
-    
-    # print("detail", contract_id, d_json)
+
     detail_obj = (d_json.get("appData") or {})
-    remove_filetext_fields(detail_obj)  # mutate in place
-    detail_str = json.dumps(detail_obj, ensure_ascii=False, separators=(",", ":"))
+    _normalize.normalize_detail(detail_obj)  # mutate in place
+    return json.dumps(detail_obj, ensure_ascii=False, separators=(",", ":"))
 
-    # chats
-    c_url = f"{_base_url()}{CHATS_PATH}"
-    c_status, c_json, _ = _http_post_json(c_url, make_chats_payload(auth, contract_id=contract_id), timeout_s=_timeout())
+def fetch_chats(contract_id: int, auth: AuthInfo, *, priority: bool = False) -> Optional[str]:
+    """
+    POST CHATS_PATH and return resp["appData"]["chatList"] as a JSON string.
+    209 → pause and return None. Open origin circuit → None.
+    """
+    if _auth_paused or origin_retry_after() > 0:
+        return None
+    c_status, c_json, _ = _origin_post(CHATS_PATH, make_chats_payload(auth, contract_id=contract_id), priority=priority)
     if c_status == 209:
         notify_auth_status(209)
         return None
@@ -403,98 +728,442 @@ def fetch_detail_and_chats(contract_id: int, auth: AuthInfo) -> Optional[DetailP
     chats_list = (c_json.get("appData") or {}).get("chatList") or []
     if not isinstance(chats_list, list):
         chats_list = []
-    chats_str = json.dumps(chats_list, ensure_ascii=False, separators=(",", ":"))
+    _normalize.normalize_chats(chats_list)  # mutate in place
+    return json.dumps(chats_list, ensure_ascii=False, separators=(",", ":"))
 
+def fetch_detail_and_chats(contract_id: int, auth: AuthInfo) -> Optional[DetailPayload]:
+    """
+    POST DETAIL_PATH / CHATS_PATH sequentially (see fetch_detail / fetch_chats).
+    """
+    detail_str = fetch_detail(contract_id, auth)
+    if detail_str is None:
+        return None
+    chats_str = fetch_chats(contract_id, auth)
+    if chats_str is None:
+        return None
     return DetailPayload(
         detail_json_str=detail_str,
         chats_json_str=chats_str,
     )
 
+def fetch_detail_and_chats_many(
+    contract_ids: Iterable[int], auth: AuthInfo
+) -> Iterator[Tuple[int, Optional[DetailPayload]]]:
+    """
+    Concurrent fetch_detail_and_chats.
+    - detail and chats requests of every id are submitted to the worker pool
+      (paced by the token bucket)
+    - yields (id, payload) in completion order; payload is None if either request failed
+    - closing the generator early cancels requests that have not started yet
+    """
+    ex = _get_executor()
+    pending: Dict[Future, Tuple[int, str]] = {}
+    for cid in contract_ids:
+        pending[ex.submit(fetch_detail, cid, auth)] = (cid, "detail")
+        pending[ex.submit(fetch_chats, cid, auth)] = (cid, "chats")
+
+    parts: Dict[int, Dict[str, str]] = {}
+    failed: set = set()
+    try:
+        for fut in as_completed(list(pending)):
+            cid, kind = pending.pop(fut)
+            if cid in failed:
+                continue
+            try:
+                value = fut.result()
+            except Exception as e:
+                log_message(f"[fetch_detail_and_chats_many] {kind} fetch failed: id={cid}, {e!r}")
+                value = None
+            if value is None:
+                failed.add(cid)
+                parts.pop(cid, None)
+                yield (cid, None)
+                continue
+            got = parts.setdefault(cid, {})
+            got[kind] = value
+            if len(got) == 2:
+                del parts[cid]
+                yield (cid, DetailPayload(detail_json_str=got["detail"], chats_json_str=got["chats"]))
+    finally:
+        for fut in pending:
+            fut.cancel()
+
+def fetch_many(
+    fetch_fn, contract_ids: Iterable[int], auth: AuthInfo
+) -> Iterator[Tuple[int, Optional[str]]]:
+    """
+    Run fetch_fn (fetch_detail / fetch_chats) for every id on the worker pool.
+    Yields (id, result) in completion order; closing the generator early cancels
+    requests that have not started yet.
+    """
+    ex = _get_executor()
+    pending: Dict[Future, int] = {ex.submit(fetch_fn, cid, auth): cid for cid in contract_ids}
+    try:
+        for fut in as_completed(list(pending)):
+            cid = pending.pop(fut)
+            try:
+                value = fut.result()
+            except Exception as e:
+                log_message(f"[fetch_many] {fetch_fn.__name__} failed: id={cid}, {e!r}")
+                value = None
+            yield (cid, value)
+    finally:
+        for fut in pending:
+            fut.cancel()
+
+# ---------------------------------------------------------------------
+# Priority refresh (on demand, single contract)
+# ---------------------------------------------------------------------
+
+# contract id → Future shared by every caller waiting on the same refresh
+_priority_inflight: Dict[int, Future] = {}
+_priority_lock = threading.Lock()
+
+class RefreshError(RuntimeError):
+    """Base class of the errors request_refresh() raises or resolves its Future with."""
+
+
+class ContractNotFound(RefreshError):
+    """The id is not a stored (non-deleted) contract; refresh never creates rows."""
+
+
+class AuthUnavailable(RefreshError):
+    """No auth token, or polling is paused by the origin."""
+
+
+class OriginUnavailable(RefreshError):
+    """The origin circuit breaker is open."""
+
+
+class OriginFetchFailed(RefreshError):
+    """The detail or chats request to the origin failed."""
+
+
+def _get_priority_executor() -> ThreadPoolExecutor:
+    global _priority_executor
+    with _priority_lock:
+        if _priority_executor is None:
+            _priority_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="casely-priority")
+        return _priority_executor
+
+def request_refresh(contract_id: int) -> Future:
+    """
+    Refresh one contract (detail+chats) right away, ahead of list polling and
+    scheduled refresh work:
+      - runs on a separate small pool, so it never queues behind bulk fetches
+        (the DB write happens there too, on its own connection)
+      - takes rate-limiter tokens before any normal request does
+      - concurrent requests for the same id share one refresh
+    Only contracts already stored (and not deleted) are refreshed: the list
+    queries, _is_desired_item and min_contract_id decide what gets stored.
+    Raises ContractNotFound right away for any other id. The Future resolves to
+    {"id", "changed", "detail_changed", "chats_changed", "updated_at"} or raises
+    AuthUnavailable / OriginUnavailable / OriginFetchFailed (or ContractNotFound
+    if the row went away meanwhile).
+    """
+    cid = int(contract_id)
+    with _db.request_conns() as conn:
+        row = _db.casely_get_contract(conn, cid)
+    if row is None or row["deleted_at"] is not None:
+        raise ContractNotFound(f"contract {cid} not found")
+    with _priority_lock:
+        fut = _priority_inflight.get(cid)
+        if fut is not None:
+            return fut
+        fut = Future()
+        _priority_inflight[cid] = fut
+    if not is_auth_ready():
+        _finish_priority(cid, error=AuthUnavailable("auth not ready"))
+        return fut
+    _get_priority_executor().submit(_run_priority_refresh, cid)
+    return fut
+
+def _finish_priority(cid: int, result: Optional[Dict[str, Any]] = None, error: Optional[BaseException] = None) -> None:
+    with _priority_lock:
+        fut = _priority_inflight.pop(cid, None)
+    if fut is None:
+        return
+    if error is not None:
+        fut.set_exception(error)
+    else:
+        fut.set_result(result)
+
+def _run_priority_refresh(cid: int) -> None:
+    try:
+        auth = load_auth()
+        if auth is None or not is_auth_ready():
+            raise AuthUnavailable("auth not ready")
+        if origin_retry_after() > 0:
+            raise OriginUnavailable("origin unavailable (circuit open)")
+        detail_str = fetch_detail(cid, auth, priority=True)
+        chats_str = fetch_chats(cid, auth, priority=True) if detail_str is not None else None
+        if detail_str is None or chats_str is None:
+            raise OriginFetchFailed("fetch failed")
+        detail_changed, chats_changed, row = _writer.run(_store_refreshed, cid, detail_str, chats_str, now_ms())
+        _count_upsert("detail", detail_changed)
+        _count_upsert("chats", chats_changed)
+        if detail_changed or chats_changed:
+            log_message(f"[request_refresh] contract updated: id={cid}")
+            _events.publish("contracts", [cid], int((row or {}).get("source_updated_at") or 0))
+        _finish_priority(cid, result={
+            "id": cid,
+            "changed": detail_changed or chats_changed,
+            "detail_changed": detail_changed,
+            "chats_changed": chats_changed,
+            "updated_at": int((row or {}).get("source_updated_at") or 0),
+        })
+    except BaseException as e:
+        _finish_priority(cid, error=e)
+
 # ---------------------------------------------------------------------
 # Polling logic
 # ---------------------------------------------------------------------
 
+def _list_queries() -> List[ListQuery]:
+    return list(_require_cfg().list_queries) or [ListQuery()]
+
 def poll_pages_once(max_pages: Optional[int] = None) -> int:
     """
-    LIST is sorted by id DESC.
-    Batch flow:
-      - At batch start: start_cursor = load_max_id_seen_effective()
-      - During batch: DO NOT save cursor
-      - For each item: stop if item.id <= start_cursor (already seen)
-                       fetch detail+chats, then upsert-or-touch
-      - At batch end: save_max_id_seen(batch_max_seen) if advanced
-    Returns: number of stored items in this batch
+    Run one list batch per configured ListQuery (see _poll_query_once).
+    Multiple queries run in parallel; a contract returned by several queries
+    in the same round is fetched once (by whichever query claims it first).
+    Returns: number of stored items over all queries
     """
-    cfg = _require_cfg()
     if not is_auth_ready():
         return 0
     auth = load_auth()
     if not auth:
         return 0
 
-    start_cursor = load_max_id_seen_effective()
-    batch_max_seen = start_cursor
+    queries = _list_queries()
+    claimed: set = set()
+    claim_lock = threading.Lock()
+
+    def claim(cid: int) -> bool:
+        with claim_lock:
+            if cid in claimed:
+                return False
+            claimed.add(cid)
+            return True
+
+    if len(queries) == 1:
+        return _poll_query_once(queries[0], auth, claim, max_pages)
+
+    total = 0
+    # list fan-out runs on its own short-lived threads: the fetch pool is used for detail/chats inside
+    with ThreadPoolExecutor(max_workers=len(queries), thread_name_prefix="casely-list") as ex:
+        futs = {ex.submit(_poll_query_once, q, auth, claim, max_pages): q for q in queries}
+        for fut in as_completed(futs):
+            try:
+                total += fut.result()
+            except Exception as e:
+                log_message(f"[poll_pages_once] query {futs[fut].name!r} failed: {e!r}")
+    return total
+
+def _store_refreshed(conn, cid: int, detail_str: str, chats_str: str, fetched_at: int):
+    """Writer op: store a refreshed detail + chats together; returns (detail_changed, chats_changed, row)."""
+    row = _db.casely_get_contract(conn, cid)
+    if row is None or row["deleted_at"] is not None:
+        # deleted while the fetch was in flight: the upserts would re-create/revive it
+        raise ContractNotFound(f"contract {cid} not found")
+    with _db.tx_immediate(conn):
+        detail_changed = _db.casely_upsert_fetched_detail(
+            conn, id=cid, detail_json_str=detail_str,
+            fetched_at_ms=fetched_at, scheduler=next_refresh_interval_ms,
+        )
+        chats_changed = _db.casely_upsert_fetched_chats(
+            conn, id=cid, chats_json_str=chats_str,
+            fetched_at_ms=fetched_at, scheduler=next_chats_refresh_interval_ms,
+        )
+    return detail_changed, chats_changed, _db.casely_get_contract(conn, cid)
+
+def _poll_query_once(
+    query: ListQuery, auth: AuthInfo, claim: Callable[[int], bool], max_pages: Optional[int] = None
+) -> int:
+    """
+    LIST is sorted by id DESC.
+    Batch flow (per query; cursor and checkpoint are the query's own):
+      - At batch start: start_cursor = load_max_id_seen_effective()
+      - During batch: DO NOT save cursor; save a BatchCheckpoint after every page
+        (and when the batch is interrupted)
+      - For each item: stop if item.id <= start_cursor (already seen)
+                       skip if already stored by this batch (checkpoint)
+                       skip if another query claimed it this round (that query stores it)
+                       fetch detail+chats (per page, concurrently), then upsert-or-touch
+      - At batch end: save_max_id_seen(upper_id) if advanced, clear the checkpoint
+    Upserts of a page are queued on the group-commit writer and settled (committed)
+    before the page's checkpoint is saved, so a page costs one or a few commits.
+    Resuming an interrupted batch:
+      - continue from the checkpoint page (one page earlier, in case items shifted back)
+      - ignore items newer than the checkpoint's upper_id; the next batch picks them up
+    Returns: number of stored items in this batch
+    """
+    cfg = _require_cfg()
+    tag = "" if query.name == "default" else f"[{query.name}] "
     processed = 0
-    page = 1
     pages_done = 0
 
-    # open one RW connection for the whole batch
+    # one connection for the batch's reads; writes go through the writer thread
     conn = _db.open_rw()
     try:
+        start_cursor = load_max_id_seen_effective(conn, query)
+        ckpt = load_batch_checkpoint(start_cursor, conn, query)
+        if ckpt is not None:
+            resumed_upper: Optional[int] = ckpt.upper_id
+            page = max(1, ckpt.page - 1)
+            log_message(
+                f"[poll_pages_once] {tag}resuming batch: cursor={start_cursor}, page={page}, "
+                f"stored={len(ckpt.stored_ids)}"
+            )
+        else:
+            resumed_upper = None
+            ckpt = BatchCheckpoint(start_cursor=start_cursor, upper_id=start_cursor, page=1, stored_ids=[])
+            page = 1
+        stored = set(ckpt.stored_ids)
+
+        def interrupt() -> int:
+            ckpt.page = page
+            ckpt.stored_ids = list(stored)
+            if stored:
+                save_batch_checkpoint(ckpt, conn, query)
+            return processed
+
+        def mark_stored(cid: int) -> None:
+            stored.add(cid)
+            if cid > ckpt.upper_id:
+                ckpt.upper_id = cid
+
+        pending: List[Tuple[int, int, Future]] = []  # (cid, fetched_at, upsert future)
+
+        def settle() -> None:
+            # wait for queued upserts to commit; only then count them as stored
+            nonlocal processed
+            changed_ids, updated_at = [], 0
+            while pending:
+                cid, fetched_at, fut = pending.pop(0)
+                changed = fut.result()
+                _count_upsert("contract", changed)
+                if changed:
+                    log_message(f"[poll_pages_once] {tag}new or updated contract saved: id={cid}")
+                    changed_ids.append(cid)
+                    updated_at = max(updated_at, fetched_at)
+                mark_stored(cid)
+                processed += 1
+            if changed_ids:
+                _events.publish("contracts", changed_ids, updated_at)
+
         while True:
-            items, has_more = fetch_list_page(auth, page, cfg.page_size)
-            #print("Fetched list page", page, "items:", len(items), "has_more:", has_more)
+            items, has_more = fetch_list_page(auth, page, cfg.page_size, start_cursor=start_cursor, query=query)
+            if items is None:
+                print(f"{tag}Stopping batch early: list request failed")
+                return interrupt()
+            todo = []
             for it in items:
-                payload = fetch_detail_and_chats(it.id, auth)
+                if it.id in stored or (resumed_upper is not None and it.id > resumed_upper):
+                    continue
+                if claim(it.id):
+                    todo.append(it.id)
+                else:
+                    mark_stored(it.id)
+            #print("Fetched list page", page, "items:", len(items), "has_more:", has_more)
+            # detail+chats of the whole page run concurrently on the worker pool
+            for cid, payload in fetch_detail_and_chats_many(todo, auth):
                 if payload is None:
-                    print("Stopping batch early due to fetch_detail_and_chats returning None")
-                    # start_cursor를 업데이트 해버리면 다시 fetch를 안하기 때문에 억울하지만 바로 리턴.
-                    # 다음 fetch 때 첫페이지부터 다시 시작해야 함. :(
-                    return processed
-
-                # Upsert or touch (to be implemented in db.py)
-                changed = _db.casely_upsert_fetched_contract(
-                    conn,
-                    id=it.id,
+                    # 진행 상황(page, 저장된 id)은 체크포인트에 남기고 리턴. 다음 배치에서 이어서 진행.
+                    print(f"{tag}Stopping batch early due to fetch_detail_and_chats returning None")
+                    settle()
+                    return interrupt()
+
+                fetched_at = now_ms()
+                pending.append((cid, fetched_at, _writer.submit(
+                    _db.casely_upsert_fetched_contract,
+                    id=cid,
                     detail_json_str=payload.detail_json_str,
                     chats_json_str=payload.chats_json_str,
-                    fetched_at_ms=now_ms(),
-                )
-
-                if changed:
-                    log_message(f"[poll_pages_once] new or updated contract saved: id={it.id}")
-
-                if it.id > batch_max_seen:
-                    batch_max_seen = it.id
-
-                processed += 1
-                if cfg.sleep_between_items_s > 0:
-                    time.sleep(cfg.sleep_between_items_s)
+                    fetched_at_ms=fetched_at,
+                    scheduler=next_refresh_interval_ms,
+                    chats_scheduler=next_chats_refresh_interval_ms,
+                )))
+            settle()
 
             pages_done += 1
             if not has_more:
                 break
 
             page += 1
-            if cfg.sleep_between_pages_s > 0:
-                time.sleep(cfg.sleep_between_pages_s)
+            ckpt.page = page
+            ckpt.stored_ids = list(stored)
+            save_batch_checkpoint(ckpt, conn, query)
+            if max_pages is not None and pages_done >= max_pages:
+                return processed
+
+        # advance cursor only once, at batch end
+        if ckpt.upper_id > start_cursor:
+            save_max_id_seen(ckpt.upper_id, conn, query)
+        save_batch_checkpoint(None, conn, query)
     finally:
         conn.close()
 
-    # advance cursor only once, at batch end
-    if batch_max_seen > start_cursor:
-        save_max_id_seen(batch_max_seen)
-
     return processed
 
-def refresh_stale_once(ttl_ms: int, max_items: Optional[int] = None) -> int:
+def _scheduled_interval(
+    prev_interval_ms: int, changed: bool, quiet_ms: int, change_gap_ms: int, floor: int, cap: int
+) -> int:
+    cfg = _require_cfg()
+    if changed or prev_interval_ms <= 0:
+        interval = floor
+    else:
+        interval = max(prev_interval_ms * cfg.refresh_backoff, quiet_ms / 4)
+        if change_gap_ms > 0:
+            # Frequently changing contracts back off only to half the expected gap to the
+            # next change: the gap EWMA with the current quiet spell folded in as if it
+            # ended now, so the ceiling still grows (slowly) while the contract stays quiet.
+            alpha = _db.CHANGE_GAP_ALPHA
+            expected_gap = change_gap_ms * (1 - alpha) + max(quiet_ms, change_gap_ms) * alpha
+            interval = min(interval, expected_gap / 2)
+    return int(min(max(interval, floor), max(cap, floor)))
+
+def _refresh_bounds(status: Optional[str]) -> Tuple[int, int]:
+    cfg = _require_cfg()
+    if status in FINISHED_STATUSES:
+        return cfg.finished_refresh_min_ms, cfg.finished_refresh_max_ms
+    return int(cfg.refresh_ttl_ms or 0), cfg.refresh_max_ms
+
+def next_refresh_interval_ms(
+    prev_interval_ms: int, changed: bool, status: Optional[str], quiet_ms: int, change_gap_ms: int = 0
+) -> int:
+    """
+    Per-contract detail refresh interval (db.RefreshScheduler).
+      - changed            → floor (refresh_ttl_ms, or finished_refresh_min_ms for FINISH)
+      - unchanged          → max(prev * refresh_backoff, quiet_ms / 4), i.e. back off
+                             faster for contracts that have been quiet for a long time
+                             ... but at most half the expected gap between changes
+                             (change_gap_ms, 0 = unknown), so a contract that has changed
+                             often stays on a short interval longer than one that changed once
+      - always clamped to [floor, cap] of the contract's status
     """
-    TTL refresh:
-      - Pick contracts where (now - fetched_at) > ttl_ms (oldest first, up to max_items)
-      - Re-fetch detail+chats
-      - If content changed: upsert-or-touch (which will set updated_at=now)
-      - If content same: touch fetched_at ONLY
-    Returns number of processed items.
+    floor, cap = _refresh_bounds(status)
+    return _scheduled_interval(prev_interval_ms, changed, quiet_ms, change_gap_ms, floor, cap)
+
+def next_chats_refresh_interval_ms(
+    prev_interval_ms: int, changed: bool, status: Optional[str], quiet_ms: int, change_gap_ms: int = 0
+) -> int:
+    """Chats refresh interval: same rules, bounds scaled by chats_refresh_factor (backstop only)."""
+    factor = max(1.0, float(_require_cfg().chats_refresh_factor))
+    floor, cap = _refresh_bounds(status)
+    return _scheduled_interval(
+        prev_interval_ms, changed, quiet_ms, change_gap_ms, int(floor * factor), int(cap * factor)
+    )
+
+def refresh_stale_once(max_items: Optional[int] = None) -> int:
+    """
+    Scheduled refresh, detail and chats on independent cadences:
+      1) detail: contracts whose next_refresh_at <= now (earliest first, up to max_items)
+         are re-fetched concurrently. A changed detail with a new history entry or
+         status marks the contract's chats as due now.
+      2) chats: contracts whose chats_next_refresh_at <= now (including those just marked)
+      - each upsert reschedules its part (changed → floor, quiet → backoff)
+    Returns number of processed requests.
     """
     cfg = _require_cfg()
     if not is_auth_ready():
@@ -503,109 +1172,212 @@ def refresh_stale_once(ttl_ms: int, max_items: Optional[int] = None) -> int:
     if not auth:
         return 0
 
-    older_than = now_ms() - int(ttl_ms)
     limit = max_items or cfg.page_size
 
-    # needs helper in db.py
+    def settle(kind: str, pending: List[Tuple[int, int, Future]]) -> int:
+        # upserts are queued on the writer and committed in groups; wait for them
+        changed_ids, updated_at = [], 0
+        for cid, fetched_at, fut in pending:
+            changed = fut.result()
+            _count_upsert(kind, changed)
+            if changed:
+                log_message(f"[refresh_stale_once] contract {kind} updated: id={cid}")
+                changed_ids.append(cid)
+                updated_at = max(updated_at, fetched_at)
+        if changed_ids:
+            _events.publish("contracts", changed_ids, updated_at)
+        return len(pending)
+
     conn = _db.open_rw()
     try:
-        stale_ids = _db.casely_get_stale_contract_ids(conn, older_than_ms=older_than, limit=limit)
-        #print(f"[refresh_stale_once] found {len(stale_ids)} stale ids older than {older_than} (now={now_ms()})")
         count = 0
-        for cid in stale_ids:
-            payload = fetch_detail_and_chats(int(cid), auth)
-            if payload is None:
+        pending: List[Tuple[int, int, Future]] = []
+        due_ids = _db.casely_get_due_contract_ids(conn, now_ms=now_ms(), limit=limit)
+        for cid, detail_str in fetch_many(fetch_detail, [int(c) for c in due_ids], auth):
+            if detail_str is None:
                 # e.g., 209 — stop early
-                return count
-
-
-            changed = _db.casely_upsert_fetched_contract(
-                conn,
-                id=int(cid),
-                detail_json_str=payload.detail_json_str,
-                chats_json_str=payload.chats_json_str,
-                fetched_at_ms=now_ms(),
-            )
-            if changed:
-                log_message(f"[refresh_stale_once] contract updated: id={cid}")
-            else:
-                # touch fetched_at only when unchanged
-                _db.casely_touch_fetched_at(conn, id=int(cid), fetched_at_ms=now_ms())
-
-            count += 1
-            if cfg.sleep_between_items_s > 0:
-                time.sleep(cfg.sleep_between_items_s)
-        return count
+                return count + settle("detail", pending)
+            fetched_at = now_ms()
+            pending.append((cid, fetched_at, _writer.submit(
+                _db.casely_upsert_fetched_detail,
+                id=cid,
+                detail_json_str=detail_str,
+                fetched_at_ms=fetched_at,
+                scheduler=next_refresh_interval_ms,
+            )))
+        # detail changes may mark chats due: commit them before picking due chats
+        count += settle("detail", pending)
+
+        pending = []
+        due_ids = _db.casely_get_due_chats_contract_ids(conn, now_ms=now_ms(), limit=limit)
+        for cid, chats_str in fetch_many(fetch_chats, [int(c) for c in due_ids], auth):
+            if chats_str is None:
+                break
+            fetched_at = now_ms()
+            pending.append((cid, fetched_at, _writer.submit(
+                _db.casely_upsert_fetched_chats,
+                id=cid,
+                chats_json_str=chats_str,
+                fetched_at_ms=fetched_at,
+                scheduler=next_chats_refresh_interval_ms,
+            )))
+        return count + settle("chats", pending)
     finally:
         conn.close()
 
 
+def list_item_fingerprint(raw_item: Dict[str, Any]) -> str:
+    """Hash of a LIST item's fields (key order independent)."""
+    return _db.compute_hash(json.dumps(raw_item, ensure_ascii=False, sort_keys=True, separators=(",", ":")))
+
+def sweep_list_once(max_pages: Optional[int] = None) -> int:
+    """
+    List sweep:
+      - Walk the first N list pages of every ListQuery (ignoring the id cursors)
+      - Save a fingerprint of each stored contract's list item
+      - Changed fingerprint → contract becomes due now (refresh_stale_once fetches it)
+      - Same fingerprint   → its next refresh is pushed back (bounded by refresh_max_ms),
+                             so one shared list request replaces two detail requests each
+    Returns number of contracts queued for refresh.
+    """
+    cfg = _require_cfg()
+    pages = cfg.list_sweep_pages if max_pages is None else max_pages
+    if pages <= 0 or not is_auth_ready():
+        return 0
+    auth = load_auth()
+    if not auth:
+        return 0
+
+    fingerprints: Dict[int, str] = {}
+    for query in _list_queries():
+        for page in range(1, pages + 1):
+            # start_cursor=0: a sweep never stops at the id cursor
+            items, has_more = fetch_list_page(auth, page, cfg.page_size, start_cursor=0, query=query)
+            if items is None:
+                break
+            for it in items:
+                # same contract in several queries: the first query's item wins
+                fingerprints.setdefault(it.id, list_item_fingerprint(it.meta or {}))
+            if not has_more:
+                break
+    if not fingerprints:
+        return 0
+
+    changed = _writer.run(
+        _db.casely_apply_list_fingerprints,
+        list(fingerprints.items()), now_ms=now_ms(), max_defer_ms=cfg.refresh_max_ms,
+    )
+    if changed:
+        log_message(f"[sweep_list_once] list item changed, queued for refresh: ids={changed}")
+    return len(changed)
+
+def _update_backlog_metric() -> None:
+    try:
+        conn = _db.open_rw()
+        try:
+            due = _db.casely_count_due(conn, now_ms=now_ms())
+        finally:
+            conn.close()
+    except Exception as e:
+        log_message(f"[poll_forever] backlog metric failed: {e!r}")
+        return
+    for kind, n in due.items():
+        M_REFRESH_BACKLOG.set(n, kind=kind)
+
+def _handle_message(msg: Dict[str, Any]) -> None:
+    if msg.get("type") == "set_auth":
+        access_token = msg.get("access_token")
+        user_id = msg.get("userId")
+        if access_token and user_id:
+            save_auth(access_token, user_id)
+
+def _drain_messages() -> None:
+    if _polling_queue is None:
+        return
+    while True:
+        try:
+            msg = _polling_queue.get_nowait()
+        except queue.Empty:
+            return
+        try:
+            _handle_message(msg)
+        except Exception as e:
+            log_message(f"[poll_forever] failed to handle message {msg.get('type')!r}: {e!r}")
+
 def poll_forever() -> None:
     """
     Run batches until stop signal:
-      1) If auth not ready or paused (209), sleep and continue
-      2) Run poll_pages_once()
-      3) If refresh_ttl_ms configured, run refresh_stale_once()
-      4) Sleep a bit between cycles
-      5) 매 루프마다 메시지 큐를 non-blocking으로 확인
+      1) Handle every queued message (set_auth, ...)
+      2) If auth not ready or paused (209), wait until woken (new token / message / stop);
+         if the origin circuit is open, wait until it allows a probe
+      3) Run poll_pages_once()
+      4) Every list_sweep_interval_s, run sweep_list_once()
+      5) If refresh_ttl_ms configured, run refresh_stale_once() (contracts that are due)
+      6) Wait sleep_between_cycles_s — post_message/save_auth/stop_poller cut the wait short
     """
     print("[poll_forever] started")
     cfg = _require_cfg()
     ev = get_stop_event()
-    global _polling_queue
+    global _last_sweep_at
     # print("[poll_forever] PollerConfig:")
     # print(f"  base_url: {cfg.base_url}")
     # print(f"  page_size: {cfg.page_size}")
-    # print(f"  sleep_between_items_s: {cfg.sleep_between_items_s} sec")
-    # print(f"  sleep_between_pages_s: {cfg.sleep_between_pages_s} sec")
+    # print(f"  sleep_between_cycles_s: {cfg.sleep_between_cycles_s} sec")
+    # print(f"  requests_per_second: {cfg.requests_per_second}")
     # print(f"  http_timeout_s: {cfg.http_timeout_s} sec")
     # print(f"  min_contract_id: {cfg.min_contract_id}")
     # print(f"  refresh_ttl_ms: {cfg.refresh_ttl_ms} ms")
     while not ev.is_set():
-        if _polling_queue is not None:
-            msg = None
-            while True:
-                try:
-                    msg = _polling_queue.get_nowait()
-                except queue.Empty:
-                    break
-            if msg is not None:
-                if msg.get("type") == "set_auth":
-                    access_token = msg.get("access_token")
-                    user_id = msg.get("userId")
-                    if access_token and user_id:
-                        save_auth(access_token, user_id)
-
+        _drain_messages()
 
         if not is_auth_ready():
-            time.sleep(cfg.sleep_between_pages_s)
+            _idle_wait(None)
+            continue
+
+        retry_after = origin_retry_after()
+        if retry_after > 0:
+            log_message(f"[poll_forever] origin circuit open, retrying in {retry_after:.1f}s")
+            _idle_wait(retry_after)
             continue
 
+        cycle_started = time.monotonic()
+
         # new items via LIST
-        _ = poll_pages_once()
+        n_new = poll_pages_once()
+
+        # list sweep (queues contracts whose list item changed)
+        if cfg.list_sweep_pages > 0 and time.monotonic() - _last_sweep_at >= cfg.list_sweep_interval_s:
+            _last_sweep_at = time.monotonic()
+            try:
+                sweep_list_once()
+            except Exception as e:
+                import traceback
+                print("[poll_forever] Exception in sweep_list_once:", e)
+                traceback.print_exc()
 
-        # TTL refresh
+        # scheduled refresh
+        n_refreshed = 0
         if cfg.refresh_ttl_ms:
             try:
-                _ = refresh_stale_once(cfg.refresh_ttl_ms)
+                n_refreshed = refresh_stale_once()
             except Exception as e:
                 import traceback
                 print("[poll_forever] Exception in refresh_stale_once:", e)
                 traceback.print_exc()
 
-        time.sleep(cfg.sleep_between_pages_s)
-
-# ---------------------------------------------------------------------
-# Utilities
-# ---------------------------------------------------------------------
-
-
+        M_POLL_CYCLES.inc()
+        M_POLL_CYCLE_SECONDS.observe(time.monotonic() - cycle_started)
+        _update_backlog_metric()
+
+        if n_new or n_refreshed:
+            st = _origin.pool_stats()
+            tr = _origin.transfer_stats().values()
+            wire_kb = sum(t["wire_bytes"] for t in tr) // 1024
+            decoded_kb = sum(t["decoded_bytes"] for t in tr) // 1024
+            log_message(
+                f"[poll_forever] cycle: new={n_new}, refreshed={n_refreshed}, "
+                f"http reused={st['reused']}/{st['created'] + st['reused']} (reconnects={st['reconnects']}), "
+                f"transfer={wire_kb}KiB wire / {decoded_kb}KiB decoded"
+            )
 
-def remove_filetext_fields(obj):
-    if isinstance(obj, dict):
-        obj.pop("fileText", None)
-        for v in obj.values():
-            remove_filetext_fields(v)
-    elif isinstance(obj, list):
-        for item in obj:
-            remove_filetext_fields(item)
+        _idle_wait(cfg.sleep_between_cycles_s)
@@ -1,6 +1,14 @@
 #!/usr/bin/env python3
 """
 Casely 서버
+- 고정 크기 워커 풀(PooledHTTPServer): 연결은 큐에 쌓이고 워커 스레드가 처리, 큐가 차면 503
+- 라우팅: ROUTES 테이블(메서드, 경로 정규식 → 핸들러 메서드)을 모듈 로드 시 한 번 컴파일
+- 조건부 응답: /api/contracts, /api/labels는 MAX(updated_at)/COUNT 기반 ETag, If-None-Match가 맞으면
+  본 쿼리 없이 304
+- POST /api/sync: 계약/라벨 증분을 한 읽기 트랜잭션(같은 스냅샷)에서 한 번에
+- 변경 알림: GET /api/events (SSE, long-poll 대체), 폴러/쓰기 API가 커밋 후 server/events.py로 publish
+- 압축: Accept-Encoding에 따라 JSON(1KiB 이상)/스트리밍 응답은 gzip/deflate,
+  정적 파일은 한 번 압축해서 메모리에 보관 (server/compression.py)
 """
 
 import http.server
@@ -8,254 +16,807 @@ import socketserver
 import json
 from urllib.parse import urlparse, parse_qs
 import os
+import posixpath
+import email.utils
+import hashlib
+import mimetypes
+import re
+import threading
 from datetime import datetime
+import time
 
 # from .utils import log_message
 
 
-from .polling import PollerConfig
-from .db import init_all
-from server.utils import now_ms
+from .polling import PollerConfig, post_message as post_poller_message
+from .polling import request_refresh as request_poller_refresh
+from .polling import AuthUnavailable, ContractNotFound, OriginFetchFailed, OriginUnavailable
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from .db import (
+    init_all,
+    request_conns,
+    read_tx,
+    casely_meta_get,
+    casely_get_chats_json,
+    casely_get_chat_messages_after,
+    casely_query_contracts,
+    casely_search,
+    casely_add_contract_label,
+    casely_remove_contract_label,
+    casely_update_contract_fields,
+    casely_contracts_validator,
+    casely_labels_validator,
+    casely_get_contracts_api,
+    casely_get_contracts_sync,
+    casely_get_labels_sync,
+)
+from .metrics import REGISTRY as metrics_registry
+from . import compression
+from . import writer as db_writer
+from . import events as change_events
+from server.utils import log_message, now_ms
 
 import queue
 
 # 폴링 메시지 큐 (전역)
 polling_queue = queue.Queue()
 
+# (메서드, 경로 정규식, 핸들러 메서드 이름). 경로 전체가 일치해야 하며 위에서부터 검사.
+# 정규식 그룹은 int로 변환해서 핸들러 인자로 전달 (url, qs 다음).
+ROUTES = [
+    ("GET", r"/api/auth", "get_auth"),
+    ("GET", r"/api/contracts/query", "get_contracts_query"),
+    ("GET", r"/api/contracts", "get_contracts"),
+    ("GET", r"/api/labels", "get_labels"),
+    ("GET", r"/api/chats", "get_chats"),
+    ("GET", r"/api/search", "get_search"),
+    ("GET", r"/api/events", "get_events"),
+    ("GET", r"/api/metrics", "get_metrics"),
+    ("PUT", r"/api/contracts/(\d+)/labels", "put_contract_label"),
+    ("DELETE", r"/api/contracts/(\d+)/labels", "delete_contract_label"),
+    ("PATCH", r"/api/contracts/(\d+)", "patch_contract"),
+    ("POST", r"/api/contracts/(\d+)/refresh", "post_refresh"),
+    ("POST", r"/api/sync", "post_sync"),
+    ("POST", r"/api/auth", "post_auth"),
+]
+
+
+def _compile_routes(routes):
+    table = {}
+    for method, pattern, name in routes:
+        table.setdefault(method, []).append((re.compile(pattern), name))
+    return table
+
+
+_ROUTE_TABLE = _compile_routes(ROUTES)
+
+# 정적 파일 본문 + gzip 본문 캐시 (파일 mtime/크기가 바뀌면 다시 읽음)
+_static_cache = compression.StaticCache()
+
+
+def _guess_type(path):
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+# /api/events
+SSE_KEEPALIVE_S = 15        # 이벤트가 없을 때 주석 줄을 보내는 간격 (끊긴 연결 감지 겸)
+SSE_MAX_STREAM_S = 300      # 스트림 하나의 최대 길이, 끝나면 EventSource가 Last-Event-ID로 재연결
+SSE_RETRY_MS = 1000
+SSE_BUSY_RETRY_MS = 10000   # 대기 슬롯이 없을 때: 밀린 이벤트만 보내고 닫음, 이 간격 뒤 재연결
+LONG_POLL_MAX_S = 25
+REFRESH_WAIT_DEFAULT_S = 15  # POST /api/contracts/{id}/refresh: 결과를 기다리는 기본/최대 시간
+REFRESH_WAIT_MAX_S = 30
+# refresh 결과를 기다리며 워커를 붙잡을 수 있는 요청 수 (run_server에서 워커 수에 맞춰 다시 만듦)
+#   슬롯이 없으면 기다리지 않고 202 queued → 결과는 /api/events의 contracts 이벤트로
+_refresh_waiters = threading.BoundedSemaphore(2)
+
+
+def _sse_event(event):
+    return f"id: {event['seq']}\nevent: change\ndata: {json.dumps(event)}\n\n".encode("utf-8")
+
+
+def _multi(qs, name):
+    """여러 값 쿼리 파라미터: 반복 파라미터와 콤마 구분을 모두 풀어서 (빈 값 제외)."""
+    return [v.strip() for raw in qs.get(name, []) for v in raw.split(",") if v.strip()]
+
+
+def _etag(validator, url, qs):
+    """검증값 + 경로 + 쿼리 파라미터로 만든 weak ETag (압축 여부와 무관하게 같은 값)."""
+    key = repr((validator, url.path, sorted(qs.items())))
+    return 'W/"%s"' % hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+
+
+def _contract_item_json(item, chats_json, delta, updated_since):
+    """
+    contracts 행 → /api/contracts 항목 JSON 텍스트, updated_at.
+    detail_json / detail_patch_json / 채팅 배열은 저장된 텍스트를 그대로 끼워 넣는다 (재인코딩 없음).
+    """
+    doc_json = item.pop("detail_json")
+    patch_json = item.pop("detail_patch_json")
+    patch_base = item.pop("detail_patch_base")
+    label_ids = item.pop("label_ids", None)  # /api/sync: JSON 배열 텍스트
+    item["updated_at"] = max(
+        item.get("source_updated_at", 0),
+        item.get("user_updated_at", 0),
+        item.get("deleted_at", 0) or 0
+    )
+    item["refresh_policy"] = item.get("refresh_policy", 0) or 0
+
+    raw = []  # (키, 이미 JSON인 텍스트)
+    if not delta:
+        raw.append(("detail", doc_json if doc_json is not None else "null"))
+    elif (item.get("detail_updated_at") or 0) <= updated_since:
+        pass
+    elif patch_json is not None and patch_base is not None and patch_base <= updated_since:
+        raw.append(("detail_patch", f'{{"base": {int(patch_base)}, "ops": {patch_json}}}'))
+    else:
+        raw.append(("detail", doc_json if doc_json is not None else "null"))
+    if not delta:
+        raw.append(("chats", chats_json or "[]"))
+    elif chats_json:
+        raw.append(("chats_added", chats_json))
+    if label_ids is not None:
+        raw.append(("label_ids", label_ids))
+
+    head = json.dumps(item, ensure_ascii=False)
+    if raw:
+        head = head[:-1] + "".join(f', "{k}": {v}' for k, v in raw) + "}"
+    return head, item["updated_at"]
+
+
+def _write_contract_items(out, conn, cur, delta, updated_since):
+    """
+    커서의 contracts 행을 fetchmany로 나눠 읽으며 JSON 배열 항목들로 out에 기록 (대괄호는 호출 측).
+    반환: 기록한 항목들의 max(updated_at, updated_since)
+    """
+    max_updated_at = updated_since
+    first = True
+    while True:
+        rows = cur.fetchmany(256)
+        if not rows:
+            break
+        if delta:
+            chat_ids = [r["id"] for r in rows if (r.get("chats_updated_at") or 0) > updated_since]
+            chats_by_id = casely_get_chats_json(conn, chat_ids, created_after_ms=updated_since)
+        else:
+            chats_by_id = casely_get_chats_json(conn, [r["id"] for r in rows])
+        for item in rows:
+            item_json, updated_at = _contract_item_json(item, chats_by_id.get(int(item["id"])), delta, updated_since)
+            max_updated_at = max(max_updated_at, updated_at)
+            out.write((b"" if first else b", ") + item_json.encode("utf-8"))
+            first = False
+    return max_updated_at
+
+
+def _label_items(rows):
+    """labels 행의 updated_at을 max(updated_at, deleted_at)으로. 반환: (rows, 그중 최대 updated_at)"""
+    max_updated_at = 0
+    for item in rows:
+        item["updated_at"] = max(item.get("updated_at", 0) or 0, item.get("deleted_at", 0) or 0)
+        max_updated_at = max(max_updated_at, item["updated_at"])
+    return rows, max_updated_at
+
+
+class _ResponseStream:
+    """
+    응답 본문 스트리밍. HTTP/1.1 요청이면 chunked, HTTP/1.0이면 연결 종료로 끝을 알린다.
+    작은 write는 buffer_size까지 모아서 한 청크로 보낸다. compressor가 있으면 압축 스트림으로 보낸다.
+    """
+
+    def __init__(self, wfile, chunked, buffer_size=64 * 1024, compressor=None):
+        self._wfile = wfile
+        self._chunked = chunked
+        self._compressor = compressor
+        self._buffer_size = buffer_size
+        self._buf = []
+        self._buffered = 0
+
+    def write(self, data):
+        if self._compressor is not None and data:
+            data = self._compressor.compress(data)
+        if not data:
+            return
+        self._buf.append(data)
+        self._buffered += len(data)
+        if self._buffered >= self._buffer_size:
+            self.flush()
 
-class RequestHandler(http.server.SimpleHTTPRequestHandler):
+    def flush(self):
+        if not self._buffered:
+            return
+        data = b"".join(self._buf)
+        self._buf, self._buffered = [], 0
+        if self._chunked:
+            self._wfile.write(b"%x\r\n" % len(data) + data + b"\r\n")
+        else:
+            self._wfile.write(data)
+        self._wfile.flush()
 
+    def close(self):
+        if self._compressor is not None:
+            tail = self._compressor.flush()
+            if tail:
+                self._buf.append(tail)
+                self._buffered += len(tail)
+        self.flush()
+        if self._chunked:
+            self._wfile.write(b"0\r\n\r\n")
+        self._wfile.flush()
 
 
-    def send_json_response(self, data, status=200):
+class RequestHandler(http.server.SimpleHTTPRequestHandler):
+    # 느린/멈춘 클라이언트가 워커를 붙잡지 않도록 소켓 타임아웃 (초)
+    timeout = 30
+
+    def send_json_response(self, data, status=200, headers=None):
+        self.send_body(json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json", status, headers)
+
+    def not_modified(self, etag):
+        """If-None-Match가 etag와 맞으면 304를 보내고 True. 클라이언트는 캐시된 본문을 그대로 씀."""
+        inm = self.headers.get("If-None-Match")
+        if not inm:
+            return False
+        tags = {t.strip().removeprefix("W/") for t in inm.split(",")}
+        if "*" not in tags and etag.removeprefix("W/") not in tags:
+            return False
+        self.send_response(304)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        return True
+
+    def _accepted_encoding(self, content_type):
+        if not compression.is_compressible(content_type):
+            return None
+        return compression.choose_encoding(self.headers.get("Accept-Encoding"))
+
+    def send_body(self, body, content_type, status=200, headers=None):
+        """본문 전송. 압축 가능한 타입이고 MIN_COMPRESS_BYTES 이상이면 클라이언트가 받는 인코딩으로 압축."""
+        encoding = self._accepted_encoding(content_type) if len(body) >= compression.MIN_COMPRESS_BYTES else None
+        if encoding:
+            body = compression.compress(body, encoding)
         self.send_response(status)
-        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Type", content_type)
+        if compression.is_compressible(content_type):
+            self.send_header("Vary", "Accept-Encoding")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_static(self, path):
+        """정적 파일 (캐시된 본문, 클라이언트가 gzip을 받으면 미리 압축해 둔 본문)."""
+        content_type = _guess_type(path)
+        entry = _static_cache.get(path, content_type)
+        if entry is None:
+            return super().do_GET()  # 캐시 대상이 아닌 큰 파일 등
+        ims = self.headers.get("If-Modified-Since")
+        if ims:
+            try:
+                if int(entry.mtime) <= email.utils.parsedate_to_datetime(ims).timestamp():
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+            except (TypeError, ValueError, OverflowError):
+                pass
+        use_gzip = entry.gzip_body is not None and self._accepted_encoding(content_type) == "gzip"
+        body = entry.gzip_body if use_gzip else entry.body
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        if entry.gzip_body is not None:
+            self.send_header("Vary", "Accept-Encoding")
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Last-Modified", self.date_time_string(int(entry.mtime)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def start_stream(self, content_type, status=200, headers=None, compress=True):
+        """헤더를 보내고 본문 스트림 반환 (Content-Length 없음, 응답 후 연결 종료)."""
+        chunked = self.request_version == "HTTP/1.1"
+        if chunked:
+            self.protocol_version = "HTTP/1.1"  # 이 응답만 (chunked는 1.1에서만 가능)
+        encoding = self._accepted_encoding(content_type) if compress else None
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if compression.is_compressible(content_type):
+            self.send_header("Vary", "Accept-Encoding")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        compressor = compression.stream_compressor(encoding) if encoding else None
+        return _ResponseStream(self.wfile, chunked, compressor=compressor)
+
+    def _dispatch(self, method):
+        """ROUTES에서 일치하는 핸들러를 호출. 없으면 False."""
+        url = urlparse(self.path)
+        for pattern, name in _ROUTE_TABLE.get(method, ()):
+            m = pattern.fullmatch(url.path)
+            if m:
+                getattr(self, name)(url, parse_qs(url.query), *(int(g) for g in m.groups()))
+                return True
+        return False
+
+    def _not_found(self):
+        self.send_response(404)
         self.end_headers()
-        self.wfile.write(json.dumps(data, ensure_ascii=False).encode("utf-8"))
 
     def do_GET(self):
-        from .db import casely_meta_get, request_conns
-        import posixpath
         # 1. API 핸들링
-        if self.path == "/api/auth":
-            with request_conns() as conn:
-                data = casely_meta_get(conn, "auth")
-            if data is None:
-                data = {}
-            self.send_json_response(data)
+        if self._dispatch("GET"):
+            return
+        if self.path.startswith("/api/"):
+            self._not_found()
             return
+        # 2. 정적 파일이 실제로 존재하면 그대로 서빙
+        # static_dir은 run_server에서 directory로 지정됨
+        static_dir = self.directory if hasattr(self, 'directory') else os.path.join(os.path.dirname(__file__), "static")
+        # 경로 정규화
+        relpath = self.path.lstrip("/")
+        relpath = relpath.split("?", 1)[0].split("#", 1)[0]
+        fullpath = os.path.join(static_dir, posixpath.normpath(relpath))
+        if os.path.isfile(fullpath):
+            return self._send_static(fullpath)
+        # 3. 그 외(SPA 라우트)는 index.html 반환
+        index_path = os.path.join(static_dir, "index.html")
+        if os.path.isfile(index_path):
+            return self._send_static(index_path)
+        # index.html도 없으면 404
+        self._not_found()
+
+    def do_PUT(self):
+        if not self._dispatch("PUT"):
+            self._not_found()
+
+    def do_DELETE(self):
+        if not self._dispatch("DELETE"):
+            self._not_found()
 
-        if self.path.startswith("/api/contracts"):
-            url = urlparse(self.path)
-            qs = parse_qs(url.query)
-            updated_since = int(qs.get("updated_since", ["0"])[0])
-            allow_deleted = qs.get("allow_deleted", ["0"])[0] == "1"
+    def do_PATCH(self):
+        if not self._dispatch("PATCH"):
+            self._not_found()
 
+    def do_POST(self):
+        if not self._dispatch("POST"):
+            self._not_found()
+
+    def get_auth(self, url, qs):
+        with request_conns() as conn:
+            data = casely_meta_get(conn, "auth")
+        if data is None:
+            data = {}
+        self.send_json_response(data)
+
+    def get_contracts_query(self, url, qs):
+        # GET /api/contracts/query?status=A,B&category=..&reviewer=..&label=1,2&viewcode=..
+        #                          &sort=-last_history_at,title&limit=100&offset=0&allow_deleted=1
+        # 같은 필터의 여러 값은 OR (반복 파라미터 또는 콤마 구분), 필터끼리는 AND
+
+        try:
+            label_ids = [int(x) for x in _multi(qs, "label")]
+            limit = min(max(int(qs.get("limit", ["100"])[0]), 1), 1000)
+            offset = max(int(qs.get("offset", ["0"])[0]), 0)
             with request_conns() as conn:
-                sql = "SELECT * FROM contracts WHERE (source_updated_at > ? OR user_updated_at > ?)"
-                if not allow_deleted:
-                    sql += " AND deleted_at IS NULL"
-                items = conn.execute(sql, (updated_since, updated_since)).fetchall()
-
-            max_updated_at = updated_since
-            for item in items:
-                item["detail"] = json.loads(item.pop("detail_json"))
-                item["chats"] = json.loads(item.pop("chats_json"))
-                item["updated_at"] = max(
-                    item.get("source_updated_at", 0),
-                    item.get("user_updated_at", 0),
-                    item.get("deleted_at", 0) or 0
+                items = casely_query_contracts(
+                    conn,
+                    statuses=_multi(qs, "status"),
+                    categories=_multi(qs, "category"),
+                    reviewers=_multi(qs, "reviewer"),
+                    label_ids=label_ids,
+                    viewcodes=_multi(qs, "viewcode"),
+                    sort=_multi(qs, "sort") or ["-last_history_at"],
+                    limit=limit,
+                    offset=offset,
+                    include_deleted=qs.get("allow_deleted", ["0"])[0] == "1",
                 )
-                if item["updated_at"] > max_updated_at:
-                    max_updated_at = item["updated_at"]
-                item["refresh_policy"] = item.get("refresh_policy", 0) or 0
-
-            self.send_json_response({
-                "max_updated_at": max_updated_at,
-                "items": items
-            })
+        except ValueError as e:
+            self.send_json_response({"error": str(e)}, status=400)
             return
-                
-        if self.path.startswith("/api/labels"):
-            url = urlparse(self.path)
-            qs = parse_qs(url.query)
-            updated_since = int(qs.get("updated_since", ["0"])[0])
 
-            with request_conns() as conn:
-                items = conn.execute("SELECT * FROM labels WHERE updated_at > ?", (updated_since,)).fetchall()
-                
-            max_updated_at = updated_since
-            for item in items:
-                item["updated_at"] = max(item.get("updated_at", 0) or 0, item.get("deleted_at", 0) or 0)
-                if item["updated_at"] > max_updated_at:
-                    max_updated_at = item["updated_at"]
-            
-            self.send_json_response({
-                "max_updated_at": max_updated_at,
-                "items": items
-            })
+        for item in items:
+            item["label_ids"] = json.loads(item["label_ids"] or "[]")
+        self.send_json_response({"items": items, "limit": limit, "offset": offset})
+
+    def get_contracts(self, url, qs):
+        updated_since = int(qs.get("updated_since", ["0"])[0])
+        allow_deleted = qs.get("allow_deleted", ["0"])[0] == "1"
+        # delta=1: 클라이언트가 updated_since 시점의 detail/chats를 갖고 있다고 보고
+        #   - 그 이후 안 바뀐 blob은 생략
+        #   - detail: 직전 버전(patch_base)이 updated_since 시점의 버전이면 "detail_patch": {"base", "ops"}
+        #   - chats: 그 이후 새로 기록된(또는 내용이 바뀐) 메시지만 "chats_added" (메시지 id로 병합)
+        #   - 그 외에는 전체 문서
+        # ids=1,2,3: updated_since와 무관하게 해당 계약의 전체 문서 (patch 적용 실패 시 재요청용)
+        delta = qs.get("delta", ["0"])[0] == "1"
+        ids = [int(x) for x in ",".join(qs.get("ids", [])).split(",") if x.strip().isdigit()]
+
+        # 행을 조금씩 읽으면서 저장된 JSON 텍스트(detail_json, patch, 채팅 배열)를 파싱 없이 그대로 이어 붙여 스트리밍.
+        # 메모리는 배치 크기만큼만, json.loads/dumps는 작은 메타 컬럼에만.
+        # max_updated_at은 다 보낸 뒤에야 알 수 있으므로 items 뒤에 온다.
+        if ids:
+            delta = False
+
+        with request_conns() as conn:
+            # 검증값을 본 쿼리보다 먼저 읽음: 사이에 쓰기가 끼면 ETag가 본문보다 오래된 쪽이 되어 다음 요청에서 200
+            etag = _etag(casely_contracts_validator(conn), url, qs)
+            if self.not_modified(etag):
+                return
+            cur = casely_get_contracts_api(
+                conn, ids=ids or None, updated_since=updated_since, include_deleted=allow_deleted
+            )
+            out = self.start_stream("application/json", headers={"ETag": etag, "Cache-Control": "no-cache"})
+            out.write(b'{"items": [')
+            max_updated_at = _write_contract_items(out, conn, cur, delta, updated_since)
+        out.write(f'], "max_updated_at": {int(max_updated_at)}, "delta": {json.dumps(delta)}}}'.encode("utf-8"))
+        out.close()
+
+    def get_labels(self, url, qs):
+        updated_since = int(qs.get("updated_since", ["0"])[0])
+
+        with request_conns() as conn:
+            etag = _etag(casely_labels_validator(conn), url, qs)
+            if self.not_modified(etag):
+                return
+            items = conn.execute("SELECT * FROM labels WHERE updated_at > ?", (updated_since,)).fetchall()
+
+        items, max_updated_at = _label_items(items)
+        max_updated_at = max(max_updated_at, updated_since)
+
+        self.send_json_response({
+            "max_updated_at": max_updated_at,
+            "items": items
+        }, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    def get_chats(self, url, qs):
+        # GET /api/chats?after=<seq>&contract_id=<id>&limit=<n>
+        # seq 커서 이후에 기록된 채팅 메시지 (새 메시지 + 내용이 바뀐 메시지), seq 순
+        try:
+            after = int(qs.get("after", ["0"])[0])
+            contract_id = int(qs["contract_id"][0]) if "contract_id" in qs else None
+            limit = min(max(int(qs.get("limit", ["500"])[0]), 1), 5000)
+        except ValueError:
+            self.send_json_response({"error": "Invalid query parameter"}, status=400)
             return
 
-        elif self.path.startswith("/api/"):
-            self.send_response(404)
-            self.end_headers()
+        with request_conns() as conn:
+            rows = casely_get_chat_messages_after(conn, after_seq=after, contract_id=contract_id, limit=limit + 1)
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        for row in rows:
+            row["message"] = json.loads(row.pop("message_json"))
+        self.send_json_response({
+            "next_after": rows[-1]["seq"] if rows else after,
+            "has_more": has_more,
+            "items": rows,
+        })
+
+    def get_events(self, url, qs):
+        # GET /api/events (Accept: text/event-stream) → SSE. 재연결 시 Last-Event-ID 이후 이벤트부터
+        # GET /api/events?after=<seq>&timeout=25 → long poll: 이벤트가 생기거나 timeout이 지나면 JSON 응답
+        #   after 없이 호출하면 바로 현재 seq 반환 (다음 요청의 after)
+        # 이벤트: {"seq", "kind": "contracts"|"labels"|"resync", "ids", "max_updated_at"}
+        #   데이터는 기존대로 /api/contracts, /api/labels를 updated_since로 가져옴
+        # 대기하는 요청 수는 BUS.max_waiters로 제한 (SSE/long poll이 워커 풀을 다 차지하지 않게)
+        sse = "text/event-stream" in (self.headers.get("Accept") or "")
+        try:
+            raw_after = qs.get("after", [self.headers.get("Last-Event-ID") or ""])[0].strip()
+            after = int(raw_after) if raw_after else None
+            timeout_s = min(max(float(qs.get("timeout", [LONG_POLL_MAX_S])[0]), 0), LONG_POLL_MAX_S)
+        except ValueError:
+            self.send_json_response({"error": "Invalid query parameter"}, status=400)
             return
-        # 2. 정적 파일이 실제로 존재하면 그대로 서빙
-        else:
-            # static_dir은 run_server에서 directory로 지정됨
-            static_dir = self.directory if hasattr(self, 'directory') else os.path.join(os.path.dirname(__file__), "static")
-            # 경로 정규화
-            relpath = self.path.lstrip("/")
-            relpath = relpath.split("?", 1)[0].split("#", 1)[0]
-            fullpath = os.path.join(static_dir, posixpath.normpath(relpath))
-            if os.path.isfile(fullpath):
-                return super().do_GET()
-            # 3. 그 외(SPA 라우트)는 index.html 반환
-            index_path = os.path.join(static_dir, "index.html")
-            if os.path.isfile(index_path):
-                self.send_response(200)
-                self.send_header("Content-Type", "text/html")
-                self.end_headers()
-                with open(index_path, "rb") as f:
-                    self.wfile.write(f.read())
-                return
-            # index.html도 없으면 404
-            self.send_response(404)
-            self.end_headers()
+        bus = change_events.BUS
+        if sse:
+            self._stream_events(bus, after)
             return
 
-    def do_PUT(self):
-        from .db import request_conns
-        import re
-
-        # PUT /api/contracts/{id}/labels (add single label)
-        m = re.match(r"/api/contracts/(\d+)/labels$", self.path)
-        if m:
-            contract_id = int(m.group(1))
-            content_length = int(self.headers.get("Content-Length", 0))
-            if content_length == 0:
-                self.send_json_response({"error": "Empty body"}, status=400)
-                return
-            body = self.rfile.read(content_length)
-            try:
-                data = json.loads(body.decode("utf-8"))
-                label_id = data.get("labelId")
-                if not isinstance(label_id, int):
-                    raise ValueError("labelId must be an int")
-            except Exception:
-                self.send_json_response(
-                    {"error": "Invalid JSON or missing 'labelId'"}, status=400
-                )
-                return
-            from .db import casely_add_contract_label
-
-            with request_conns(readonly=False) as conn:
-                updated_at = casely_add_contract_label(conn, contract_id, label_id)
-            self.send_json_response({"status": "ok", "updatedAt": updated_at})
+        if after is None:
+            self.send_json_response({"events": [], **bus.snapshot()})
+            return
+        entered = timeout_s > 0 and bus.try_enter()
+        try:
+            events = bus.wait(after, timeout_s if entered else 0)
+        finally:
+            if entered:
+                bus.leave()
+        snap = bus.snapshot()
+        snap["seq"] = events[-1]["seq"] if events else after
+        if timeout_s > 0 and not entered:
+            snap["retry_ms"] = SSE_BUSY_RETRY_MS  # 대기 슬롯 없음: 바로 응답, 클라이언트는 잠시 후 다시
+        self.send_json_response({"events": events, **snap})
+
+    def _stream_events(self, bus, after):
+        entered = bus.try_enter()
+        try:
+            snap = bus.snapshot()
+            if after is None:
+                after = snap["seq"]
+            # SSE는 이벤트마다 바로 내보내야 하므로 압축하지 않음
+            out = self.start_stream("text/event-stream", headers={"Cache-Control": "no-cache"}, compress=False)
+            retry_ms = SSE_RETRY_MS if entered else SSE_BUSY_RETRY_MS
+            out.write(f"retry: {retry_ms}\nid: {after}\nevent: hello\ndata: {json.dumps(snap)}\n\n".encode("utf-8"))
+            out.flush()
+            deadline = time.monotonic() + SSE_MAX_STREAM_S
+            while True:
+                events = bus.wait(after, SSE_KEEPALIVE_S if entered else 0)
+                for event in events:
+                    out.write(_sse_event(event))
+                    after = event["seq"]
+                if not entered or bus.closed or time.monotonic() >= deadline:
+                    break
+                if not events:
+                    out.write(b": keepalive\n\n")
+                out.flush()
+            out.close()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 클라이언트가 닫음
+        finally:
+            if entered:
+                bus.leave()
+
+    def get_search(self, url, qs):
+        # GET /api/search?q=검색어&status=A,B&label=1,2&limit=20
+        # detail(제목/설명/이력)과 채팅을 전문 검색, 계약별 최상위 결과 하나씩 (bm25 순)
+        # 주의: 3글자 미만 검색어만 있으면(예: "갑", "ab") 인덱스 없이 search_fts 전체를 훑음
+        #   (trigram은 3글자부터) → 계약/채팅 수에 비례해 느려짐
+
+        q = qs.get("q", [""])[0].strip()
+        if not q:
+            self.send_json_response({"error": "q is required"}, status=400)
+            return
+        try:
+            label_ids = [int(x) for x in _multi(qs, "label")]
+            limit = min(max(int(qs.get("limit", ["20"])[0]), 1), 100)
+        except ValueError:
+            self.send_json_response({"error": "Invalid query parameter"}, status=400)
             return
 
-        self.send_response(404)
-        self.end_headers()
-
-    def do_DELETE(self):
-        from .db import request_conns
-        import re
-
-        # DELETE /api/contracts/{id}/labels (remove single label)
-        m = re.match(r"/api/contracts/(\d+)/labels$", self.path)
-        if m:
-            contract_id = int(m.group(1))
-            content_length = int(self.headers.get("Content-Length", 0))
-            if content_length == 0:
-                self.send_response(400)
-                self.end_headers()
-                self.wfile.write(b"Empty body")
-                return
-            body = self.rfile.read(content_length)
-            try:
-                data = json.loads(body.decode("utf-8"))
-                label_id = data.get("labelId")
-                if not isinstance(label_id, int):
-                    raise ValueError("labelId must be an int")
-            except Exception:
-                self.send_response(400)
-                self.end_headers()
-                self.wfile.write(b"Invalid JSON or missing 'labelId'")
-                return
-            from .db import casely_remove_contract_label
+        started = time.monotonic()
+        try:
+            with request_conns() as conn:
+                items = casely_search(conn, q, statuses=_multi(qs, "status"), label_ids=label_ids, limit=limit)
+        except RuntimeError as e:
+            self.send_json_response({"error": str(e)}, status=501)
+            return
+        self.send_json_response({
+            "q": q,
+            "took_ms": round((time.monotonic() - started) * 1000, 1),
+            "items": items,
+        })
+
+    def get_metrics(self, url, qs):
+        if qs.get("format", ["json"])[0] == "prometheus":
+            body = metrics_registry.render_prometheus().encode("utf-8")
+            self.send_body(body, "text/plain; version=0.0.4; charset=utf-8")
+        else:
+            self.send_json_response(metrics_registry.to_json())
 
-            with request_conns(readonly=False) as conn:
-                updated_at = casely_remove_contract_label(conn, contract_id, label_id)
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(
-                json.dumps({"status": "ok", "updatedAt": updated_at}).encode("utf-8")
+    def put_contract_label(self, url, qs, contract_id):
+        content_length = int(self.headers.get("Content-Length", 0))
+        if content_length == 0:
+            self.send_json_response({"error": "Empty body"}, status=400)
+            return
+        body = self.rfile.read(content_length)
+        try:
+            data = json.loads(body.decode("utf-8"))
+            label_id = data.get("labelId")
+            if not isinstance(label_id, int):
+                raise ValueError("labelId must be an int")
+        except Exception:
+            self.send_json_response(
+                {"error": "Invalid JSON or missing 'labelId'"}, status=400
             )
             return
-        self.send_response(404)
+        # 쓰기는 writer 스레드에서 그룹 커밋
+        updated_at = db_writer.run(casely_add_contract_label, contract_id, label_id)
+        change_events.publish("contracts", [contract_id], updated_at)
+        self.send_json_response({"status": "ok", "updatedAt": updated_at})
+
+    def delete_contract_label(self, url, qs, contract_id):
+        content_length = int(self.headers.get("Content-Length", 0))
+        if content_length == 0:
+            self.send_response(400)
+            self.end_headers()
+            self.wfile.write(b"Empty body")
+            return
+        body = self.rfile.read(content_length)
+        try:
+            data = json.loads(body.decode("utf-8"))
+            label_id = data.get("labelId")
+            if not isinstance(label_id, int):
+                raise ValueError("labelId must be an int")
+        except Exception:
+            self.send_response(400)
+            self.end_headers()
+            self.wfile.write(b"Invalid JSON or missing 'labelId'")
+            return
+        updated_at = db_writer.run(casely_remove_contract_label, contract_id, label_id)
+        change_events.publish("contracts", [contract_id], updated_at)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
         self.end_headers()
-
-    def do_PATCH(self):
-        from .db import request_conns
-        import re
-
-        print("Received PATCH", self.path)
-
-        # PATCH /api/contracts/{id}
-        m = re.match(r"/api/contracts/(\d+)$", self.path)
-        if m:
-            print
-            contract_id = int(m.group(1))
-            content_length = int(self.headers.get("Content-Length", 0))
-            if content_length == 0:
-                print("len<0")
-                self.send_json_response({"error": "Empty body"}, status=400)
-                return
-            body = self.rfile.read(content_length)
+        self.wfile.write(
+            json.dumps({"status": "ok", "updatedAt": updated_at}).encode("utf-8")
+        )
+
+    def patch_contract(self, url, qs, contract_id):
+        content_length = int(self.headers.get("Content-Length", 0))
+        if content_length == 0:
+            log_message("PATCH /api/contracts/%s: empty body", contract_id)
+            self.send_json_response({"error": "Empty body"}, status=400)
+            return
+        body = self.rfile.read(content_length)
+        try:
+            data = json.loads(body.decode("utf-8"))
+            if not isinstance(data, dict):
+                raise ValueError("Payload must be a JSON object")
+            # 허용 필드만 추출
+            allowed_fields = {
+                "refresh_policy": int,
+                "notes": str,
+                #"user_updated_at": int,
+                #"source_fetched_at": int,
+                #"source_updated_at": int,
+                #"deleted_at": int,
+            }
+            update_fields = {}
+            for k, v in data.items():
+                if k in allowed_fields:
+                    expected_type = allowed_fields[k]
+                    if not isinstance(v, expected_type):
+                        raise ValueError(f"Field '{k}' must be {expected_type.__name__}")
+                    update_fields[k] = v
+            if not update_fields:
+                raise ValueError("No valid fields to update")
+        except Exception as e:
+            log_message("PATCH /api/contracts/%s: invalid body: %s", contract_id, e)
+            self.send_json_response({"error": f"Invalid JSON or fields: {e}"}, status=400)
+            return
+        update_fields["user_updated_at"] = now_ms()
+        updated = db_writer.run(casely_update_contract_fields, contract_id, update_fields)
+        if updated:
+            change_events.publish("contracts", [contract_id], update_fields["user_updated_at"])
+        self.send_json_response({"status": "ok", "updated": updated, "fields": list(update_fields.keys())})
+
+    def post_refresh(self, url, qs, contract_id):
+        content_length = int(self.headers.get("Content-Length", 0))
+        data = {}
+        if content_length:
             try:
-                data = json.loads(body.decode("utf-8"))
+                data = json.loads(self.rfile.read(content_length).decode("utf-8")) or {}
                 if not isinstance(data, dict):
-                    print("not dict", repr(data))
                     raise ValueError("Payload must be a JSON object")
-                # 허용 필드만 추출
-                allowed_fields = {
-                    "refresh_policy": int,
-                    "notes": str,
-                    #"user_updated_at": int,
-                    #"source_fetched_at": int,
-                    #"source_updated_at": int,
-                    #"deleted_at": int,
-                }
-                update_fields = {}
-                for k, v in data.items():
-                    if k in allowed_fields:
-                        expected_type = allowed_fields[k]
-                        if not isinstance(v, expected_type):
-                            raise ValueError(f"Field '{k}' must be {expected_type.__name__}")
-                        update_fields[k] = v
-                if not update_fields:
-                    raise ValueError("No valid fields to update")
             except Exception as e:
-                print("Error parsing PATCH body:", e)
-                self.send_json_response({"error": f"Invalid JSON or fields: {e}"}, status=400)
+                self.send_json_response({"error": f"Invalid JSON: {e}"}, status=400)
                 return
-            # 동적 SQL 생성
-            update_fields["user_updated_at"] = now_ms()
-            set_clause = ", ".join([f"{k}=?" for k in update_fields.keys()])
-            values = list(update_fields.values()) + [contract_id]
-            sql = f"UPDATE contracts SET {set_clause} WHERE id=?"
-            print("Executing SQL:", sql, values)
-            with request_conns(readonly=False) as conn:
-                cur = conn.execute(sql, values)
-                updated = cur.rowcount
-            self.send_json_response({"status": "ok", "updated": updated, "fields": list(update_fields.keys())})
+        wait = bool(data.get("wait", True))
+        try:
+            timeout_s = data.get("timeout_s", REFRESH_WAIT_DEFAULT_S)
+            if isinstance(timeout_s, bool):
+                raise TypeError("bool")
+            timeout_s = min(max(float(timeout_s or 0), 0), REFRESH_WAIT_MAX_S)
+        except (TypeError, ValueError):
+            self.send_json_response({"error": "timeout_s must be a number"}, status=400)
             return
 
-        print("No matching PATCH handler")
-        self.send_response(404)
-        self.end_headers()
-        
+        try:
+            fut = request_poller_refresh(contract_id)
+        except ContractNotFound as e:
+            self.send_json_response({"error": str(e), "id": contract_id}, status=404)
+            return
+        # 기다리는 요청 수 제한: origin이 막혔을 때 refresh 대기가 워커 풀을 다 차지하지 않게
+        if not wait or timeout_s <= 0 or not _refresh_waiters.acquire(blocking=False):
+            self.send_json_response({"status": "queued", "id": contract_id}, status=202)
+            return
+        try:
+            result = fut.result(timeout=timeout_s)
+        except FutureTimeoutError:
+            self.send_json_response({"status": "queued", "id": contract_id}, status=202)
+            return
+        except ContractNotFound as e:
+            self.send_json_response({"error": str(e), "id": contract_id}, status=404)
+            return
+        except (AuthUnavailable, OriginUnavailable) as e:
+            self.send_json_response({"error": str(e), "id": contract_id}, status=503)
+            return
+        except OriginFetchFailed as e:
+            self.send_json_response({"error": str(e), "id": contract_id}, status=502)
+            return
+        except Exception as e:
+            log_message(f"[post_refresh] refresh of {contract_id} failed: {e!r}")
+            self.send_json_response({"error": "refresh failed", "id": contract_id}, status=500)
+            return
+        finally:
+            _refresh_waiters.release()
+        self.send_json_response({
+            "status": "ok",
+            "id": contract_id,
+            "changed": result["changed"],
+            "detailChanged": result["detail_changed"],
+            "chatsChanged": result["chats_changed"],
+            "updatedAt": result["updated_at"],
+        })
+
+    def post_sync(self, url, qs):
+        # POST /api/sync  {"contracts": <ms>, "labels": <ms>, "delta": false}
+        #             또는 {"since": {"contracts": <ms>, "labels": <ms>}}
+        # 커서(updated_at) 이후 바뀐 계약(삭제 포함)/라벨을 한 읽기 트랜잭션에서 → 둘이 같은 DB 상태
+        # 응답: {"labels": {"items", "max_updated_at"}, "contracts": {"items", "max_updated_at", "delta"}}
+        #   계약 항목은 /api/contracts와 같은 모양 + label_ids (라벨 지정)
+        content_length = int(self.headers.get("Content-Length", 0))
+        if content_length == 0:
+            self.send_json_response({"error": "Empty body"}, status=400)
+            return
+        try:
+            data = json.loads(self.rfile.read(content_length).decode("utf-8"))
+            if not isinstance(data, dict):
+                raise ValueError("Payload must be a JSON object")
+            since = data.get("since", data)
+            contracts_since = int(since.get("contracts") or 0)
+            labels_since = int(since.get("labels") or 0)
+            delta = bool(data.get("delta", False))
+        except Exception as e:
+            self.send_json_response({"error": f"Invalid JSON or cursors: {e}"}, status=400)
+            return
+
+        with request_conns() as conn, read_tx(conn):
+            # 변경 없음 단축: ETag와 같은 가벼운 집계로 두 커서가 최신이면 본 쿼리 생략
+            #   (폴링 대부분이 이 경우 — 304 대신 빈 items)
+            c_src, c_user, _ = casely_contracts_validator(conn)
+            l_upd, _, _ = casely_labels_validator(conn)
+            if max(c_src, c_user) <= contracts_since and l_upd <= labels_since:
+                self.send_json_response({
+                    "labels": {"items": [], "max_updated_at": labels_since},
+                    "contracts": {"items": [], "max_updated_at": contracts_since, "delta": delta},
+                })
+                return
+            labels, labels_max = _label_items(casely_get_labels_sync(conn, labels_since))
+            cur = casely_get_contracts_sync(conn, contracts_since)
+            out = self.start_stream("application/json")
+            out.write(json.dumps({
+                "labels": {"items": labels, "max_updated_at": max(labels_max, labels_since)},
+            }, ensure_ascii=False)[:-1].encode("utf-8"))
+            out.write(b', "contracts": {"items": [')
+            contracts_max = _write_contract_items(out, conn, cur, delta, contracts_since)
+        out.write(f'], "max_updated_at": {int(contracts_max)}, "delta": {json.dumps(delta)}}}}}'.encode("utf-8"))
+        out.close()
+
+    def post_auth(self, url, qs):
+        self.log_message("Received /api/auth POST request")
+
+        content_length = int(self.headers.get("Content-Length", 0))
+        if content_length == 0:
+            self.send_json_response({"status": "ok"})
+            return
+        body = self.rfile.read(content_length)
+        try:
+            data = json.loads(body.decode("utf-8"))
+        except Exception:
+            self.send_json_response({"status": "ok"})
+            return
+        access_token = data.get("access_token")
+        user_id = data.get("userId")
+        if not access_token or not user_id:
+            self.send_response(400)
+            self.end_headers()
+            self.wfile.write(b"access_token and userId required")
+            return
+        # 메시지를 polling 쓰레드로 전달 (대기 중인 폴러를 바로 깨움)
+        post_poller_message(
+            {"type": "set_auth", "access_token": access_token, "userId": user_id}
+        )
+        self.send_json_response({"status": "ok"})
+
     # 라벨 추가/제거 엔드포인트 완전 제거
     def send_header(self, keyword, value):
         # 모든 응답에 CORS 허용 헤더 추가
@@ -271,90 +832,120 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
         self.send_response(204)
         self.send_header("Access-Control-Allow-Origin", "*")
         self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS, PATCH, PUT, DELETE")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type, Authorization")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type, Authorization, If-None-Match")
         self.end_headers()
 
     # def log_message(self, format, *args):
     #     pass  # 아무것도 하지 않음 → 기본 로그 suppress
 
-    def do_POST(self):
-        if self.path == "/api/auth":
-            self.log_message("Received /api/auth POST request")
 
-            content_length = int(self.headers.get("Content-Length", 0))
-            if content_length == 0:
-                self.send_json_response({"status": "ok"})
+M_HTTP_REJECTED = metrics_registry.counter(
+    "casely_http_rejected_total", "Connections answered with 503 because the request queue was full"
+)
+M_HTTP_QUEUE_WAIT = metrics_registry.histogram(
+    "casely_http_queue_wait_seconds", "Time a connection waited in the request queue",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+
+
+class PooledHTTPServer(socketserver.TCPServer):
+    """
+    고정 크기 워커 풀 HTTP 서버 (ThreadingMixIn의 연결당 스레드 대체).
+    - serve_forever 스레드는 accept한 연결을 큐에 넣기만 하고, workers개의 워커가 꺼내서 처리
+    - 큐(backlog)가 가득 차면 바로 503 + Retry-After로 응답하고 닫음 (backpressure)
+    - HTTP/1.0(연결당 요청 하나)이라 유휴 keep-alive 연결이 워커를 차지하지 않음
+    """
+
+    allow_reuse_address = True
+    request_queue_size = 128  # listen() backlog
+
+    def __init__(self, server_address, handler, *, workers=8, backlog=64):
+        super().__init__(server_address, handler)
+        self._queue = queue.Queue(maxsize=max(1, backlog))
+        self._busy = 0
+        self._busy_lock = threading.Lock()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"casely-http-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for t in self._workers:
+            t.start()
+        metrics_registry.callback(
+            "casely_http_queue_depth", "Connections waiting for a worker",
+            lambda: {(): self._queue.qsize()},
+        )
+        metrics_registry.callback(
+            "casely_http_workers_busy", "Workers handling a request",
+            lambda: {(): self._busy},
+        )
+
+    def process_request(self, request, client_address):
+        try:
+            self._queue.put_nowait((request, client_address, time.monotonic()))
+        except queue.Full:
+            M_HTTP_REJECTED.inc()
+            self._reject(request)
+
+    def _reject(self, request):
+        body = b'{"error": "server busy"}'
+        # accept 스레드에서 실행되므로 절대 블록하지 않음
+        try:
+            # 요청을 읽어 두지 않고 닫으면 RST로 끊겨 클라이언트가 503을 못 받을 수 있음
+            #   이미 도착한 만큼만 비움 (아직 안 보낸 클라이언트를 기다리지 않음)
+            request.setblocking(False)
+            request.recv(65536)
+        except (BlockingIOError, OSError):
+            pass
+        try:
+            request.sendall(
+                b"HTTP/1.0 503 Service Unavailable\r\n"
+                b"Retry-After: 1\r\n"
+                b"Access-Control-Allow-Origin: *\r\n"
+                b"Content-Type: application/json\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+                b"Connection: close\r\n\r\n" + body
+            )
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
                 return
-            body = self.rfile.read(content_length)
+            request, client_address, queued_at = item
+            M_HTTP_QUEUE_WAIT.observe(time.monotonic() - queued_at)
+            with self._busy_lock:
+                self._busy += 1
             try:
-                data = json.loads(body.decode("utf-8"))
+                self.finish_request(request, client_address)
             except Exception:
-                self.send_json_response({"status": "ok"})
-                return
-            access_token = data.get("access_token")
-            user_id = data.get("userId")
-            if not access_token or not user_id:
-                self.send_response(400)
-                self.end_headers()
-                self.wfile.write(b"access_token and userId required")
-                return
-            # 메시지를 polling 쓰레드로 전달
-            polling_queue.put(
-                {"type": "set_auth", "access_token": access_token, "userId": user_id}
-            )
-            self.send_json_response({"status": "ok"})
-            return
-        # elif self.path == "/api/sync":
-        #     # Sync endpoint: expects JSON body { since: { contract: ms, label: ms } }
-        #     content_length = int(self.headers.get("Content-Length", 0))
-        #     if content_length == 0:
-        #         self.send_response(400)
-        #         self.end_headers()
-        #         self.wfile.write(b"Empty body")
-        #         return
-        #     body = self.rfile.read(content_length)
-        #     try:
-        #         data = json.loads(body.decode("utf-8"))
-        #         since = data.get("since", {})
-        #         contracts_since = int(since.get("contracts", 0))
-        #         labels_since = int(since.get("labels", 0))
-        #     except Exception:
-        #         self.send_response(400)
-        #         self.end_headers()
-        #         self.wfile.write(b"Invalid JSON or missing 'since'")
-        #         return
-        #     from .db import (
-        #         casely_get_contracts_sync,
-        #         casely_get_labels_sync,
-        #         request_conns,
-        #     )
-
-        #     with request_conns() as conn:
-        #         contracts = casely_get_contracts_sync(conn, contracts_since)
-        #         labels = casely_get_labels_sync(conn, labels_since)
-
-        #     # detail_json, chats_json을 파싱해서 반환
-        #     def contract_to_api(row):
-        #         out = row
-        #         out["id"] = row.get("id")
-        #         out["detail"] = json.loads(row.pop("detail_json"))
-        #         out["chats"] = json.loads(row.pop("chats_json"))
-        #         out["updated_at"] = max(
-        #             row.get("source_updated_at", 0), row.get("user_updated_at", 0)
-        #         )
-        #         return out
-
-        #     contracts_api = [contract_to_api(dict(r)) for r in contracts]
-        #     resp = {"contracts": contracts_api, "labels": labels}
-        #     self.send_json_response(resp)
-        #     return
-        else:
-            self.send_response(404)
-            self.end_headers()
-
-
-def run_server(port=8080):
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+                with self._busy_lock:
+                    self._busy -= 1
+
+    def server_close(self):
+        super().server_close()
+        for _ in self._workers:
+            self._queue.put(None)
+
+
+def run_server(port=8080, sqlite_profile="default", workers=8, backlog=64):
+    """
+    workers: 워커 스레드 수 (0이면 예전처럼 연결당 스레드, ThreadingMixIn)
+    backlog: 워커를 기다릴 수 있는 연결 수, 넘치면 503
+    """
+    # SQLite 커넥션 PRAGMA 프로필 ("default" | "low_memory" | "fast", db.SQLITE_PROFILES)
+    from .db import set_sqlite_profile
+
+    set_sqlite_profile(sqlite_profile)
     static_dir = os.path.join(os.path.dirname(__file__), "static")
+    # 정적 파일을 미리 읽고 압축해 둠 (첫 로드부터 압축 본문)
+    files, saved = _static_cache.warm(static_dir, _guess_type)
+    print(f"Static files cached: {files} (gzip saves {saved // 1024} KiB)")
     handler = lambda *args, **kwargs: RequestHandler(
         *args, directory=static_dir, **kwargs
     )
@@ -365,7 +956,7 @@ def run_server(port=8080):
         daemon_threads = True
 
     # 폴링 설정 등록 및 별도 쓰레드에서 실행
-    config = PollerConfig(base_url="http://localhost:8000", sleep_between_pages_s=1)
+    config = PollerConfig(base_url="http://localhost:8000", sleep_between_cycles_s=1)
     from .polling import init_poller
 
     init_poller(config)
@@ -375,13 +966,25 @@ def run_server(port=8080):
 
     polling_start_poller(polling_queue)
 
-    with ThreadedTCPServer(("", port), handler) as httpd:
+    # SSE/long poll로 대기할 수 있는 요청 수: 워커의 1/4 (나머지는 일반 요청용)
+    change_events.BUS.max_waiters = max(1, workers // 4) if workers > 0 else 32
+    # refresh 결과 대기도 같은 비율로
+    global _refresh_waiters
+    _refresh_waiters = threading.BoundedSemaphore(max(1, workers // 4) if workers > 0 else 32)
+    if workers > 0:
+        httpd = PooledHTTPServer(("", port), handler, workers=workers, backlog=backlog)
+    else:
+        httpd = ThreadedTCPServer(("", port), handler)
+    with httpd:
         print(f"Server running on port {port}")
         try:
             httpd.serve_forever()
         except KeyboardInterrupt:
             print("\n서버를 종료합니다...")
+            change_events.BUS.close()  # 대기 중인 SSE/long poll 종료
             httpd.shutdown()
+            # 대기 중인 쓰기를 커밋하고 writer 스레드 종료
+            db_writer.stop_writer()
 
 
 if __name__ == "__main__":
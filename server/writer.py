@@ -0,0 +1,241 @@
+# writer.py
+# -*- coding: utf-8 -*-
+
+"""
+Group-commit writer for the casely DB (standard library only).
+
+One thread ("casely-writer") owns the read-write connection. Other threads
+submit write operations fn(conn, *args, **kwargs) and get a Future back:
+
+  - queued ops are run back to back inside one BEGIN IMMEDIATE transaction,
+    each in its own SAVEPOINT, so a failing op is rolled back alone and only
+    its future gets the exception
+  - the batch is committed when the queue runs dry (after a short linger),
+    when max_batch ops ran, or max_delay_s after its first op — whichever
+    comes first; futures resolve only after COMMIT (or all fail if it fails)
+  - one COMMIT (one WAL sync) per batch instead of per op, and a single
+    writer means no busy_timeout waits between the poller and request threads
+
+db.tx_immediate is re-entrant, so the casely_* write functions run unchanged
+inside the batch. Ops submitted from the writer thread itself run inline.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from server import db as _db
+from server import metrics as _metrics
+
+Op = Tuple[Callable[..., Any], tuple, dict, Future]
+
+M_BATCH_SIZE = _metrics.histogram(
+    "casely_writer_batch_ops", "Write ops committed per transaction",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+M_COMMIT_LATENCY = _metrics.histogram(
+    "casely_writer_commit_latency_seconds", "Time from submit to commit of a write op",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+M_OP_ERRORS = _metrics.counter("casely_writer_op_errors_total", "Write ops that raised (rolled back)")
+
+
+class GroupCommitWriter:
+    def __init__(
+        self,
+        open_conn: Callable[[], Any] = _db.open_rw,
+        *,
+        max_batch: int = 64,
+        max_delay_s: float = 0.05,
+        linger_s: float = 0.002,
+        name: str = "casely-writer",
+    ):
+        self._open_conn = open_conn
+        self.max_batch = max(1, int(max_batch))
+        self.max_delay_s = max(0.0, float(max_delay_s))
+        self.linger_s = max(0.0, min(float(linger_s), self.max_delay_s))
+        self._q: "queue.Queue[Optional[Tuple[Op, float]]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._conn = None
+        self._stopping = False
+        self._batches = 0
+        self._ops = 0
+
+    # ---- public -------------------------------------------------------
+
+    def start(self) -> "GroupCommitWriter":
+        self._thread.start()
+        return self
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Queue fn(conn, *args, **kwargs); the future resolves after its batch commits."""
+        fut: Future = Future()
+        if threading.current_thread() is self._thread:
+            # called from inside another op: run in the current transaction
+            try:
+                fut.set_result(fn(self._conn, *args, **kwargs))
+            except BaseException as e:
+                fut.set_exception(e)
+            return fut
+        if self._stopping:
+            raise RuntimeError("writer stopped")
+        self._q.put(((fn, args, kwargs, fut), time.monotonic()))
+        return fut
+
+    def run(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """submit() and wait for the committed result (re-raises the op's exception)."""
+        return self.submit(fn, *args, **kwargs).result(timeout)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait until everything submitted so far is committed."""
+        self.run(lambda conn: None, timeout=timeout)
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """Commit what is queued, then stop the thread."""
+        self._stopping = True
+        self._q.put(None)
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self._batches,
+            "ops": self._ops,
+            "queued": self._q.qsize(),
+            "alive": self._thread.is_alive(),
+        }
+
+    # ---- writer thread ------------------------------------------------
+
+    def _run(self) -> None:
+        self._conn = self._open_conn()
+        try:
+            while True:
+                item = self._q.get()
+                if item is None:
+                    return
+                if not self._run_batch(item):
+                    return
+        finally:
+            self._conn.close()
+
+    def _run_batch(self, first: Tuple[Op, float]) -> bool:
+        """Run one batch starting with `first`. Returns False once the stop marker was seen."""
+        conn = self._conn
+        deadline = time.monotonic() + self.max_delay_s
+        done: List[Tuple[Future, bool, Any, float]] = []  # (future, ok, result/exception, submitted_at)
+        keep_running = True
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except Exception as e:
+            (_, _, _, fut), _ = first
+            fut.set_exception(e)
+            return True
+
+        item: Optional[Tuple[Op, float]] = first
+        while item is not None:
+            (fn, args, kwargs, fut), submitted_at = item
+            if fut.set_running_or_notify_cancel():
+                done.append((fut, *self._run_op(conn, fn, args, kwargs), submitted_at))
+            if len(done) >= self.max_batch:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._q.get(timeout=min(self.linger_s, remaining)) if self.linger_s else self._q.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                keep_running = False
+                self._drain_rest(done)
+                break
+
+        try:
+            conn.execute("COMMIT")
+        except Exception as e:
+            try:
+                conn.execute("ROLLBACK")
+            except Exception:
+                pass
+            for fut, _, _, _ in done:
+                fut.set_exception(e)
+            return keep_running
+
+        now = time.monotonic()
+        self._batches += 1
+        self._ops += len(done)
+        M_BATCH_SIZE.observe(len(done))
+        for fut, ok, value, submitted_at in done:
+            M_COMMIT_LATENCY.observe(now - submitted_at)
+            if ok:
+                fut.set_result(value)
+            else:
+                fut.set_exception(value)
+        return keep_running
+
+    def _drain_rest(self, done: list) -> None:
+        """On stop: run whatever is still queued in the current transaction."""
+        while True:
+            try:
+                item = self._q.get_nowait()
+            except queue.Empty:
+                return
+            if item is None:
+                continue
+            (fn, args, kwargs, fut), submitted_at = item
+            if fut.set_running_or_notify_cancel():
+                done.append((fut, *self._run_op(self._conn, fn, args, kwargs), submitted_at))
+
+    @staticmethod
+    def _run_op(conn, fn, args, kwargs) -> Tuple[bool, Any]:
+        conn.execute("SAVEPOINT writer_op")
+        try:
+            result = fn(conn, *args, **kwargs)
+        except BaseException as e:
+            conn.execute("ROLLBACK TO writer_op")
+            conn.execute("RELEASE writer_op")
+            M_OP_ERRORS.inc()
+            return False, e
+        conn.execute("RELEASE writer_op")
+        return True, result
+
+
+# -------------------------------------------------
+# Process-wide writer (started on first use)
+# -------------------------------------------------
+_writer: Optional[GroupCommitWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> GroupCommitWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = GroupCommitWriter().start()
+        return _writer
+
+
+def submit(fn: Callable[..., Any], *args, **kwargs) -> Future:
+    return get_writer().submit(fn, *args, **kwargs)
+
+
+def run(fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+    return get_writer().run(fn, *args, timeout=timeout, **kwargs)
+
+
+def stop_writer(timeout: Optional[float] = 5.0) -> None:
+    global _writer
+    with _writer_lock:
+        w, _writer = _writer, None
+    if w is not None:
+        w.stop(timeout)
+
+
+_metrics.callback(
+    "casely_writer_queue_depth", "Write ops waiting for the writer thread",
+    lambda: {(): _writer.stats()["queued"]} if _writer is not None else {},
+)